@@ -0,0 +1,98 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Compare two results files of compile_time.py and flag regressions.
+
+A demo and option set regresses if its total wall time, the time of a
+compiler stage, its peak memory or the size of its generated code
+grows by more than the tolerance. Small absolute changes in time are
+ignored, as they are dominated by noise. Exits with status 1 if there
+are regressions, e.g. to fail a CI job.
+
+Example::
+
+    python benchmarks/compare_compile_time.py main.json branch.json --tolerance 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(filename):
+    """Load results, indexed by demo and option set."""
+    with open(filename) as f:
+        data = json.load(f)
+    return {(r["demo"], r["options"]): r for r in data["results"]}
+
+
+def metrics(result):
+    """Return the metrics of a result, as a dict from name to (value, kind)."""
+    m = {"wall_time": (result["wall_time"], "time"), "code_size": (result["code_size"], "size")}
+    for stage, t in result["stages"].items():
+        m[f"{stage} time"] = (t, "time")
+    for stage, mem in result.get("peak_memory", {}).items():
+        if mem is not None:
+            m[f"{stage} memory"] = (mem, "size")
+    return m
+
+
+def compare(base, new, tolerance, min_time):
+    """Compare results, and return the rows of the comparison and the regressions."""
+    rows = []
+    regressions = []
+    for key in sorted(base.keys() & new.keys()):
+        if "error" in base[key] or "error" in new[key]:
+            if "error" in new[key] and "error" not in base[key]:
+                regressions.append((key, "error", new[key]["error"]))
+            continue
+
+        base_metrics = metrics(base[key])
+        for name, (value, kind) in metrics(new[key]).items():
+            if name not in base_metrics:
+                continue
+            base_value = base_metrics[name][0]
+            ratio = value / base_value if base_value else float("inf") if value else 1.0
+            rows.append((key, name, base_value, value, ratio))
+            if ratio > 1 + tolerance and (kind != "time" or value - base_value > min_time):
+                regressions.append((key, name, f"{base_value:.4g} -> {value:.4g} ({ratio:.2f}x)"))
+    return rows, regressions
+
+
+def main():
+    """Compare results files."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help="results file of the reference")
+    parser.add_argument("new", help="results file to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative tolerance")
+    parser.add_argument(
+        "--min-time", type=float, default=0.005, help="ignore time changes below this [s]"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="print all metrics")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    rows, regressions = compare(base, new, args.tolerance, args.min_time)
+
+    if args.verbose:
+        print(f"{'demo':>22} {'options':>18} {'metric':>22} {'base':>12} {'new':>12} {'ratio':>6}")
+        for (demo, options), name, base_value, value, ratio in rows:
+            print(
+                f"{demo:>22} {options:>18} {name:>22} {base_value:12.4g} {value:12.4g} {ratio:6.2f}"
+            )
+
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"Only in {'base' if key in base else 'new'}: {key[0]} ({key[1]})")
+
+    if regressions:
+        print(f"{len(regressions)} regressions:")
+        for (demo, options), name, message in regressions:
+            print(f"  {demo} ({options}) {name}: {message}")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Benchmark the compile time of the demo forms.
+
+Runs compile_ufl_objects on each demo under several option sets, and
+writes the wall time and peak memory of each compiler stage and the
+size of the generated code to a JSON results file. Times are the
+minimum over the repeats. Use compare_compile_time.py to compare two
+results files.
+
+Example::
+
+    python benchmarks/compile_time.py --repeat 5 -o results.json
+    python benchmarks/compile_time.py --options float64 sum_factorization Poisson1D
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import time
+
+import ufl
+
+import ffcx
+from ffcx.compiler import compile_ufl_objects
+from ffcx.ir.elementtables import tabulation_cache
+from ffcx.options import get_options
+from ffcx.report import CompileReport
+
+demo_dir = pathlib.Path(__file__).parents[1] / "demo"
+
+option_sets = {
+    "float64": {"scalar_type": "float64"},
+    "float32": {"scalar_type": "float32"},
+    "complex64": {"scalar_type": "complex64"},
+    "complex128": {"scalar_type": "complex128"},
+    "sum_factorization": {"scalar_type": "float64", "sum_factorization": True},
+}
+
+# Demos using elements not implemented in Basix, as in demo/test_demos.py
+skip = [
+    "MixedGradient",
+    "TraceElement",
+    "MixedElasticity",
+    "RestrictedElement",
+    "_TensorProductElement",
+    "test_demos",
+]
+
+
+def supported(name, options):
+    """Check if a demo can be compiled with a set of options, as in demo/test_demos.py."""
+    complex_mode = "complex" in options["scalar_type"]
+    if complex_mode and name in ["BiharmonicHHJ", "BiharmonicRegge", "StabilisedStokes"]:
+        return False
+    return complex_mode or "Complex" not in name
+
+
+def compile_demo(name, options, trace_memory=False):
+    """Compile a demo, and return the report and the size of the code."""
+    ufd = ufl.algorithms.load_ufl_file(str(demo_dir / f"{name}.py"))
+    # Time a compilation from scratch, without tabulations of previous ones
+    tabulation_cache.clear()
+    report = CompileReport(trace_memory=trace_memory)
+    code_h, code_c = compile_ufl_objects(
+        ufd.forms + ufd.expressions + ufd.elements,
+        options=get_options(options),
+        object_names=ufd.object_names,
+        prefix=name,
+        report=report,
+    )
+    return report, len(code_h) + len(code_c)
+
+
+def benchmark(name, options, repeat, memory):
+    """Benchmark a demo with a set of options."""
+    stages: dict[str, float] = {}
+    for _ in range(repeat):
+        report, code_size = compile_demo(name, options)
+        for stage in report.stages:
+            stages[stage.name] = min(stages.get(stage.name, float("inf")), stage.wall_time)
+
+    result = {"stages": stages, "wall_time": sum(stages.values()), "code_size": code_size}
+    if memory:
+        report, _ = compile_demo(name, options, trace_memory=True)
+        result["peak_memory"] = {s.name: s.peak_memory for s in report.stages}
+    return result
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("demo", nargs="*", help="demo names (default: all)")
+    parser.add_argument(
+        "--options", nargs="+", choices=option_sets, default=list(option_sets), help="option sets"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="number of compilations")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure peak memory")
+    parser.add_argument("-o", "--output", default="compile_time.json", help="results file")
+    args = parser.parse_args()
+
+    names = args.demo or sorted(f.stem for f in demo_dir.glob("*.py") if f.stem not in skip)
+
+    results = []
+    print(f"{'demo':>22} {'options':>18} {'wall [ms]':>10} {'code [kB]':>10}")
+    for name in names:
+        for option_name in args.options:
+            options = option_sets[option_name]
+            if not supported(name, options):
+                continue
+
+            result = {"demo": name, "options": option_name}
+            try:
+                result.update(benchmark(name, options, args.repeat, not args.no_memory))
+            except Exception as e:
+                # E.g. sum factorisation of a form on simplices
+                result["error"] = f"{type(e).__name__}: {e}"
+                print(f"{name:>22} {option_name:>18} {'failed':>10}")
+            else:
+                print(
+                    f"{name:>22} {option_name:>18} {1e3 * result['wall_time']:10.1f} "
+                    f"{result['code_size'] / 1e3:10.1f}"
+                )
+            results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "ffcx_version": ffcx.__version__,
+                "python_version": sys.version.split()[0],
+                "platform": platform.platform(),
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "repeat": args.repeat,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Compare the memory of the expression graphs with a dict based layout.
+
+Computes the IR of a demo and records the scalar graphs (S) and the
+factorisation graphs (F) of its integrands. For each kind of graph,
+reports the number of nodes and edges, and the memory of the nodes and
+edges of the ExpressionGraphs, which store integer nodes with columnar
+attributes and CSR edges, and of the same graphs stored as a dict of
+attribute dicts with dict of lists of edges. The memory of the UFL
+expressions, which both layouts share, is not included.
+
+Example::
+
+    python benchmarks/graph_memory.py HyperElasticity
+"""
+
+import argparse
+import pathlib
+import tracemalloc
+
+import ufl
+
+import ffcx.ir.integral
+from ffcx.analysis import analyze_ufl_objects
+from ffcx.ir.analysis.graph import ExpressionGraph, build_scalar_graph
+from ffcx.ir.representation import compute_ir
+from ffcx.options import get_options
+
+demo_dir = pathlib.Path(__file__).parents[1] / "demo"
+
+
+def dict_layout(G):
+    """Store a graph as a dict of attribute dicts and dicts of lists of edges."""
+    ids = list(range(G.number_of_nodes()))
+    nodes = {i: {"expression": e} for i, e in zip(ids, G.expressions)}
+    for i in ids[: len(G.status)]:
+        nodes[i]["status"] = G.statuses[G.status[i]]
+    for key in ("target", "component", "mt", "tr"):
+        for i, value in getattr(G, key).items():
+            nodes[ids[i]][key] = value
+
+    out_edges = {i: [] for i in ids}
+    in_edges = {i: [] for i in ids}
+    for i, js in G.out_edges.items():
+        for j in js:
+            out_edges[i] += [ids[j]]
+            in_edges[ids[j]] += [i]
+    return nodes, out_edges, in_edges
+
+
+def columnar_layout(G):
+    """Copy the nodes and edges of a graph into a new ExpressionGraph."""
+    H = ExpressionGraph()
+    H.expressions = list(G.expressions)
+    H.status = G.status.copy()
+    for key in ("target", "component", "mt", "tr"):
+        setattr(H, key, dict(getattr(G, key)))
+    H.add_edges(G.out_edges.sources(), G.out_edges.indices)
+    H.out_edges, H.in_edges
+    return H
+
+
+def traced_size(layout, graphs):
+    """Return the memory allocated to store graphs in a layout."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    stored = [layout(G) for G in graphs]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del stored
+    return size
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("demo", nargs="?", default="HyperElasticity", help="demo name")
+    parser.add_argument("--scalar-type", default="float64", help="scalar type")
+    args = parser.parse_args()
+
+    ufd = ufl.algorithms.load_ufl_file(str(demo_dir / f"{args.demo}.py"))
+    options = get_options({"scalar_type": args.scalar_type})
+
+    # Record the scalar graphs built while computing the IR
+    scalar_graphs = []
+
+    def build_and_record(expression):
+        G = build_scalar_graph(expression)
+        scalar_graphs.append(G)
+        return G
+
+    ffcx.ir.integral.build_scalar_graph = build_and_record
+    analysis = analyze_ufl_objects(ufd.forms, options["scalar_type"])
+    ir = compute_ir(analysis, {}, args.demo, options, False)
+    factorisation_graphs = [
+        integrand["factorization"]
+        for integral in ir.integrals
+        for integrand in integral.integrand.values()
+    ]
+
+    print(
+        f"{'graph':>5} {'nodes':>9} {'edges':>9} {'dict [MB]':>10} {'columnar [MB]':>14} "
+        f"{'ratio':>6}"
+    )
+    for name, graphs in (("S", scalar_graphs), ("F", factorisation_graphs)):
+        nodes = sum(G.number_of_nodes() for G in graphs)
+        edges = sum(G.number_of_edges() for G in graphs)
+        dict_size = traced_size(dict_layout, graphs)
+        columnar_size = traced_size(columnar_layout, graphs)
+        print(
+            f"{name:>5} {nodes:9d} {edges:9d} {dict_size / 1e6:10.2f} "
+            f"{columnar_size / 1e6:14.2f} {dict_size / columnar_size:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Benchmark JIT compilation of the demo forms with the cffi and dlopen backends.
+
+Compiles the forms of each demo into a fresh cache directory with both
+backends, and reports the compile time of each and the time saved by
+building a plain shared library instead of a CFFI extension module. The
+generated code is taken from the source cache, so that the times only
+include building and loading the module.
+
+Example::
+
+    python benchmarks/jit_backends.py --repeat 3 Poisson1D MassDG0
+"""
+
+import argparse
+import pathlib
+import statistics
+import tempfile
+import time
+
+import ufl
+
+from ffcx.codegeneration import jit
+
+demo_dir = pathlib.Path(__file__).parents[1] / "demo"
+
+# Demos using elements or scalar types not supported in float64
+skip = ["ComplexPoisson", "MixedGradient", "TraceElement", "test_demos"]
+
+
+def compile_demo(forms, cache_dir, backend, extra_args):
+    """Compile forms and return the elapsed time in seconds."""
+    jit.module_cache.clear()
+    t0 = time.perf_counter()
+    jit.compile_forms(
+        forms, cache_dir=cache_dir, cffi_extra_compile_args=extra_args, backend=backend
+    )
+    return time.perf_counter() - t0
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("demo", nargs="*", help="demo names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of compilations")
+    parser.add_argument("--extra-args", default="-O2", help="extra compiler arguments")
+    args = parser.parse_args()
+
+    names = args.demo or sorted(f.stem for f in demo_dir.glob("*.py") if f.stem not in skip)
+    extra_args = args.extra_args.split()
+
+    print(f"{'demo':>22} {'cffi [ms]':>10} {'dlopen [ms]':>12} {'saved [ms]':>11}")
+    totals = {"cffi": 0.0, "dlopen": 0.0}
+    for name in names:
+        forms = ufl.algorithms.load_ufl_file(str(demo_dir / f"{name}.py")).forms
+        if not forms:
+            continue
+
+        times = {}
+        for backend in totals:
+            samples = []
+            for _ in range(args.repeat):
+                with tempfile.TemporaryDirectory() as cache_dir:
+                    # Fill the source cache, then time the module build
+                    compile_demo(forms, cache_dir, "dlopen", extra_args + ["-DWARMUP"])
+                    samples.append(compile_demo(forms, cache_dir, backend, extra_args))
+            times[backend] = statistics.median(samples)
+            totals[backend] += times[backend]
+
+        saved = times["cffi"] - times["dlopen"]
+        print(
+            f"{name:>22} {1e3 * times['cffi']:10.1f} {1e3 * times['dlopen']:12.1f} "
+            f"{1e3 * saved:11.1f}"
+        )
+
+    saved = totals["cffi"] - totals["dlopen"]
+    print(
+        f"{'total':>22} {1e3 * totals['cffi']:10.1f} {1e3 * totals['dlopen']:12.1f} "
+        f"{1e3 * saved:11.1f} ({100 * saved / totals['cffi']:.0f}%)"
+    )
+
+
+if __name__ == "__main__":
+    main()
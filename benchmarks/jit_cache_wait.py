@@ -0,0 +1,126 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Benchmark waiting for a JIT module compiled by another process.
+
+A number of processes simultaneously request the same form from a shared
+cache directory. One of them compiles the module while the others wait.
+For every waiting process the latency between the ready file being
+written and the process having loaded the module is reported, together
+with the number of filesystem calls made while waiting.
+
+Three waiting strategies are compared:
+
+- ``lock``: poll the advisory compile lock (default where fcntl exists)
+- ``backoff``: poll the ready file with a bounded exponential backoff
+- ``poll``: poll the ready file once per second
+
+Example::
+
+    python benchmarks/jit_cache_wait.py --processes 16
+"""
+
+import argparse
+import builtins
+import io
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _count_calls(counter, module, name):
+    """Wrap module.name so that every call increments counter."""
+    func = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        counter[name] = counter.get(name, 0) + 1
+        return func(*args, **kwargs)
+
+    setattr(module, name, wrapper)
+
+
+def _worker(mode, cache_dir, degree, barrier, queue):
+    import basix.ufl
+    import ufl
+
+    import ffcx.codegeneration.jit as jit
+
+    if mode != "lock":
+        jit.fcntl = None
+    if mode == "poll":
+        jit._POLL_DELAY_MIN = jit._POLL_DELAY_MAX = 1.0
+
+    element = basix.ufl.element("Lagrange", "tetrahedron", degree)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "tetrahedron", 1, shape=(3,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+
+    counter = {}
+    for name in ("stat", "open"):
+        _count_calls(counter, os, name)
+    _count_calls(counter, builtins, "open")
+    _count_calls(counter, io, "open")
+    if jit.fcntl is not None:
+        _count_calls(counter, jit.fcntl, "flock")
+
+    barrier.wait()
+    _, module, (_, impl) = jit.compile_forms([a], cache_dir=cache_dir, timeout=600)
+    t_end = time.time()
+
+    ready = Path(cache_dir, module.__name__ + ".c.cached")
+    latency = t_end - ready.stat().st_mtime
+    queue.put((impl is not None, latency, sum(counter.values())))
+
+
+def run(mode, num_processes, degree):
+    """Run a single contention experiment and return the waiter statistics."""
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(num_processes)
+    queue = ctx.Queue()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        procs = [
+            ctx.Process(target=_worker, args=(mode, cache_dir, degree, barrier, queue))
+            for _ in range(num_processes)
+        ]
+        for p in procs:
+            p.start()
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    waiters = [(latency, calls) for compiled, latency, calls in results if not compiled]
+    assert len(waiters) == num_processes - 1
+    latencies = [1000 * latency for latency, _ in waiters]
+    calls = [c for _, c in waiters]
+    return statistics.median(latencies), max(latencies), statistics.mean(calls), max(calls)
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8, help="number of processes")
+    parser.add_argument("--degree", type=int, default=3, help="degree of the compiled form")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["lock", "backoff", "poll"],
+        choices=["lock", "backoff", "poll"],
+        help="waiting strategies to compare",
+    )
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes, Laplace P{args.degree} on tetrahedra")
+    print(f"{'mode':<8} {'median [ms]':>12} {'max [ms]':>10} {'mean calls':>11} {'max calls':>10}")
+    for mode in args.modes:
+        median, worst, mean_calls, max_calls = run(mode, args.processes, args.degree)
+        print(f"{mode:<8} {median:12.1f} {worst:10.1f} {mean_calls:11.1f} {max_calls:10d}")
+
+
+if __name__ == "__main__":
+    main()
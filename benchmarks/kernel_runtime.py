@@ -0,0 +1,327 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Benchmark the runtime of the generated kernels.
+
+Compiles forms with jit.compile_forms, and calls each tabulate_tensor
+kernel in a C loop over a batch of cells with random geometry,
+coefficients and constants, and random local facet indices and
+permutations for facet integrals. Reports the number of cells per
+second, and the GFLOP/s computed from the static operation count of the
+kernel (ufcx_integral.cost_flops). The time is the minimum over the
+repeats.
+
+The forms are either the parametrised forms below, which are compiled
+for each degree, or demos, which are compiled as they are.
+
+Example::
+
+    python benchmarks/kernel_runtime.py --degree 1 2 3 --cell tetrahedron
+    python benchmarks/kernel_runtime.py Poisson Elasticity HyperElasticity
+"""
+
+import argparse
+import importlib.util
+import pathlib
+import tempfile
+import time
+
+import basix
+import basix.ufl
+import cffi
+import numpy as np
+import ufl
+
+import ffcx.codegeneration
+from ffcx.codegeneration import jit
+
+demo_dir = pathlib.Path(__file__).parents[1] / "demo"
+
+
+def _mesh(cell):
+    tdim = len(basix.topology(basix.cell.string_to_type(cell))) - 1
+    return ufl.Mesh(basix.ufl.element("Lagrange", cell, 1, shape=(tdim,)))
+
+
+def _space(cell, degree, shape=None, family="Lagrange", discontinuous=False):
+    element = basix.ufl.element(family, cell, degree, shape=shape, discontinuous=discontinuous)
+    return ufl.FunctionSpace(_mesh(cell), element)
+
+
+def _mass(cell, degree):
+    V = _space(cell, degree)
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    return ufl.inner(u, v) * ufl.dx
+
+
+def _poisson(cell, degree):
+    V = _space(cell, degree)
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    return ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+
+
+def _weighted_poisson(cell, degree):
+    V = _space(cell, degree)
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    kappa = ufl.Coefficient(V)
+    return kappa * ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+
+
+def _elasticity(cell, degree):
+    V = _space(cell, degree, shape=(_mesh(cell).geometric_dimension(),))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    mu, lmbda = ufl.Constant(V.ufl_domain()), ufl.Constant(V.ufl_domain())
+
+    def sigma(w):
+        eps = ufl.sym(ufl.grad(w))
+        return 2 * mu * eps + lmbda * ufl.tr(eps) * ufl.Identity(len(w))
+
+    return ufl.inner(sigma(u), ufl.sym(ufl.grad(v))) * ufl.dx
+
+
+def _facet_mass(cell, degree):
+    V = _space(cell, degree)
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    return ufl.inner(u, v) * ufl.ds
+
+
+def _interior_penalty(cell, degree):
+    V = _space(cell, degree, discontinuous=True)
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    n = ufl.FacetNormal(V.ufl_domain())
+    h = ufl.CellDiameter(V.ufl_domain())
+    alpha = ufl.Constant(V.ufl_domain())
+    return (
+        alpha / ufl.avg(h) * ufl.inner(ufl.jump(u, n), ufl.jump(v, n)) * ufl.dS
+        - ufl.inner(ufl.avg(ufl.grad(u)), ufl.jump(v, n)) * ufl.dS
+        - ufl.inner(ufl.jump(u, n), ufl.avg(ufl.grad(v))) * ufl.dS
+    )
+
+
+# Forms parametrised by cell and degree
+forms = {
+    "Mass": _mass,
+    "Poisson": _poisson,
+    "WeightedPoisson": _weighted_poisson,
+    "Elasticity": _elasticity,
+    "FacetMass": _facet_mass,
+    "InteriorPenalty": _interior_penalty,
+}
+
+# Loop calling a kernel on a batch of cells, for each scalar type
+_loop_template = """
+void run_{scalar_type}(void* kernel, int64_t n, int64_t num_cells, void* A, int64_t A_size,
+                       const void* w, int64_t w_size, const void* c, const void* coordinate_dofs,
+                       int64_t x_size, const int* entity_local_index, int64_t e_size,
+                       const uint8_t* quadrature_permutation, int64_t p_size)
+{{
+  ufcx_tabulate_tensor_{scalar_type}* f = (ufcx_tabulate_tensor_{scalar_type}*)kernel;
+  for (int64_t i = 0; i < n; ++i)
+  {{
+    int64_t cell = i % num_cells;
+    memset(A, 0, A_size * sizeof({c_type}));
+    f(({c_type}*)A, ({c_type}*)w + cell * w_size, ({c_type}*)c,
+      ({c_xtype}*)coordinate_dofs + cell * x_size, entity_local_index + cell * e_size,
+      quadrature_permutation + cell * p_size);
+  }}
+}}
+"""
+
+_c_types = {
+    "float32": ("float", "float"),
+    "float64": ("double", "double"),
+    "complex64": ("float _Complex", "float"),
+    "complex128": ("double _Complex", "double"),
+}
+
+
+def build_loops(tmpdir):
+    """Build the kernel loops, and return the module."""
+    source = "#include <string.h>\n#include <ufcx.h>\n"
+    decl = ""
+    for scalar_type, (c_type, c_xtype) in _c_types.items():
+        loop = _loop_template.format(scalar_type=scalar_type, c_type=c_type, c_xtype=c_xtype)
+        source += loop
+        decl += loop[: loop.index("{")].strip() + ";\n"
+
+    ffibuilder = cffi.FFI()
+    ffibuilder.set_source(
+        "_ffcx_kernel_runtime",
+        source,
+        include_dirs=[ffcx.codegeneration.get_include_path()],
+        extra_compile_args=["-O2"],
+    )
+    ffibuilder.cdef(decl)
+    filename = ffibuilder.compile(tmpdir=tmpdir)
+
+    spec = importlib.util.spec_from_file_location("_ffcx_kernel_runtime", filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _num_permutations(facet_type):
+    """Number of reflections and rotations of a facet."""
+    return {
+        basix.CellType.point: 1,
+        basix.CellType.interval: 2,
+        basix.CellType.triangle: 6,
+        basix.CellType.quadrilateral: 8,
+    }[facet_type]
+
+
+def kernel_data(form, integral_type, needs_permutations, scalar_type, num_cells, rng):
+    """Generate random data for calls of a kernel on a batch of cells.
+
+    Returns:
+        Arrays of A, w, c, coordinate_dofs, entity_local_index and
+        quadrature_permutation. All arrays but A and c hold the data of
+        each cell in a row.
+    """
+    dtype = np.dtype(scalar_type)
+    xdtype = np.real(np.zeros(1, dtype=dtype)).dtype
+    num_sides = 2 if integral_type == "interior_facet" else 1
+
+    def random(*shape):
+        values = rng.random(shape)
+        if np.issubdtype(dtype, np.complexfloating):
+            values = values + 1j * rng.random(shape)
+        return values.astype(dtype)
+
+    A = np.zeros(np.prod([num_sides * a.ufl_element().dim for a in form.arguments()]), dtype=dtype)
+    w = random(num_cells, num_sides * sum(f.ufl_element().dim for f in form.coefficients()) + 1)
+    c = random(sum(int(np.prod(f.ufl_shape)) for f in form.constants()) + 1)
+
+    # Random perturbations of the reference cell
+    domain = form.ufl_domain()
+    coordinate_element = domain.ufl_coordinate_element()
+    X = coordinate_element.basix_element.points
+    cell = coordinate_element.cell_type
+    tdim, gdim = X.shape[1], domain.geometric_dimension()
+    x = np.zeros((num_cells, num_sides, X.shape[0], 3), dtype=xdtype)
+    for i in range(num_cells):
+        for side in range(num_sides):
+            K = np.eye(tdim, gdim) + 0.1 * rng.random((tdim, gdim))
+            x[i, side, :, :gdim] = X @ K + rng.random(gdim)
+
+    if integral_type == "cell":
+        entity_local_index = np.zeros((num_cells, 1), dtype=np.intc)
+    else:
+        num_facets = len(basix.topology(cell)[tdim - 1])
+        entity_local_index = rng.integers(0, num_facets, (num_cells, num_sides), dtype=np.intc)
+
+    if needs_permutations:
+        facet_type = basix.cell.subentity_types(cell)[tdim - 1][0]
+        num_perms = _num_permutations(facet_type)
+        perm = rng.integers(0, num_perms, (num_cells, num_sides), dtype=np.uint8)
+    else:
+        perm = np.zeros((num_cells, num_sides), dtype=np.uint8)
+
+    return A, w, c, x.reshape(num_cells, -1), entity_local_index, perm
+
+
+def time_kernel(loops, kernel_address, scalar_type, data, min_time):
+    """Time the calls of a kernel, and return the time per call in seconds."""
+    ffi = loops.ffi
+    A, w, c, x, entity_local_index, perm = data
+    num_cells = x.shape[0]
+    run = getattr(loops.lib, f"run_{scalar_type}")
+
+    def call(n):
+        t0 = time.perf_counter()
+        run(
+            ffi.cast("void *", kernel_address),
+            n,
+            num_cells,
+            ffi.from_buffer(A),
+            A.size,
+            ffi.from_buffer(w),
+            w.shape[1],
+            ffi.from_buffer(c),
+            ffi.from_buffer(x),
+            x.shape[1],
+            ffi.from_buffer("int[]", entity_local_index),
+            entity_local_index.shape[1],
+            ffi.from_buffer("uint8_t[]", perm),
+            perm.shape[1],
+        )
+        return time.perf_counter() - t0
+
+    # Increase the number of calls until the loop runs long enough
+    n = num_cells
+    while (t := call(n)) < min_time:
+        n *= 2
+    return t / n
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("form", nargs="*", help=f"forms in {list(forms)} or demo names")
+    parser.add_argument("--degree", type=int, nargs="+", default=[1, 2, 3], help="degrees")
+    parser.add_argument("--cell", default="triangle", help="cell of the parametrised forms")
+    parser.add_argument("--scalar-type", default="float64", choices=_c_types)
+    parser.add_argument("--num-cells", type=int, default=1000, help="cells in a batch")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum loop time [s]")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timings")
+    parser.add_argument("--extra-args", default="-O2", help="extra compiler arguments")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    extra_args = args.extra_args.split()
+    options = {"scalar_type": args.scalar_type}
+
+    # Forms to compile, by (name, degree)
+    cases = []
+    for name in args.form or forms:
+        if name in forms:
+            cases += [((name, degree), [forms[name](args.cell, degree)]) for degree in args.degree]
+        else:
+            demo_forms = ufl.algorithms.load_ufl_file(str(demo_dir / f"{name}.py")).forms
+            # Highest degree of the arguments of the demo
+            degree = max(
+                (a.ufl_element().embedded_superdegree for f in demo_forms for a in f.arguments()),
+                default="-",
+            )
+            cases.append(((name, degree), demo_forms))
+
+    print(
+        f"{'form':>22} {'degree':>6} {'integral':>15} {'flops':>10} {'cells/s':>10} {'GFLOP/s':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        loops = build_loops(tmpdir)
+        for (name, degree), ufl_forms in cases:
+            compiled_forms, module, _ = jit.compile_forms(
+                ufl_forms, options=options, cache_dir=tmpdir, cffi_extra_compile_args=extra_args
+            )
+            for i, (form, compiled_form) in enumerate(zip(ufl_forms, compiled_forms)):
+                offsets = compiled_form.form_integral_offsets
+                for j, integral_type in enumerate(["cell", "exterior_facet", "interior_facet"]):
+                    for k in range(offsets[j], offsets[j + 1]):
+                        integral = compiled_form.form_integrals[k]
+                        kernel = getattr(integral, f"tabulate_tensor_{args.scalar_type}")
+                        address = int(module.ffi.cast("uintptr_t", kernel))
+                        data = kernel_data(
+                            form,
+                            integral_type,
+                            integral.needs_facet_permutations,
+                            args.scalar_type,
+                            args.num_cells,
+                            rng,
+                        )
+                        t = min(
+                            time_kernel(loops, address, args.scalar_type, data, args.min_time)
+                            for _ in range(args.repeat)
+                        )
+                        label = f"{name}[{i}]" if len(ufl_forms) > 1 else name
+                        print(
+                            f"{label:>22} {degree:>6} {integral_type:>15} "
+                            f"{integral.cost_flops:10d} {1 / t:10.3g} "
+                            f"{1e-9 * integral.cost_flops / t:8.2f}"
+                        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Benchmark naming of forms with many subdomain integrals.
+
+Computes the form and integral names the same way as compiler stage 2
+for a form with an increasing number of subdomain integrals, and reports
+the time per integral name.
+
+Example::
+
+    python benchmarks/naming.py --subdomains 10 100 1000
+"""
+
+import argparse
+import time
+
+import basix.ufl
+import ufl
+
+from ffcx import naming
+from ffcx.analysis import analyze_ufl_objects
+
+
+def subdomain_form(num_subdomains):
+    """Create a form with one cell integral per subdomain."""
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    f = ufl.Coefficient(space)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+    for i in range(num_subdomains):
+        a += (i + 1) * f * u * v * ufl.dx(i)
+    return a
+
+
+def name_integrals(form_data, prefix):
+    """Compute names as done in ffcx.ir.representation.compute_ir."""
+    names = [naming.form_name(form_data.original_form, 0, prefix)]
+    for itg_data in form_data.integral_data:
+        names.append(
+            naming.integral_name(
+                form_data.original_form, itg_data.integral_type, 0, itg_data.subdomain_id, prefix
+            )
+        )
+    return names
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subdomains", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'integrals':>10} {'first [ms]':>11} {'repeat [ms]':>12} {'per name [us]':>14}")
+    for n in args.subdomains:
+        analysis = analyze_ufl_objects([subdomain_form(n)], "float64")
+        form_data = analysis.form_data[0]
+
+        # The first pass includes the UFL signature of the form
+        t0 = time.perf_counter()
+        names = name_integrals(form_data, "bench")
+        t1 = time.perf_counter()
+        name_integrals(form_data, "bench")
+        t2 = time.perf_counter()
+
+        num_integrals = len(names) - 1
+        print(
+            f"{num_integrals:10d} {1e3 * (t1 - t0):11.2f} {1e3 * (t2 - t1):12.2f} "
+            f"{1e6 * (t2 - t1) / len(names):14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
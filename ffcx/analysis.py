@@ -13,6 +13,7 @@ representation type.
 
 from __future__ import annotations
 
+import copy
 import logging
 import typing
 
@@ -21,8 +22,15 @@ import numpy as np
 import numpy.typing as npt
 import ufl
 
+from ffcx.caching import LRUCache
+
 logger = logging.getLogger("ffcx")
 
+# Form data of analysed forms, keyed by form signature, scalar type and
+# the coefficients and constants of the form. Disabled by default; set
+# form_data_cache.maxsize to a positive number of forms to enable it.
+form_data_cache = LRUCache(maxsize=0)
+
 
 class UFLData(typing.NamedTuple):
     """UFL data."""
@@ -161,7 +169,9 @@ def _analyze_form(
     Note:
         The main workload of this function is extraction of
         unique/default metadata from options, integral metadata or
-        inherited from UFL (in case of quadrature degree).
+        inherited from UFL (in case of quadrature degree). If
+        form_data_cache is enabled, forms that were analysed before
+        reuse their form data.
 
     """
     if form.empty():
@@ -173,6 +183,14 @@ def _analyze_form(
     for i in form._integrals:
         assert isinstance(i._ufl_domain._ufl_coordinate_element, basix.ufl._ElementBase)
 
+    key = None
+    if form_data_cache.maxsize > 0:
+        key = _form_data_key(form, scalar_type)
+        cached = form_data_cache.get(key)
+        if cached is not None:
+            logger.info("Reusing form data of an analysed form")
+            return _with_original_form(cached, form)
+
     # Check for complex mode
     complex_mode = np.issubdtype(scalar_type, np.complexfloating)
 
@@ -242,6 +260,36 @@ def _analyze_form(
 
             integral_data.integrals[i] = integral.reconstruct(metadata=metadata)
 
+    if key is not None:
+        form_data_cache.put(key, form_data)
+
+    return form_data
+
+
+def _form_data_key(form: ufl.form.Form, scalar_type: npt.DTypeLike) -> tuple:
+    """Return the key of a form in the form data cache.
+
+    The signature of a form does not depend on the identity of its
+    coefficients and constants, but the form data refers to them, e.g.
+    to look up their names. Forms only share form data if they have the
+    same coefficients and constants.
+    """
+    return (
+        form.signature(),
+        np.dtype(scalar_type).name,
+        tuple(c.count() for c in form.coefficients()),
+        tuple(c.count() for c in form.constants()),
+    )
+
+
+def _with_original_form(
+    form_data: ufl.algorithms.formdata.FormData, form: ufl.form.Form
+) -> ufl.algorithms.formdata.FormData:
+    """Return form data with form as the original form."""
+    if form_data.original_form is form:
+        return form_data
+    form_data = copy.copy(form_data)
+    form_data.original_form = form
     return form_data
 
 
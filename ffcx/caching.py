@@ -0,0 +1,135 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""In-memory caches."""
+
+from __future__ import annotations
+
+import collections
+import threading
+import typing
+
+
+class CacheInfo(typing.NamedTuple):
+    """Cache statistics, following functools.lru_cache."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    """Thread-safe, size bounded mapping with least-recently-used eviction."""
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        maxbytes: int | None = None,
+        sizeof: typing.Callable[[typing.Any], int] | None = None,
+    ):
+        """Initialise.
+
+        Args:
+            maxsize: Maximum number of entries. A cache with maxsize 0
+                stores nothing.
+            maxbytes: Maximum total size of the values in bytes, or None
+                for no limit. Values larger than this are not stored.
+            sizeof: Function returning the size of a value in bytes.
+                Required if maxbytes is given.
+        """
+        if maxbytes is not None and sizeof is None:
+            raise ValueError("A cache bounded by size in bytes needs a sizeof function")
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._sizeof = sizeof
+        self._data: collections.OrderedDict[typing.Hashable, typing.Any] = collections.OrderedDict()
+        self._sizes: dict[typing.Hashable, int] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def maxsize(self) -> int:
+        """Maximum number of entries."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    @property
+    def maxbytes(self) -> int | None:
+        """Maximum total size of the values in bytes."""
+        return self._maxbytes
+
+    @maxbytes.setter
+    def maxbytes(self, maxbytes: int | None):
+        if maxbytes is not None and self._sizeof is None:
+            raise ValueError("A cache bounded by size in bytes needs a sizeof function")
+        with self._lock:
+            self._maxbytes = maxbytes
+            self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the values in bytes, if measured by a sizeof function."""
+        return self._nbytes
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        """Return the value for key and mark it as most recently used."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: typing.Hashable, value: typing.Any):
+        """Insert value for key, evicting the least recently used entries."""
+        size = self._sizeof(value) if self._sizeof is not None else 0
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+                self._nbytes -= self._sizes.pop(key)
+            # A value larger than the cache would only evict all others
+            if self._maxbytes is not None and size > self._maxbytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self._nbytes += size
+            self._evict()
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        """Return cache statistics."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._maxsize, len(self._data))
+
+    def __len__(self) -> int:
+        """Return number of entries."""
+        return len(self._data)
+
+    def _evict(self):
+        while self._data and (
+            len(self._data) > max(self._maxsize, 0)
+            or (self._maxbytes is not None and self._nbytes > self._maxbytes)
+        ):
+            key, _ = self._data.popitem(last=False)
+            self._nbytes -= self._sizes.pop(key)
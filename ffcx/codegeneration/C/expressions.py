@@ -9,9 +9,11 @@ import logging
 
 import numpy as np
 
+import ffcx.codegeneration.lnodes as L
 from ffcx.codegeneration.backend import FFCXBackend
 from ffcx.codegeneration.C import expressions_template
 from ffcx.codegeneration.C.c_implementation import CFormatter
+from ffcx.codegeneration.cost import count_operations, format_operations
 from ffcx.codegeneration.expression_generator import ExpressionGenerator
 from ffcx.codegeneration.utils import dtype_to_c_type, dtype_to_scalar_dtype
 
@@ -42,6 +44,9 @@ def generator(ir, options):
 
     CF = CFormatter(options["scalar_type"])
     d["tabulate_expression"] = CF.c_format(parts)
+    if options.get("count_operations"):
+        comments = [L.Comment(line) for line in format_operations(count_operations(parts))]
+        d["tabulate_expression"] = CF.c_format(L.StatementList(comments)) + d["tabulate_expression"]
 
     if len(ir.original_coefficient_positions) > 0:
         d["original_coefficient_positions"] = f"original_coefficient_positions_{ir.name}"
@@ -17,6 +17,7 @@ import numpy as np
 from ffcx import __version__ as FFCX_VERSION
 from ffcx.codegeneration import __version__ as UFC_VERSION
 from ffcx.codegeneration.C import file_template
+from ffcx.options import FFCX_EXECUTION_OPTIONS
 
 logger = logging.getLogger("ffcx")
 
@@ -27,6 +28,7 @@ def generator(options):
 
     # Attributes
     d = {"ffcx_version": FFCX_VERSION, "ufcx_version": UFC_VERSION}
+    options = {k: v for k, v in options.items() if k not in FFCX_EXECUTION_OPTIONS}
     d["options"] = textwrap.indent(pprint.pformat(options), "//  ")
     extra_c_includes = []
     if np.issubdtype(options["scalar_type"], np.complexfloating):
@@ -9,9 +9,11 @@ import logging
 
 import numpy as np
 
+import ffcx.codegeneration.lnodes as L
 from ffcx.codegeneration.backend import FFCXBackend
 from ffcx.codegeneration.C import integrals_template as ufcx_integrals
 from ffcx.codegeneration.C.c_implementation import CFormatter
+from ffcx.codegeneration.cost import count_operations, estimate_cost, format_operations
 from ffcx.codegeneration.integral_generator import IntegralGenerator
 from ffcx.codegeneration.utils import dtype_to_c_type, dtype_to_scalar_dtype
 from ffcx.ir.representation import IntegralIR
@@ -43,6 +45,9 @@ def generator(ir: IntegralIR, options):
     # Format code as string
     CF = CFormatter(options["scalar_type"])
     body = CF.c_format(parts)
+    if options.get("count_operations"):
+        comments = [L.Comment(line) for line in format_operations(count_operations(parts))]
+        body = CF.c_format(L.StatementList(comments)) + body
 
     # Generate generic FFCx code snippets and add specific parts
     code = {}
@@ -68,6 +73,7 @@ def generator(ir: IntegralIR, options):
     code[f"tabulate_tensor_{np_scalar_type}"] = f"tabulate_tensor_{factory_name}"
 
     element_hash = 0 if ir.coordinate_element_hash is None else ir.coordinate_element_hash
+    cost = estimate_cost(parts, options["scalar_type"])
 
     implementation = ufcx_integrals.factory.format(
         factory_name=factory_name,
@@ -78,6 +84,9 @@ def generator(ir: IntegralIR, options):
         scalar_type=dtype_to_c_type(options["scalar_type"]),
         geom_type=dtype_to_c_type(dtype_to_scalar_dtype(options["scalar_type"])),
         coordinate_element_hash=f"UINT64_C({element_hash})",
+        cost_flops=cost.flops,
+        cost_table_bytes=cost.table_bytes,
+        cost_stack_bytes=cost.stack_bytes,
         tabulate_tensor_float32=code["tabulate_tensor_float32"],
         tabulate_tensor_float64=code["tabulate_tensor_float64"],
         tabulate_tensor_complex64=code["tabulate_tensor_complex64"],
@@ -32,6 +32,9 @@ ufcx_integral {factory_name} =
   .tabulate_tensor_complex128 = {tabulate_tensor_complex128},
   .needs_facet_permutations = {needs_facet_permutations},
   .coordinate_element_hash = {coordinate_element_hash},
+  .cost_flops = {cost_flops},
+  .cost_table_bytes = {cost_table_bytes},
+  .cost_stack_bytes = {cost_stack_bytes},
 }};
 
 // End of code for integral {factory_name}
@@ -12,16 +12,22 @@ UFC function from an intermediate representation (IR).
 
 from __future__ import annotations
 
+import functools
 import logging
 import typing
 
 import numpy.typing as npt
 
+from ffcx import parallel
 from ffcx.codegeneration.C.expressions import generator as expression_generator
 from ffcx.codegeneration.C.file import generator as file_generator
 from ffcx.codegeneration.C.form import generator as form_generator
 from ffcx.codegeneration.C.integrals import generator as integral_generator
-from ffcx.ir.representation import DataIR
+from ffcx.integral_cache import IntegralCache
+from ffcx.ir.representation import DataIR, IntegralIR
+
+if typing.TYPE_CHECKING:
+    from ffcx.report import CompileReport
 
 logger = logging.getLogger("ffcx")
 
@@ -39,17 +45,45 @@ class CodeBlocks(typing.NamedTuple):
     file_post: list[tuple[str, str]]
 
 
-def generate_code(ir: DataIR, options: dict[str, int | float | npt.DTypeLike]) -> CodeBlocks:
+def generate_code(
+    ir: DataIR,
+    options: dict[str, int | float | npt.DTypeLike],
+    report: CompileReport | None = None,
+) -> CodeBlocks:
     """Generate code blocks from intermediate representation."""
     logger.info(79 * "*")
     logger.info("Compiler stage 3: Generating code")
     logger.info(79 * "*")
 
-    code_integrals = [integral_generator(integral_ir, options) for integral_ir in ir.integrals]
-    code_forms = [form_generator(form_ir, options) for form_ir in ir.forms]
-    code_expressions = [
-        expression_generator(expression_ir, options) for expression_ir in ir.expressions
+    # Kernels are generated and formatted independently, and may be
+    # generated in worker processes. Integrals found in the integral
+    # cache already have code.
+    integral_irs = [
+        integral_ir for integral_ir in ir.integrals if isinstance(integral_ir, IntegralIR)
+    ]
+    tasks = [
+        functools.partial(integral_generator, integral_ir, options) for integral_ir in integral_irs
+    ]
+    tasks += [
+        functools.partial(expression_generator, expression_ir, options)
+        for expression_ir in ir.expressions
     ]
+    code = parallel.run_tasks(tasks, int(options.get("workers", 1)), report=report)  # type: ignore
+    generated = dict(zip((integral_ir.name for integral_ir in integral_irs), code))
+    code_integrals = [
+        generated[integral_ir.name] if isinstance(integral_ir, IntegralIR) else integral_ir.code
+        for integral_ir in ir.integrals
+    ]
+    code_expressions = code[len(integral_irs) :]
+
+    # Store the code of new integrals in the integral cache
+    for integral_ir in integral_irs:
+        if integral_ir.cache_key is not None:
+            IntegralCache(options["integral_cache"]).put(  # type: ignore
+                integral_ir.cache_key, integral_ir.name, generated[integral_ir.name]
+            )
+
+    code_forms = [form_generator(form_ir, options) for form_ir in ir.forms]
     code_file_pre, code_file_post = file_generator(options)
     return CodeBlocks(
         file_pre=[code_file_pre],
@@ -0,0 +1,290 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Static cost analysis of generated kernels.
+
+Counts the floating-point operations and memory loads of the LNodes of
+a kernel, without compiling or running it. Operations in loops are
+weighted by the trip counts of the loops, and the counts are reported
+per section of the kernel, e.g. ``"Coefficient"``, ``"Jacobian"``,
+``"Intermediates"`` and ``"Tensor Computation"``. Code outside of a
+section, such as piecewise constant factors, is reported as
+``"Other"``.
+
+Integer arithmetic, e.g. in array indices, and negations are not
+counted. Both branches of a conditional are counted.
+
+:func:`estimate_cost` summarises the cost of a kernel call for
+assemblers, and is written to the ``ufcx_integral`` struct.
+"""
+
+from __future__ import annotations
+
+import collections
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+import ffcx.codegeneration.lnodes as L
+from ffcx.codegeneration.backend import FFCXBackend
+from ffcx.codegeneration.expression_generator import ExpressionGenerator
+from ffcx.codegeneration.integral_generator import IntegralGenerator
+from ffcx.codegeneration.utils import dtype_to_scalar_dtype
+from ffcx.ir.representation import ExpressionIR, IntegralIR
+
+# Kernel arguments holding coefficient, constant and coordinate values
+_input_arrays = ("w", "c", "coordinate_dofs")
+
+_float_types = (L.DataType.REAL, L.DataType.SCALAR)
+
+
+class OperationCount(typing.NamedTuple):
+    """Operations of a kernel, or of a section of a kernel."""
+
+    adds: int = 0  # additions and subtractions
+    muls: int = 0
+    divs: int = 0
+    math_calls: int = 0  # calls to math functions, e.g. sqrt or pow
+    table_loads: int = 0  # loads from static tables
+    coefficient_loads: int = 0  # loads from coefficients, constants and coordinates
+
+    @property
+    def flops(self) -> int:
+        """Number of floating-point operations, counting math calls as one."""
+        return self.adds + self.muls + self.divs + self.math_calls
+
+
+class KernelCost(typing.NamedTuple):
+    """Estimated cost of a call to a kernel."""
+
+    flops: int
+    table_bytes: int  # size of the static tables read
+    stack_bytes: int  # size of the local variables and arrays
+
+
+class _Counter:
+    """Visitor accumulating operation counts, following the C formatter."""
+
+    def __init__(self):
+        self.counts: dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+        # Sizes of the static tables, and of the tables that are read
+        self.tables: dict[str, tuple[L.DataType, int]] = {}
+        self.tables_read: set[str] = set()
+        # Sizes of local variables and arrays
+        self.stack: list[tuple[L.DataType, int]] = []
+        self.section = "Other"
+        self.trip_count = 1
+
+    def add(self, kind: str, n: int = 1):
+        self.counts[self.section][kind] += n * self.trip_count
+
+    def visit_statement_list(self, slist):
+        for s in slist.statements:
+            self.visit(s)
+
+    def visit_section(self, section):
+        parent, self.section = self.section, section.name
+        for s in section.declarations:
+            self.visit(s)
+        for s in section.statements:
+            self.visit(s)
+        self.section = parent
+
+    def visit_for_range(self, r):
+        parent = self.trip_count
+        if isinstance(r.begin, L.LiteralInt) and isinstance(r.end, L.LiteralInt):
+            self.trip_count *= max(int(r.end.value) - int(r.begin.value), 0)
+        self.visit(r.body)
+        self.trip_count = parent
+
+    def visit_statement(self, s):
+        self.visit(s.expr)
+
+    def visit_array_decl(self, arr):
+        # Tables are initialised at compile time
+        size = int(np.prod(arr.sizes))
+        if arr.const:
+            self.tables[arr.symbol.name] = (arr.symbol.dtype, size)
+        else:
+            self.stack.append((arr.symbol.dtype, size))
+
+    def visit_variable_decl(self, v):
+        self.stack.append((v.symbol.dtype, 1))
+        if v.value is not None:
+            self.visit(v.value)
+
+    def visit_assign(self, expr):
+        op = {"+=": "adds", "-=": "adds", "*=": "muls", "/=": "divs"}.get(expr.op)
+        if op is not None and expr.lhs.dtype in _float_types:
+            self.add(op)
+        self.visit(expr.rhs)
+        if isinstance(expr.lhs, L.ArrayAccess):
+            for i in expr.lhs.indices:
+                self.visit(i)
+
+    def visit_array_access(self, arr):
+        if arr.array.name in self.tables:
+            self.add("table_loads")
+            self.tables_read.add(arr.array.name)
+        elif arr.array.name in _input_arrays:
+            self.add("coefficient_loads")
+        for i in arr.indices:
+            self.visit(i)
+
+    def visit_nary_op(self, oper):
+        if oper.dtype in _float_types:
+            self.add("adds" if isinstance(oper, L.Sum) else "muls", len(oper.args) - 1)
+        for arg in oper.args:
+            self.visit(arg)
+
+    def visit_binary_op(self, oper):
+        op = {L.Add: "adds", L.Sub: "adds", L.Mul: "muls", L.Div: "divs"}.get(type(oper))
+        if op is not None and oper.dtype in _float_types:
+            self.add(op)
+        self.visit(oper.lhs)
+        self.visit(oper.rhs)
+
+    def visit_unary_op(self, oper):
+        self.visit(oper.arg)
+
+    def visit_conditional(self, s):
+        self.visit(s.condition)
+        self.visit(s.true)
+        self.visit(s.false)
+
+    def visit_math_function(self, c):
+        self.add("math_calls")
+        for arg in c.args:
+            self.visit(arg)
+
+    def visit_multi_index(self, mi):
+        self.visit(mi.global_index)
+
+    def visit_terminal(self, s):
+        pass
+
+    visit_impl = {
+        "Section": visit_section,
+        "StatementList": visit_statement_list,
+        "Comment": visit_terminal,
+        "ArrayDecl": visit_array_decl,
+        "ArrayAccess": visit_array_access,
+        "MultiIndex": visit_multi_index,
+        "VariableDecl": visit_variable_decl,
+        "ForRange": visit_for_range,
+        "Statement": visit_statement,
+        "Assign": visit_assign,
+        "AssignAdd": visit_assign,
+        "AssignSub": visit_assign,
+        "AssignMul": visit_assign,
+        "AssignDiv": visit_assign,
+        "Product": visit_nary_op,
+        "Neg": visit_unary_op,
+        "Sum": visit_nary_op,
+        "Add": visit_binary_op,
+        "Sub": visit_binary_op,
+        "Mul": visit_binary_op,
+        "Div": visit_binary_op,
+        "Not": visit_unary_op,
+        "LiteralFloat": visit_terminal,
+        "LiteralInt": visit_terminal,
+        "Symbol": visit_terminal,
+        "Conditional": visit_conditional,
+        "MathFunction": visit_math_function,
+        "And": visit_binary_op,
+        "Or": visit_binary_op,
+        "NE": visit_binary_op,
+        "EQ": visit_binary_op,
+        "GE": visit_binary_op,
+        "LE": visit_binary_op,
+        "GT": visit_binary_op,
+        "LT": visit_binary_op,
+    }
+
+    def visit(self, s):
+        name = s.__class__.__name__
+        try:
+            return self.visit_impl[name](self, s)
+        except KeyError:
+            raise RuntimeError("Unknown statement: ", name)
+
+
+def count_operations(code: L.LNode) -> dict[str, OperationCount]:
+    """Count the operations of a kernel body.
+
+    Args:
+        code: LNodes of the kernel body, e.g. from
+            :meth:`ffcx.codegeneration.integral_generator.IntegralGenerator.generate`.
+
+    Returns:
+        Operation counts of each section, in the order the sections
+        appear in the code.
+    """
+    counter = _Counter()
+    counter.visit(code)
+    return {name: OperationCount(**counts) for name, counts in counter.counts.items()}
+
+
+def estimate_cost(code: L.LNode, scalar_type: npt.DTypeLike) -> KernelCost:
+    """Estimate the cost of a call to a kernel.
+
+    Args:
+        code: LNodes of the kernel body.
+        scalar_type: Scalar type of the kernel.
+
+    Returns:
+        Floating-point operations, bytes of static tables read and bytes
+        of local variables of a call to the kernel.
+    """
+    counter = _Counter()
+    counter.visit(code)
+    counts = {name: OperationCount(**c) for name, c in counter.counts.items()}
+
+    itemsize = {
+        L.DataType.SCALAR: np.dtype(scalar_type).itemsize,
+        L.DataType.REAL: dtype_to_scalar_dtype(scalar_type).itemsize,
+        L.DataType.INT: np.dtype(np.intc).itemsize,
+        L.DataType.BOOL: 1,
+    }
+    tables = [counter.tables[name] for name in counter.tables_read]
+    return KernelCost(
+        flops=total(counts).flops,
+        table_bytes=sum(itemsize[dtype] * size for dtype, size in tables),
+        stack_bytes=sum(itemsize[dtype] * size for dtype, size in counter.stack),
+    )
+
+
+def total(counts: dict[str, OperationCount]) -> OperationCount:
+    """Sum the operation counts of all sections."""
+    return OperationCount(*(sum(c) for c in zip(OperationCount(), *counts.values())))
+
+
+def kernel_operations(ir: IntegralIR | ExpressionIR, options: dict) -> dict[str, OperationCount]:
+    """Count the operations of the kernel of an integral or expression.
+
+    Args:
+        ir: Intermediate representation of the integral or expression.
+        options: Options.
+
+    Returns:
+        Operation counts of each section of the kernel.
+    """
+    backend = FFCXBackend(ir, options)
+    if isinstance(ir, IntegralIR):
+        return count_operations(IntegralGenerator(ir, backend).generate())
+    else:
+        return count_operations(ExpressionGenerator(ir, backend).generate())
+
+
+def format_operations(counts: dict[str, OperationCount]) -> list[str]:
+    """Format operation counts as lines of a comment."""
+    lines = ["Operation count (flops, adds, muls, divs, math calls, table/coefficient loads):"]
+    for name, c in list(counts.items()) + [("Total", total(counts))]:
+        lines.append(
+            f"  {name}: {c.flops} ({c.adds}, {c.muls}, {c.divs}, {c.math_calls}, "
+            f"{c.table_loads}/{c.coefficient_loads})"
+        )
+    return lines
@@ -69,8 +69,7 @@ class ExpressionGenerator:
 
         cells: dict[Any, set[Any]] = {t: set() for t in ufl_geometry.keys()}  # type: ignore
         for integrand in self.ir.integrand.values():
-            for attr in integrand["factorization"].nodes.values():
-                mt = attr.get("mt")
+            for mt in integrand["factorization"].mt.values():
                 if mt is not None:
                     t = type(mt.terminal)
                     if self.ir.entitytype == "cell" and issubclass(
@@ -234,7 +233,7 @@ class ExpressionGenerator:
                 B_indices = tuple([iq] + list(B_indices))
                 A_indices = tuple([iq] + A_indices)
                 for fi_ci in blockdata.factor_indices_comp_indices:
-                    f = self.get_var(F.nodes[fi_ci[0]]["expression"])
+                    f = self.get_var(F.expressions[fi_ci[0]])
                     arg_factors = self.get_arg_factors(blockdata, block_rank, B_indices)
                     Brhs = L.float_product([f] + arg_factors)
                     multi_index = L.MultiIndex([A_indices[0], fi_ci[1]] + A_indices[1:], A_shape)
@@ -267,7 +266,7 @@ class ExpressionGenerator:
             body = []
 
             for fi_ci in blockdata.factor_indices_comp_indices:
-                f = self.get_var(F.nodes[fi_ci[0]]["expression"])
+                f = self.get_var(F.expressions[fi_ci[0]])
                 Brhs = L.float_product([f] + arg_factors)
                 indices = [A_indices[0], fi_ci[1]] + list(A_indices[1:])
                 multi_index = L.MultiIndex(indices, A_shape)
@@ -322,18 +321,16 @@ class ExpressionGenerator:
         definitions = []
         intermediates = []
 
-        for _, attr in F.nodes.items():
-            if attr["status"] != mode:
-                continue
-            v = attr["expression"]
-            mt = attr.get("mt")
+        for i in F.nodes_with_status(mode):
+            v = F.expressions[i]
+            mt = F.mt.get(i)
 
             if v._ufl_is_literal_:
                 vaccess = L.ufl_to_lnodes(v)
             elif mt is not None:
                 # All finite element based terminals have table data, as well
                 # as some, but not all, of the symbolic geometric terminals
-                tabledata = attr.get("tr")
+                tabledata = F.tr.get(i)
 
                 # Backend specific modified terminal translation
                 vaccess = self.backend.access.get(mt, tabledata, 0)
@@ -206,8 +206,7 @@ class IntegralGenerator:
         cells: dict[Any, set[Any]] = {t: set() for t in ufl_geometry.keys()}  # type: ignore
 
         for integrand in self.ir.integrand.values():
-            for attr in integrand["factorization"].nodes.values():
-                mt = attr.get("mt")
+            for mt in integrand["factorization"].mt.values():
                 if mt is not None:
                     t = type(mt.terminal)
                     if t in ufl_geometry:
@@ -314,17 +313,15 @@ class IntegralGenerator:
         definitions = []
         intermediates = []
 
-        for i, attr in F.nodes.items():
-            if attr["status"] != mode:
-                continue
-            v = attr["expression"]
+        for i in F.nodes_with_status(mode):
+            v = F.expressions[i]
 
             # Generate code only if the expression is not already in cache
             if not self.get_var(quadrature_rule, v):
                 if v._ufl_is_literal_:
                     vaccess = L.ufl_to_lnodes(v)
-                elif mt := attr.get("mt"):
-                    tabledata = attr.get("tr")
+                elif mt := F.mt.get(i):
+                    tabledata = F.tr.get(i)
 
                     # Backend specific modified terminal translation
                     vaccess = self.backend.access.get(mt, tabledata, quadrature_rule)
@@ -470,7 +467,7 @@ class IntegralGenerator:
             # Get factor expression
             F = self.ir.integrand[quadrature_rule]["factorization"]
 
-            v = F.nodes[factor_index]["expression"]
+            v = F.expressions[factor_index]
             f = self.get_var(quadrature_rule, v)
 
             # Quadrature weight was removed in representation, add it back now
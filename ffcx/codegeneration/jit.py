@@ -7,23 +7,40 @@
 
 from __future__ import annotations
 
+import functools
 import importlib
 import io
+import json
 import logging
 import os
 import re
+import shlex
+import subprocess
+import sys
 import sysconfig
 import tempfile
+import threading
 import time
+import types
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from contextlib import redirect_stdout
 from pathlib import Path
 
 import cffi
 import numpy as np
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
 import ffcx
 import ffcx.naming
+from ffcx.caching import LRUCache
 from ffcx.codegeneration.C.file_template import libraries as _libraries
+from ffcx.codegeneration.codegeneration import CodeBlocks
+from ffcx.options import FFCX_EXECUTION_OPTIONS
+from ffcx.report import CompileReport, stage
 
 logger = logging.getLogger("ffcx")
 root_logger = logging.getLogger()
@@ -63,69 +80,283 @@ UFC_EXPRESSION_DECL = "\n".join(
 )
 
 
+# Bounds (in seconds) of the exponential backoff used when polling for
+# the ready file
+_POLL_DELAY_MIN = 0.001
+_POLL_DELAY_MAX = 0.5
+
+# Upper bound (in seconds) of the backoff used when polling the compile
+# lock. Probing the lock is cheap, so it is polled more often than the
+# ready file.
+_LOCK_POLL_DELAY_MAX = 0.05
+
+# Suffix of the shared libraries built by the "dlopen" backend. The
+# suffix of extension modules is used, since these are shared libraries
+# linked the same way.
+_LIBRARY_SUFFIX = sysconfig.get_config_var("EXT_SUFFIX")
+
+# File descriptors of the locks held by this process, keyed by C file
+_compile_locks: dict[Path, int] = {}
+
+# Loaded (objects, module, code) triples, keyed by module name and cache
+# directory. The code is (None, None) for modules loaded from the disk
+# cache. Use module_cache.info() for statistics, module_cache.clear()
+# to empty it and set module_cache.maxsize to change its size.
+module_cache = LRUCache(maxsize=128)
+
+# Compilations submitted by compile_forms_async and
+# compile_expressions_async that have not finished, keyed like
+# module_cache
+_pending: dict[tuple[str, str | None], Future] = {}
+_pending_lock = threading.Lock()
+# Shared thread pool of compilations without an executor. It is shut
+# down when no compilations are pending.
+_executor: ThreadPoolExecutor | None = None
+
+# Set in threads running a compilation submitted by _submit
+_async_compile = threading.local()
+
+# CFFI builds in this process redirect the process-wide stdout and root
+# logger handlers, so only one can run at a time
+_cffi_build_lock = threading.Lock()
+
+
+def _check_backend(backend: str):
+    """Check the name of a JIT backend.
+
+    Called before the cache is used, so that an unknown backend does not
+    leave a failed entry in the cache directory.
+    """
+    if backend not in ("cffi", "dlopen"):
+        raise ValueError(f"Unknown JIT backend: {backend}")
+
+
 def _compute_option_signature(options):
     """Return options signature (some options should not affect signature)."""
-    return str(sorted(options.items()))
+    return str(sorted((k, v) for k, v in options.items() if k not in FFCX_EXECUTION_OPTIONS))
 
 
-def get_cached_module(module_name, object_names, cache_dir, timeout):
-    """Look for an existing C file and wait for compilation, or if it does not exist, create it."""
+def get_cached_module(module_name, object_names, cache_dir, timeout, decl=None, report=None):
+    """Look for an existing C file and wait for compilation, or if it does not exist, create it.
+
+    If ``decl`` is given, the module is a shared library built by the
+    ``"dlopen"`` backend, which is loaded with these declarations. If
+    ``report`` is given, the time spent waiting for other processes and
+    loading the module are added to it.
+
+    A process that creates the C file holds an advisory lock on a
+    ``.c.lock`` file until compilation has finished, so other processes
+    poll the lock, which is cheap, and wake up soon after it is released.
+    A process that waited on a compile that failed raises instead of
+    compiling the module again. On platforms
+    without ``fcntl``, or if the C file was created by a process that
+    does not hold the lock, the ``.c.cached`` file is polled with a
+    bounded exponential backoff.
+    """
     cache_dir = Path(cache_dir)
     c_filename = cache_dir.joinpath(module_name).with_suffix(".c")
     ready_name = c_filename.with_suffix(".c.cached")
+    lock_name = c_filename.with_suffix(".c.lock")
 
     # Ensure cache dir exists
     cache_dir.mkdir(exist_ok=True, parents=True)
 
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    delay = _POLL_DELAY_MIN
+    waited_on_compile = False
+    while True:
+        if ready_name.exists():
+            break
+
+        # A failed compile moves the C file away, so this must be checked
+        # before trying to claim the module, or every waiting process
+        # would compile it again
+        failed_name = c_filename.with_suffix(".c.failed")
+        if waited_on_compile and failed_name.exists() and not c_filename.exists():
+            raise RuntimeError(
+                f"JIT compilation of {module_name} failed in another process. "
+                f"The C file has been moved to {failed_name}."
+            )
+
+        if _claim_compilation(c_filename, lock_name):
+            if report is not None:
+                report.cache_wait_time += time.monotonic() - t0
+            return None, None
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                "JIT compilation timed out, probably due to a failed previous compile. "
+                f"Try cleaning cache (e.g. remove {c_filename}) or increase timeout option."
+            )
+
+        if fcntl is not None and _is_locked(lock_name):
+            logger.info(f"Waiting for compilation of {c_filename} to finish.")
+            waited_on_compile = _wait_for_unlock(lock_name, remaining)
+        else:
+            logger.info(f"Waiting for {ready_name} to appear.")
+            time.sleep(min(delay, remaining))
+            delay = min(2 * delay, _POLL_DELAY_MAX)
+
+    logger.info("Cached C file already exists: " + str(c_filename))
+    if report is not None:
+        report.cache_wait_time += time.monotonic() - t0
+    with stage(report, "load"):
+        if decl is None:
+            obj, mod = _load_objects(cache_dir, module_name, object_names)
+        else:
+            obj, mod = _load_library(cache_dir, module_name, object_names, decl)
+
+    # Record the access for least-recently-used cache pruning
+    try:
+        os.utime(ready_name)
+    except OSError:
+        pass
+
+    return obj, mod
+
+
+def _claim_compilation(c_filename: Path, lock_name: Path) -> bool:
+    """Create the C file with exclusive access and take the compile lock.
+
+    Returns:
+        True if this process should compile the module.
+    """
+    if fcntl is None:
+        try:
+            with open(c_filename, "x"):
+                pass
+            return True
+        except FileExistsError:
+            return False
+
+    # The lock is taken before creating the C file, so that a process
+    # finding the C file also finds the lock held until the ready file
+    # has been written
+    fd = _try_lock(lock_name)
+    if fd is None:
+        return False
+
     try:
-        # Create C file with exclusive access
         with open(c_filename, "x"):
             pass
-        return None, None
     except FileExistsError:
-        logger.info("Cached C file already exists: " + str(c_filename))
-        finder = importlib.machinery.FileFinder(
-            str(cache_dir),
-            (importlib.machinery.ExtensionFileLoader, importlib.machinery.EXTENSION_SUFFIXES),
-        )
-        finder.invalidate_caches()
+        _unlock(fd)
+        return False
 
-        # Now, wait for ready
-        for i in range(timeout):
-            if os.path.exists(ready_name):
-                spec = finder.find_spec(module_name)
-                if spec is None:
-                    raise ModuleNotFoundError("Unable to find JIT module.")
-                compiled_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(compiled_module)
+    _compile_locks[c_filename] = fd
+    return True
 
-                compiled_objects = [getattr(compiled_module.lib, name) for name in object_names]
-                return compiled_objects, compiled_module
 
-            logger.info(f"Waiting for {ready_name} to appear.")
-            time.sleep(1)
-        raise TimeoutError(
-            "JIT compilation timed out, probably due to a failed previous compile. "
-            f"Try cleaning cache (e.g. remove {c_filename}) or increase timeout option."
-        )
+def _release_compilation(c_filename: Path):
+    """Release the compile lock taken by _claim_compilation.
+
+    The lock file is removed once the module is ready, since it is not
+    needed by later processes.
+    """
+    fd = _compile_locks.pop(c_filename, None)
+    if fd is not None:
+        if c_filename.with_suffix(".c.cached").exists():
+            c_filename.with_suffix(".c.lock").unlink(missing_ok=True)
+        _unlock(fd)
+
 
+def _try_lock(lock_name: Path) -> int | None:
+    """Take an exclusive lock without blocking.
+
+    Returns:
+        File descriptor of the lock file, or None if another process
+        holds the lock.
+    """
+    fd = os.open(lock_name, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
 
-def _compilation_signature(cffi_extra_compile_args=None, cffi_debug=None):
+
+def _unlock(fd: int):
+    """Release a lock taken by _try_lock."""
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _is_locked(lock_name: Path) -> bool:
+    """Check if another process holds the compile lock."""
+    try:
+        fd = os.open(lock_name, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+
+
+def _wait_for_unlock(lock_name: Path, timeout: float) -> bool:
+    """Wait until the compile lock is released.
+
+    The lock is probed without blocking, with a bounded exponential
+    backoff, so that no file descriptor or thread is left behind when
+    the wait times out.
+
+    Returns:
+        True if the lock was released before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    delay = _POLL_DELAY_MIN
+    while _is_locked(lock_name):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(2 * delay, _LOCK_POLL_DELAY_MAX)
+    return True
+
+
+def _compilation_signature(cffi_extra_compile_args=None, cffi_debug=None, backend="cffi"):
     """Compute the compilation-inputs part of the signature.
 
     Used to avoid cache conflicts across Python versions, architectures, installs.
 
     - SOABI includes platform, Python version, debug flags
     - CFLAGS includes prefixes, arch targets
+    - backend is only included if it is not the default, so that the
+      names of cffi modules do not change
     """
     return (
         str(cffi_extra_compile_args)
         + str(cffi_debug)
         + sysconfig.get_config_var("CFLAGS")
         + sysconfig.get_config_var("SOABI")
+        + ("" if backend == "cffi" else backend)
     )
 
 
+def _module_names(
+    kind, ufl_objects, options, cffi_extra_compile_args, cffi_debug, backend
+) -> tuple[str, str]:
+    """Compute the names of the generated code and of the module.
+
+    The generated code depends on the UFL objects and options only, the
+    module also on the compiler settings.
+    """
+    source_signature = ffcx.naming.compute_signature(
+        ufl_objects, _compute_option_signature(options)
+    )
+    module_signature = ffcx.naming._derive_signature(
+        source_signature, _compilation_signature(cffi_extra_compile_args, cffi_debug, backend)
+    )
+    return f"libffcx_{kind}_{source_signature}", f"libffcx_{kind}_{module_signature}"
+
+
 def compile_forms(
     forms,
     options=None,
@@ -136,37 +367,84 @@ def compile_forms(
     cffi_debug=None,
     cffi_libraries=None,
     visualise: bool = False,
+    compile_workers: int = 1,
+    cache_max_size: int | None = None,
+    backend: str = "cffi",
+    report: CompileReport | None = None,
 ):
-    """Compile a list of UFL forms into UFC Python objects."""
+    """Compile a list of UFL forms into UFC Python objects.
+
+    Args:
+        forms: List of UFL forms.
+        options: Options
+        cache_dir: Cache directory
+        timeout: Timeout
+        cffi_extra_compile_args: Extra compilation args for CFFI
+        cffi_verbose: Use verbose compile
+        cffi_debug: Use compiler debug mode
+        cffi_libraries: libraries to use with compiler
+        visualise: Toggle visualisation
+        compile_workers: Number of C compiler processes to run
+            concurrently. If greater than one, each integral kernel is
+            compiled as a separate translation unit.
+        cache_max_size: Maximum total size of cache_dir in bytes. After
+            compiling a module, least recently used modules are removed
+            until the cache fits.
+        backend: How the module is built and loaded. ``"cffi"`` builds
+            a Python extension module with CFFI. ``"dlopen"`` calls the
+            C compiler directly to build a shared library, and loads it
+            with ``ffi.dlopen``, which avoids the setuptools overhead.
+        report: Report to fill in with the cost of the compilation and
+            the use of the cache.
+    """
+    _check_backend(backend)
     p = ffcx.options.get_options(options)
 
     # Get a signature for these forms
-    module_name = "libffcx_forms_" + ffcx.naming.compute_signature(
-        forms,
-        _compute_option_signature(p) + _compilation_signature(cffi_extra_compile_args, cffi_debug),
+    source_name, module_name = _module_names(
+        "forms", forms, p, cffi_extra_compile_args, cffi_debug, backend
     )
 
-    form_names = [ffcx.naming.form_name(form, i, module_name) for i, form in enumerate(forms)]
+    cache_key = (module_name, None if cache_dir is None else os.path.abspath(cache_dir))
+    if report is not None:
+        report.module_name = module_name
+    cached = module_cache.get(cache_key)
+    if cached is not None:
+        if report is not None:
+            report.cache = "memory"
+        return cached
+
+    form_names = [ffcx.naming.form_name(form, i, source_name) for i, form in enumerate(forms)]
+
+    decl = (
+        UFC_HEADER_DECL.format(np.dtype(p["scalar_type"]).name)  # type: ignore
+        + UFC_INTEGRAL_DECL
+        + UFC_FORM_DECL
+    )
+
+    form_template = "extern ufcx_form {name};\n"
+    for name in form_names:
+        decl += form_template.format(name=name)
 
     if cache_dir is not None:
         cache_dir = Path(cache_dir)
-        obj, mod = get_cached_module(module_name, form_names, cache_dir, timeout)
+        obj, mod = get_cached_module(
+            module_name,
+            form_names,
+            cache_dir,
+            timeout,
+            decl if backend == "dlopen" else None,
+            report,
+        )
         if obj is not None:
+            if report is not None:
+                report.cache = "disk"
+            module_cache.put(cache_key, (obj, mod, (None, None)))
             return obj, mod, (None, None)
     else:
         cache_dir = Path(tempfile.mkdtemp())
 
     try:
-        decl = (
-            UFC_HEADER_DECL.format(np.dtype(p["scalar_type"]).name)  # type: ignore
-            + UFC_INTEGRAL_DECL
-            + UFC_FORM_DECL
-        )
-
-        form_template = "extern ufcx_form {name};\n"
-        for name in form_names:
-            decl += form_template.format(name=name)
-
         impl = _compile_objects(
             decl,
             forms,
@@ -179,6 +457,10 @@ def compile_forms(
             cffi_debug,
             cffi_libraries,
             visualise=visualise,
+            compile_workers=compile_workers,
+            source_name=source_name,
+            backend=backend,
+            report=report,
         )
     except Exception as e:
         try:
@@ -188,8 +470,21 @@ def compile_forms(
         except Exception:
             pass
         raise e
+    finally:
+        _release_compilation(cache_dir.joinpath(module_name + ".c"))
+
+    with stage(report, "load"):
+        if backend == "dlopen":
+            obj, module = _load_library(cache_dir, module_name, form_names, decl)
+        else:
+            obj, module = _load_objects(cache_dir, module_name, form_names)
+    module_cache.put(cache_key, (obj, module, (decl, impl)))
+
+    if cache_max_size is not None:
+        from ffcx.codegeneration.jit_cache import prune
+
+        prune(cache_dir, cache_max_size, keep=[module_name])
 
-    obj, module = _load_objects(cache_dir, module_name, form_names)
     return obj, module, (decl, impl)
 
 
@@ -203,6 +498,10 @@ def compile_expressions(
     cffi_debug=None,
     cffi_libraries=None,
     visualise: bool = False,
+    compile_workers: int = 1,
+    cache_max_size: int | None = None,
+    backend: str = "cffi",
+    report: CompileReport | None = None,
 ):
     """Compile a list of UFL expressions into UFC Python objects.
 
@@ -216,37 +515,68 @@ def compile_expressions(
         cffi_debug: Use compiler debug mode
         cffi_libraries: libraries to use with compiler
         visualise: Toggle visualisation
+        compile_workers: Number of C compiler processes to run
+            concurrently. If greater than one, each expression kernel is
+            compiled as a separate translation unit.
+        cache_max_size: Maximum total size of cache_dir in bytes. After
+            compiling a module, least recently used modules are removed
+            until the cache fits.
+        backend: How the module is built and loaded. ``"cffi"`` builds
+            a Python extension module with CFFI. ``"dlopen"`` calls the
+            C compiler directly to build a shared library, and loads it
+            with ``ffi.dlopen``, which avoids the setuptools overhead.
+        report: Report to fill in with the cost of the compilation and
+            the use of the cache.
     """
+    _check_backend(backend)
     p = ffcx.options.get_options(options)
 
-    module_name = "libffcx_expressions_" + ffcx.naming.compute_signature(
-        expressions,
-        _compute_option_signature(p) + _compilation_signature(cffi_extra_compile_args, cffi_debug),
+    source_name, module_name = _module_names(
+        "expressions", expressions, p, cffi_extra_compile_args, cffi_debug, backend
     )
+    cache_key = (module_name, None if cache_dir is None else os.path.abspath(cache_dir))
+    if report is not None:
+        report.module_name = module_name
+    cached = module_cache.get(cache_key)
+    if cached is not None:
+        if report is not None:
+            report.cache = "memory"
+        return cached
+
     expr_names = [
-        ffcx.naming.expression_name(expression, module_name) for expression in expressions
+        ffcx.naming.expression_name(expression, source_name) for expression in expressions
     ]
 
+    decl = (
+        UFC_HEADER_DECL.format(np.dtype(p["scalar_type"]).name)  # type: ignore
+        + UFC_INTEGRAL_DECL
+        + UFC_FORM_DECL
+        + UFC_EXPRESSION_DECL
+    )
+
+    expression_template = "extern ufcx_expression {name};\n"
+    for name in expr_names:
+        decl += expression_template.format(name=name)
+
     if cache_dir is not None:
         cache_dir = Path(cache_dir)
-        obj, mod = get_cached_module(module_name, expr_names, cache_dir, timeout)
+        obj, mod = get_cached_module(
+            module_name,
+            expr_names,
+            cache_dir,
+            timeout,
+            decl if backend == "dlopen" else None,
+            report,
+        )
         if obj is not None:
+            if report is not None:
+                report.cache = "disk"
+            module_cache.put(cache_key, (obj, mod, (None, None)))
             return obj, mod, (None, None)
     else:
         cache_dir = Path(tempfile.mkdtemp())
 
     try:
-        decl = (
-            UFC_HEADER_DECL.format(np.dtype(p["scalar_type"]).name)  # type: ignore
-            + UFC_INTEGRAL_DECL
-            + UFC_FORM_DECL
-            + UFC_EXPRESSION_DECL
-        )
-
-        expression_template = "extern ufcx_expression {name};\n"
-        for name in expr_names:
-            decl += expression_template.format(name=name)
-
         impl = _compile_objects(
             decl,
             expressions,
@@ -259,6 +589,10 @@ def compile_expressions(
             cffi_debug,
             cffi_libraries,
             visualise=visualise,
+            compile_workers=compile_workers,
+            source_name=source_name,
+            backend=backend,
+            report=report,
         )
     except Exception as e:
         try:
@@ -268,11 +602,129 @@ def compile_expressions(
         except Exception:
             pass
         raise e
+    finally:
+        _release_compilation(cache_dir.joinpath(module_name + ".c"))
+
+    with stage(report, "load"):
+        if backend == "dlopen":
+            obj, module = _load_library(cache_dir, module_name, expr_names, decl)
+        else:
+            obj, module = _load_objects(cache_dir, module_name, expr_names)
+    module_cache.put(cache_key, (obj, module, (decl, impl)))
+
+    if cache_max_size is not None:
+        from ffcx.codegeneration.jit_cache import prune
+
+        prune(cache_dir, cache_max_size, keep=[module_name])
 
-    obj, module = _load_objects(cache_dir, module_name, expr_names)
     return obj, module, (decl, impl)
 
 
+def compile_forms_async(
+    forms, options=None, cache_dir=None, executor: Executor | None = None, **kwargs
+) -> Future:
+    """Compile a list of UFL forms in the background.
+
+    Concurrent requests for the same module share one compilation and
+    return the same future.
+
+    Args:
+        forms: List of UFL forms.
+        options: Options
+        cache_dir: Cache directory
+        executor: Executor to run the compilation in. Must run tasks in
+            this process, e.g. a ThreadPoolExecutor, since the compiled
+            objects cannot be transferred between processes. Defaults to
+            a shared thread pool, whose threads exit when no
+            compilations are pending. Worker processes (the ``workers``
+            option) are not used while other threads run.
+        kwargs: Further arguments of compile_forms.
+
+    Returns:
+        Future holding the result of compile_forms.
+    """
+    return _submit(compile_forms, "forms", forms, options, cache_dir, executor, kwargs)
+
+
+def compile_expressions_async(
+    expressions, options=None, cache_dir=None, executor: Executor | None = None, **kwargs
+) -> Future:
+    """Compile a list of UFL expressions in the background.
+
+    Concurrent requests for the same module share one compilation and
+    return the same future.
+
+    Args:
+        expressions: List of (UFL expression, evaluation points).
+        options: Options
+        cache_dir: Cache directory
+        executor: Executor to run the compilation in. Must run tasks in
+            this process, e.g. a ThreadPoolExecutor, since the compiled
+            objects cannot be transferred between processes. Defaults to
+            a shared thread pool, whose threads exit when no
+            compilations are pending. Worker processes (the ``workers``
+            option) are not used while other threads run.
+        kwargs: Further arguments of compile_expressions.
+
+    Returns:
+        Future holding the result of compile_expressions.
+    """
+    return _submit(
+        compile_expressions, "expressions", expressions, options, cache_dir, executor, kwargs
+    )
+
+
+def _submit(compile_function, kind, ufl_objects, options, cache_dir, executor, kwargs) -> Future:
+    """Submit a compilation, or return the future of the same pending compilation."""
+    global _executor
+
+    _, module_name = _module_names(
+        kind,
+        ufl_objects,
+        ffcx.options.get_options(options),
+        kwargs.get("cffi_extra_compile_args"),
+        kwargs.get("cffi_debug"),
+        kwargs.get("backend", "cffi"),
+    )
+    key = (module_name, None if cache_dir is None else os.path.abspath(cache_dir))
+
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        if executor is None:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(thread_name_prefix="ffcx-jit")
+            executor = _executor
+        future = executor.submit(
+            _compile_async, compile_function, ufl_objects, options, cache_dir, kwargs
+        )
+        _pending[key] = future
+
+    def done(future):
+        global _executor
+        with _pending_lock:
+            if _pending.get(key) is future:
+                del _pending[key]
+            # Shut down the idle shared pool. Its threads would keep
+            # ffcx.parallel from forking worker processes.
+            if not _pending and _executor is not None:
+                _executor.shutdown(wait=False)
+                _executor = None
+
+    future.add_done_callback(done)
+    return future
+
+
+def _compile_async(compile_function, ufl_objects, options, cache_dir, kwargs):
+    """Run a compilation submitted by _submit."""
+    _async_compile.active = True
+    try:
+        return compile_function(ufl_objects, options, cache_dir, **kwargs)
+    finally:
+        _async_compile.active = False
+
+
 def _compile_objects(
     decl,
     ufl_objects,
@@ -285,28 +737,28 @@ def _compile_objects(
     cffi_debug,
     cffi_libraries,
     visualise: bool = False,
+    compile_workers: int = 1,
+    source_name: str | None = None,
+    backend: str = "cffi",
+    report: CompileReport | None = None,
 ):
-    import ffcx.compiler
+    import ffcx.codegeneration.jit_cache
+    import ffcx.formatting
 
     libraries = _libraries + cffi_libraries if cffi_libraries is not None else _libraries
 
-    # JIT uses module_name as prefix, which is needed to make names of all struct/function
-    # unique across modules
-    _, code_body = ffcx.compiler.compile_ufl_objects(
-        ufl_objects, prefix=module_name, options=options, visualise=visualise
-    )
-
-    ffibuilder = cffi.FFI()
-
-    ffibuilder.set_source(
-        module_name,
-        code_body,
-        include_dirs=[ffcx.codegeneration.get_include_path()],
-        extra_compile_args=cffi_extra_compile_args,
-        libraries=libraries,
-    )
-
-    ffibuilder.cdef(decl)
+    # JIT uses source_name as prefix, which makes the names of all structs and functions
+    # unique across modules built from different code. Modules built from the same code
+    # with different compiler settings share the prefix, and so export the same symbols.
+    # This is harmless: extension modules and ffi.dlopen libraries are loaded with
+    # RTLD_LOCAL, and objects are looked up in their own module. Only if modules are
+    # loaded with RTLD_GLOBAL can a symbol resolve to the same code built with other
+    # settings.
+    if source_name is None:
+        source_name = module_name
+    code = _get_code_blocks(ufl_objects, source_name, options, cache_dir, visualise, report)
+    with stage(report, "formatting"):
+        _, code_body = ffcx.formatting.format_code(code)
 
     c_filename = cache_dir.joinpath(module_name + ".c")
     ready_name = c_filename.with_suffix(".c.cached")
@@ -318,15 +770,67 @@ def _compile_objects(
     logger.info("Calling JIT C compiler")
     logger.info(79 * "#")
 
-    t0 = time.time()
-    f = io.StringIO()
-    # Temporarily set root logger handlers to string buffer only
-    # since CFFI logs into root logger
-    old_handlers = root_logger.handlers.copy()
-    root_logger.handlers = [logging.StreamHandler(f)]
-    with redirect_stdout(f):
-        ffibuilder.compile(tmpdir=cache_dir, verbose=True, debug=cffi_debug)
-    s = f.getvalue()
+    with stage(report, "c_compile"):
+        t0 = time.time()
+        f = io.StringIO()
+
+        # Compile kernels as separate translation units in parallel, and
+        # link the resulting objects into the extension module
+        extra_objects = []
+        source = code_body
+        if compile_workers > 1:
+            source, units = _split_translation_units(code)
+            unit_filenames = []
+            for i, unit in enumerate(units):
+                unit_filename = cache_dir.joinpath(f"{module_name}_{i}.c")
+                unit_filename.write_text(unit)
+                unit_filenames.append(unit_filename)
+            extra_objects = _compile_c_objects(
+                unit_filenames,
+                [ffcx.codegeneration.get_include_path()],
+                cffi_extra_compile_args,
+                cffi_debug,
+                compile_workers,
+                f,
+            )
+
+        if backend == "dlopen":
+            # Build a plain shared library from the generated code, without
+            # CFFI wrappers, linked like an extension module
+            linker = _c_linker()
+            c_filename.write_text(source)
+            objects = _compile_c_objects(
+                [c_filename],
+                [ffcx.codegeneration.get_include_path()],
+                cffi_extra_compile_args,
+                cffi_debug,
+                1,
+                f,
+            )
+            cmd = (
+                linker
+                + [str(obj) for obj in objects + extra_objects]
+                + ["-o", str(cache_dir.joinpath(module_name + _LIBRARY_SUFFIX))]
+                + [f"-l{lib}" for lib in libraries]
+            )
+            f.write(_run_compiler(cmd))
+        elif backend == "cffi":
+            f.write(
+                _build_cffi_module(
+                    module_name,
+                    source,
+                    decl,
+                    cache_dir,
+                    include_dirs=[ffcx.codegeneration.get_include_path()],
+                    extra_compile_args=cffi_extra_compile_args,
+                    extra_objects=[str(obj) for obj in extra_objects],
+                    libraries=libraries,
+                    debug=cffi_debug,
+                )
+            )
+        else:
+            raise ValueError(f"Unknown JIT backend: {backend}")
+        s = f.getvalue()
     if cffi_verbose:
         print(s)
 
@@ -339,13 +843,290 @@ def _compile_objects(
     fd.write(s)
     fd.close()
 
-    # Copy back the original handlers (in case someone is logging into
-    # root logger and has custom handlers)
-    root_logger.handlers = old_handlers
+    # Object files and kernel sources are not needed once the extension
+    # module has been built
+    ffcx.codegeneration.jit_cache.remove_build_artefacts(cache_dir, module_name)
 
     return code_body
 
 
+def _get_code_blocks(
+    ufl_objects, source_name, options, cache_dir, visualise, report=None
+) -> CodeBlocks:
+    """Load generated code from the source cache, or generate and store it.
+
+    The source cache holds the code blocks of a set of UFL objects in
+    ``<source_name>.code.json``. It is keyed on the objects and options
+    only, so modules built with different compiler settings share it.
+    """
+    import ffcx.compiler
+
+    source_filename = cache_dir.joinpath(source_name + ".code.json")
+    if not visualise:
+        try:
+            with open(source_filename) as f:
+                code = CodeBlocks(*([tuple(c) for c in blocks] for blocks in json.load(f)))
+            os.utime(source_filename)
+            logger.info(f"Generated code loaded from {source_filename}")
+            if report is not None:
+                report.cache = "code"
+            return code
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring invalid generated code in {source_filename}")
+
+    if report is not None:
+        report.cache = "miss"
+    code = ffcx.compiler.generate_code_blocks(
+        ufl_objects, prefix=source_name, options=options, visualise=visualise, report=report
+    )
+
+    # Write to a temporary file first, so that other processes never
+    # read a partially written file
+    cache_dir.mkdir(exist_ok=True, parents=True)
+    tmp_filename = cache_dir.joinpath(
+        f"{source_name}.code.json.{os.getpid()}.{threading.get_ident()}"
+    )
+    tmp_filename.write_text(json.dumps(code))
+    os.replace(tmp_filename, source_filename)
+
+    return code
+
+
+def _split_translation_units(code: CodeBlocks) -> tuple[str, list[str]]:
+    """Split generated code into separately compilable translation units.
+
+    Returns:
+        The main unit, holding the forms and the declarations of all
+        kernels, and a list with one unit per integral and expression.
+    """
+    pre = "".join(c[1] for c in code.file_pre)
+    post = "".join(c[1] for c in code.file_post)
+    kernels = code.integrals + code.expressions
+
+    main = pre + "".join(c[0] for c in kernels) + "".join(c[1] for c in code.forms) + post
+    units = [pre + c[1] + post for c in kernels]
+    return main, units
+
+
+def _build_cffi_module(module_name, source, decl, tmpdir, debug=None, **kwargs) -> str:
+    """Build a CFFI extension module.
+
+    CFFI builds print to stdout, log to the root logger and change the
+    working directory. Builds in this process therefore redirect stdout
+    and the root logger handlers while they run, and only one runs at a
+    time. Compilations running in the background, see
+    :func:`compile_forms_async`, build in a child Python process
+    instead, so that they neither capture the output of other threads
+    nor wait for each other. They build in this process if no Python
+    interpreter can be started, e.g. in embedded interpreters.
+
+    Args:
+        module_name: Name of the extension module.
+        source: C source of the module.
+        decl: C declarations of the objects exported to Python.
+        tmpdir: Directory to build the module in.
+        debug: Use compiler debug mode.
+        kwargs: Further arguments of ``cffi.FFI.set_source``.
+
+    Returns:
+        The output of the build.
+    """
+    if getattr(_async_compile, "active", False):
+        python = _python_executable()
+        if python is not None:
+            return _build_cffi_module_in_child(
+                python, module_name, source, decl, tmpdir, debug, kwargs
+            )
+
+    ffibuilder = cffi.FFI()
+    ffibuilder.set_source(module_name, source, **kwargs)
+    ffibuilder.cdef(decl)
+
+    f = io.StringIO()
+    with _cffi_build_lock:
+        # Temporarily set root logger handlers to string buffer only
+        # since CFFI logs into root logger
+        old_handlers = root_logger.handlers.copy()
+        root_logger.handlers = [logging.StreamHandler(f)]
+        try:
+            with redirect_stdout(f):
+                ffibuilder.compile(tmpdir=tmpdir, verbose=True, debug=debug)
+        finally:
+            # Copy back the original handlers (in case someone is
+            # logging into root logger and has custom handlers)
+            root_logger.handlers = old_handlers
+    return f.getvalue()
+
+
+@functools.cache
+def _python_executable() -> str | None:
+    """Return the Python interpreter running this process, if it can be started.
+
+    In embedded interpreters, ``sys.executable`` may be empty or the
+    host application.
+    """
+    if not sys.executable:
+        return None
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, cffi; print(sys.hexversion)"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0 or result.stdout.strip() != str(sys.hexversion):
+        logger.info(f"Building CFFI modules in this process, {sys.executable} is not Python")
+        return None
+    return sys.executable
+
+
+# Builds a CFFI extension module from the arguments of
+# _build_cffi_module_in_child, read as JSON from stdin. The log of
+# setuptools is written to stdout.
+_CFFI_BUILD_SCRIPT = """
+import json
+import logging
+import sys
+
+import cffi
+
+args = json.load(sys.stdin)
+logging.basicConfig(stream=sys.stdout, format="%(message)s")
+ffibuilder = cffi.FFI()
+ffibuilder.set_source(args["module_name"], args["source"], **args["kwargs"])
+ffibuilder.cdef(args["decl"])
+ffibuilder.compile(tmpdir=args["tmpdir"], verbose=True, debug=args["debug"])
+"""
+
+
+def _build_cffi_module_in_child(python, module_name, source, decl, tmpdir, debug, kwargs) -> str:
+    """Build a CFFI extension module in a child Python process.
+
+    Returns:
+        The output of the build.
+    """
+    args = {
+        "module_name": module_name,
+        "source": source,
+        "decl": decl,
+        "tmpdir": str(tmpdir),
+        "debug": debug,
+        "kwargs": kwargs,
+    }
+    result = subprocess.run(
+        [python, "-c", _CFFI_BUILD_SCRIPT],
+        input=json.dumps(args),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise cffi.VerificationError(
+            f"CompileError: building {module_name} failed with exit status "
+            f"{result.returncode}\n{result.stdout}{result.stderr}"
+        )
+    return result.stdout + result.stderr
+
+
+def _c_compiler(debug=None) -> list[str]:
+    """Return the compiler command used by Python to build extension modules.
+
+    Follows the conventions of setuptools, i.e. the ``CC``, ``CFLAGS``
+    and ``CPPFLAGS`` environment variables take precedence over, or are
+    appended to, the values Python was configured with.
+    """
+    cc = os.environ.get("CC", sysconfig.get_config_var("CC"))
+    cflags = sysconfig.get_config_var("CFLAGS")
+    if "CFLAGS" in os.environ:
+        cflags += " " + os.environ["CFLAGS"]
+    if "CPPFLAGS" in os.environ:
+        cflags += " " + os.environ["CPPFLAGS"]
+    ccshared = sysconfig.get_config_var("CCSHARED")
+    cmd = shlex.split(cc) + (["-g"] if debug else []) + shlex.split(cflags) + shlex.split(ccshared)
+    return cmd
+
+
+def _c_linker() -> list[str]:
+    """Return the command used by Python to link extension modules.
+
+    Follows the conventions of setuptools, i.e. the ``LDSHARED``
+    environment variable takes precedence over, and ``LDFLAGS`` is
+    appended to, the values Python was configured with.
+
+    Raises:
+        RuntimeError: If Python was not configured with a linker
+            command, e.g. on Windows.
+    """
+    ldshared = os.environ.get("LDSHARED", sysconfig.get_config_var("LDSHARED"))
+    if ldshared is None:
+        raise RuntimeError(
+            'The "dlopen" JIT backend requires a Unix-like C compiler, '
+            'but Python does not define LDSHARED. Use the "cffi" backend.'
+        )
+    if "LDFLAGS" in os.environ:
+        ldshared += " " + os.environ["LDFLAGS"]
+    return shlex.split(ldshared)
+
+
+def _compile_c_objects(
+    sources, include_dirs, extra_compile_args, debug, max_workers, log
+) -> list[Path]:
+    """Compile C sources into object files using concurrent compiler processes."""
+    compiler = _c_compiler(debug)
+    include_args = [f"-I{d}" for d in include_dirs]
+    extra_args = extra_compile_args if extra_compile_args is not None else []
+
+    def compile_source(source):
+        obj = source.with_suffix(".o")
+        cmd = compiler + include_args + ["-c", str(source), "-o", str(obj)] + extra_args
+        return obj, _run_compiler(cmd)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(compile_source, sources))
+
+    for _, output in results:
+        log.write(output)
+    return [obj for obj, _ in results]
+
+
+def _run_compiler(cmd: list[str]) -> str:
+    """Run a compiler command.
+
+    Returns:
+        The command and its output.
+    """
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise cffi.VerificationError(
+            f"CompileError: command {cmd[0]!r} failed with exit status "
+            f"{result.returncode}\n{result.stderr}"
+        )
+    return " ".join(cmd) + "\n" + result.stdout + result.stderr
+
+
+def _load_library(cache_dir, module_name, object_names, decl):
+    """Load a shared library built by the "dlopen" backend.
+
+    Returns:
+        The objects, and a module holding the ``ffi`` and ``lib`` of the
+        library, like a CFFI extension module.
+    """
+    filename = Path(cache_dir).joinpath(module_name + _LIBRARY_SUFFIX)
+    ffi = cffi.FFI()
+    ffi.cdef(decl)
+    lib = ffi.dlopen(str(filename))
+
+    module = types.ModuleType(module_name)
+    module.__file__ = str(filename)
+    module.ffi = ffi  # type: ignore
+    module.lib = lib  # type: ignore
+
+    return [getattr(lib, name) for name in object_names], module
+
+
 def _load_objects(cache_dir, module_name, object_names):
     # Create module finder that searches the compile path
     finder = importlib.machinery.FileFinder(
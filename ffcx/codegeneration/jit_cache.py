@@ -0,0 +1,643 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Management of JIT cache directories.
+
+Every module compiled by :mod:`ffcx.codegeneration.jit` into a cache
+directory leaves a group of files named after the module:
+
+- ``<module>.c``: generated source, created first to claim the module
+- ``<module>.c.lock``: advisory lock held while the module is compiled
+- ``<module>.c.cached``: ready marker holding the compiler output
+- ``<module>.c.failed``: source of a module that failed to compile
+- ``<module><EXT_SUFFIX>``: the compiled extension module, or the
+  shared library of the ``"dlopen"`` backend
+
+Such a group is a cache entry. The generated code of a module is cached
+separately from the module, since it does not depend on the compiler
+settings. Its entry is a single ``<source>.code.json`` file, which is
+its own ready marker.
+
+The time of last access of an entry is the modification time of its
+ready marker, which is updated each time it is loaded from the cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import importlib.machinery
+import io
+import json
+import logging
+import os
+import re
+import tarfile
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import ufl
+
+import ffcx
+from ffcx.codegeneration import jit
+from ffcx.options import FFCX_DEFAULT_OPTIONS
+
+logger = logging.getLogger("ffcx")
+
+_entry_name = re.compile(r"^(libffcx_[a-z]+_[0-9a-f]{40})(_\d+)?\.")
+
+# Files of an entry that are exported to archives: sources, ready
+# markers, object files and libraries of any platform
+_entry_file_name = re.compile(
+    r"^(libffcx_[a-z]+_[0-9a-f]{40})(_\d+)?"
+    r"(\.c|\.c\.cached|\.code\.json|\.o|(\.[\w-]+)?\.(so|pyd|dylib))$"
+)
+
+
+class CacheEntry(typing.NamedTuple):
+    """Files of a module in a JIT cache directory."""
+
+    name: str
+    files: list[Path]
+    size: int
+    last_access: float
+    status: str  # "ready", "compiling", "failed" or "incomplete"
+
+
+class CacheStats(typing.NamedTuple):
+    """Summary of a JIT cache directory."""
+
+    num_entries: int
+    num_ready: int
+    num_compiling: int
+    num_failed: int
+    num_incomplete: int
+    num_files: int
+    size: int
+
+
+def scan(cache_dir: str | Path) -> list[CacheEntry]:
+    """Group the files of a cache directory into entries.
+
+    Returns:
+        Cache entries, ordered from least to most recently accessed.
+    """
+    groups: dict[str, list[os.DirEntry]] = {}
+    with os.scandir(cache_dir) as it:
+        for f in it:
+            m = _entry_name.match(f.name)
+            if m is not None and f.is_file(follow_symlinks=False):
+                groups.setdefault(m.group(1), []).append(f)
+
+    entries = []
+    for name, files in groups.items():
+        filenames = {f.name for f in files}
+        stats = {f.name: f.stat(follow_symlinks=False) for f in files}
+        marker = next(
+            (name + s for s in (".c.cached", ".code.json") if name + s in filenames), None
+        )
+        if marker is not None:
+            status = "ready"
+            last_access = stats[marker].st_mtime
+        else:
+            last_access = max(s.st_mtime for s in stats.values())
+            if name + ".c" in filenames and _is_compiling(Path(cache_dir, name + ".c.lock")):
+                status = "compiling"
+            elif name + ".c.failed" in filenames:
+                status = "failed"
+            else:
+                status = "incomplete"
+
+        entries.append(
+            CacheEntry(
+                name=name,
+                files=sorted(Path(f.path) for f in files),
+                size=sum(s.st_size for s in stats.values()),
+                last_access=last_access,
+                status=status,
+            )
+        )
+
+    return sorted(entries, key=lambda e: e.last_access)
+
+
+def stats(cache_dir: str | Path) -> CacheStats:
+    """Compute a summary of a cache directory."""
+    entries = scan(cache_dir)
+    count = {s: sum(e.status == s for e in entries) for s in ("ready", "compiling", "failed")}
+    return CacheStats(
+        num_entries=len(entries),
+        num_ready=count["ready"],
+        num_compiling=count["compiling"],
+        num_failed=count["failed"],
+        num_incomplete=len(entries) - sum(count.values()),
+        num_files=sum(len(e.files) for e in entries),
+        size=sum(e.size for e in entries),
+    )
+
+
+def prune(
+    cache_dir: str | Path,
+    max_size: int | None = None,
+    max_age: float | None = None,
+    keep: typing.Iterable[str] = (),
+    dry_run: bool = False,
+) -> list[CacheEntry]:
+    """Remove least recently used entries from a cache directory.
+
+    Entries that are being compiled are never removed.
+
+    Args:
+        cache_dir: Cache directory.
+        max_size: Remove least recently used entries until the total
+            size of the cache is at most this many bytes.
+        max_age: Remove entries not accessed for this many seconds.
+        keep: Names of entries that must not be removed.
+        dry_run: Only report the entries that would be removed.
+
+    Returns:
+        The removed entries.
+    """
+    entries = scan(cache_dir)
+    size = sum(e.size for e in entries)
+    now = time.time()
+    keep = set(keep)
+
+    removed = []
+    for entry in entries:
+        if entry.status == "compiling" or entry.name in keep:
+            continue
+        too_old = max_age is not None and now - entry.last_access > max_age
+        too_big = max_size is not None and size > max_size
+        if not (too_old or too_big):
+            continue
+        if dry_run or _remove_entry(cache_dir, entry):
+            removed.append(entry)
+            size -= entry.size
+
+    return removed
+
+
+def clear_failed(cache_dir: str | Path, dry_run: bool = False) -> list[CacheEntry]:
+    """Remove entries of failed or interrupted compilations.
+
+    Args:
+        cache_dir: Cache directory.
+        dry_run: Only report the entries that would be removed.
+
+    Returns:
+        The removed entries.
+    """
+    removed = []
+    for entry in scan(cache_dir):
+        if entry.status in ("failed", "incomplete"):
+            if dry_run or _remove_entry(cache_dir, entry):
+                removed.append(entry)
+    return removed
+
+
+def verify(cache_dir: str | Path) -> list[tuple[CacheEntry, str]]:
+    """Check the consistency of the entries of a cache directory.
+
+    Returns:
+        Entries with a problem, and a description of the problem.
+    """
+    problems = []
+    for entry in scan(cache_dir):
+        names = {f.name for f in entry.files}
+        if entry.name + ".code.json" in names:
+            continue
+        if entry.status == "ready":
+            modules = [s for s in importlib.machinery.EXTENSION_SUFFIXES if entry.name + s in names]
+            if entry.name + ".c" not in names:
+                problems.append((entry, "ready marker without C file"))
+            if not modules:
+                problems.append((entry, "ready marker without extension module"))
+            elif any(os.path.getsize(Path(cache_dir, entry.name + s)) == 0 for s in modules):
+                problems.append((entry, "empty extension module"))
+        elif entry.status == "failed":
+            problems.append((entry, "compilation failed"))
+        elif entry.status == "incomplete":
+            problems.append((entry, "compilation interrupted"))
+    return problems
+
+
+def export_archive(cache_dir: str | Path, filename: str | Path) -> list[CacheEntry]:
+    """Pack the ready entries of a cache directory into an archive.
+
+    The archive is a gzipped tar file with an ``index.json`` describing
+    its entries, followed by the files of the entries. Entry files are
+    stored without directories, so the archive can be unpacked into any
+    cache directory with :func:`import_archive`.
+
+    Args:
+        cache_dir: Cache directory.
+        filename: Archive to create.
+
+    Returns:
+        The exported entries.
+    """
+    entries = [e for e in scan(cache_dir) if e.status == "ready"]
+    index = {
+        "ffcx_version": ffcx.__version__,
+        "compilation_signature": jit._compilation_signature(),
+        "entries": [
+            {
+                "name": e.name,
+                "kind": _entry_kind(e),
+                "files": [f.name for f in _entry_files(e)],
+                "size": e.size,
+            }
+            for e in entries
+        ],
+    }
+
+    with tarfile.open(filename, "w:gz") as tar:
+        data = json.dumps(index, indent=1).encode()
+        info = tarfile.TarInfo("index.json")
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+        for entry in entries:
+            for f in _entry_files(entry):
+                tar.add(f, arcname=f.name, recursive=False)
+
+    logger.info(f"Exported {len(entries)} cache entries to {filename}")
+    return entries
+
+
+def import_archive(
+    filename: str | Path, cache_dir: str | Path, overwrite: bool = False
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """Unpack an archive created by :func:`export_archive` into a cache directory.
+
+    Compiled modules are only imported if they were built by a Python
+    with the same compilation signature (ABI and compiler flags) as the
+    running one. Generated code does not depend on these, and is always
+    imported. Entries that are already present in the cache directory
+    are kept, unless overwrite is set.
+
+    Args:
+        filename: Archive to unpack.
+        cache_dir: Cache directory. Created if it does not exist.
+        overwrite: Replace entries that exist in the cache directory.
+
+    Returns:
+        Names of the imported entries, and names of the skipped entries
+        with the reason.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(exist_ok=True, parents=True)
+
+    imported = []
+    skipped = []
+    with tarfile.open(filename, "r:*") as tar:
+        index = json.load(_extract_file(tar, "index.json"))
+        compatible = index["compilation_signature"] == jit._compilation_signature()
+        for entry in index["entries"]:
+            name = entry["name"]
+            if not entry["files"] or not all(_is_entry_file(tar, name, f) for f in entry["files"]):
+                skipped.append((name, "invalid entry"))
+            elif entry["kind"] == "module" and not compatible:
+                skipped.append((name, "incompatible compilation signature"))
+            elif _import_entry(tar, entry, cache_dir, overwrite):
+                imported.append(name)
+            else:
+                skipped.append((name, "exists"))
+
+    logger.info(f"Imported {len(imported)} cache entries from {filename}")
+    return imported, skipped
+
+
+def warm(
+    cache_dir: str | Path,
+    filenames: typing.Iterable[str | Path],
+    options: dict | None = None,
+    cffi_extra_compile_args: list[str] | None = None,
+    cffi_debug: bool | None = None,
+    workers: int = 1,
+    timeout: float = 10,
+) -> dict[str, list[str]]:
+    """Compile the forms and expressions of UFL files into a cache directory.
+
+    Each form and expression is compiled on its own, as by
+    ``compile_forms([form])`` and ``compile_expressions([expression])``,
+    so the modules are found by later runtime JIT calls with the same
+    options and compiler arguments.
+
+    Args:
+        cache_dir: Cache directory.
+        filenames: UFL files.
+        options: FFCx options.
+        cffi_extra_compile_args: Extra compilation args for CFFI.
+        cffi_debug: Use compiler debug mode.
+        workers: Number of files to compile concurrently, in separate
+            processes.
+        timeout: Timeout for waiting on compilations by other processes.
+
+    Returns:
+        Names of the modules of each file.
+    """
+    warm_file = functools.partial(
+        _warm_file,
+        cache_dir=str(cache_dir),
+        options=options,
+        cffi_extra_compile_args=cffi_extra_compile_args,
+        cffi_debug=cffi_debug,
+        timeout=timeout,
+    )
+    names = [str(f) for f in filenames]
+    if workers > 1 and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            modules = list(executor.map(warm_file, names))
+    else:
+        modules = list(map(warm_file, names))
+    return dict(zip(names, modules))
+
+
+def _warm_file(filename, cache_dir, options, cffi_extra_compile_args, cffi_debug, timeout):
+    ufd = ufl.algorithms.load_ufl_file(filename)
+    compile_args = {
+        "options": options,
+        "cache_dir": cache_dir,
+        "timeout": timeout,
+        "cffi_extra_compile_args": cffi_extra_compile_args,
+        "cffi_debug": cffi_debug,
+    }
+
+    modules = []
+    for form in ufd.forms:
+        _, module, _ = jit.compile_forms([form], **compile_args)
+        modules.append(module.__name__)
+    for expression in ufd.expressions:
+        _, module, _ = jit.compile_expressions([expression], **compile_args)
+        modules.append(module.__name__)
+
+    logger.info(f"Compiled {len(modules)} modules for {filename}")
+    return modules
+
+
+def remove_build_artefacts(cache_dir: str | Path, module_name: str):
+    """Remove intermediate files left by compiling a module."""
+    cache_dir = Path(cache_dir)
+    for pattern in (f"{module_name}.o", f"{module_name}_*.o", f"{module_name}_*.c"):
+        for f in cache_dir.glob(pattern):
+            f.unlink(missing_ok=True)
+
+
+def _is_compiling(lock_name: Path) -> bool:
+    # Without file locks, a compilation in progress cannot be told apart
+    # from an interrupted one, so assume the former
+    return jit.fcntl is None or jit._is_locked(lock_name)
+
+
+def _entry_kind(entry: CacheEntry) -> str:
+    return "code" if any(f.name.endswith(".code.json") for f in entry.files) else "module"
+
+
+def _entry_files(entry: CacheEntry) -> list[Path]:
+    """Return the files of a ready entry, with the ready marker last."""
+    files = [f for f in entry.files if not f.name.endswith(".c.lock")]
+    return sorted(files, key=lambda f: f.name.endswith((".c.cached", ".code.json")))
+
+
+def _is_file(tar: tarfile.TarFile, name: str) -> bool:
+    """Check if an archive holds a regular file with the given name."""
+    try:
+        return tar.getmember(name).isfile()
+    except KeyError:
+        return False
+
+
+def _is_entry_file(tar: tarfile.TarFile, name: str, filename: str) -> bool:
+    """Check if an archive holds a regular file of an entry.
+
+    Names with directories are rejected, so the file cannot be written
+    outside the cache directory.
+    """
+    m = _entry_file_name.match(filename)
+    return (
+        m is not None
+        and m.group(1) == name
+        and Path(filename).name == filename
+        and not any(sep in filename for sep in ("/", os.sep, os.altsep) if sep)
+        and ".." not in filename
+        and _is_file(tar, filename)
+    )
+
+
+def _extract_file(tar: tarfile.TarFile, name: str) -> typing.IO[bytes]:
+    """Return a regular file of an archive.
+
+    Raises:
+        ValueError: If the archive has no regular file with this name,
+            e.g. if the member is a link or a directory.
+    """
+    src = tar.extractfile(name) if _is_file(tar, name) else None
+    if src is None:
+        raise ValueError(f"Cache archive has no regular file {name}")
+    return src
+
+
+def _import_entry(tar: tarfile.TarFile, entry: dict, cache_dir: Path, overwrite: bool) -> bool:
+    """Write the files of an archived entry while holding its lock.
+
+    Returns:
+        True if the entry was imported, False if it exists or is in use.
+    """
+    name = entry["name"]
+    lock_name = cache_dir.joinpath(name + ".c.lock")
+    fd = None
+    if jit.fcntl is not None:
+        fd = jit._try_lock(lock_name)
+        if fd is None:
+            return False
+
+    try:
+        marker = entry["files"][-1]
+        if not overwrite and (
+            cache_dir.joinpath(marker).exists() or cache_dir.joinpath(name + ".c").exists()
+        ):
+            return False
+
+        # The ready marker is the last file, so the entry is not used
+        # before it is complete
+        cache_dir.joinpath(marker).unlink(missing_ok=True)
+        for f in entry["files"]:
+            tmp_filename = cache_dir.joinpath(f"{f}.{os.getpid()}")
+            with _extract_file(tar, f) as src, open(tmp_filename, "wb") as dst:
+                dst.write(src.read())
+            os.replace(tmp_filename, cache_dir.joinpath(f))
+    finally:
+        if fd is not None:
+            lock_name.unlink(missing_ok=True)
+            jit._unlock(fd)
+
+    return True
+
+
+def _remove_entry(cache_dir: str | Path, entry: CacheEntry) -> bool:
+    """Remove the files of an entry while holding its lock.
+
+    Returns:
+        True if the entry was removed, False if it is in use.
+    """
+    fd = None
+    if jit.fcntl is not None:
+        fd = jit._try_lock(Path(cache_dir, entry.name + ".c.lock"))
+        if fd is None:
+            return False
+
+    try:
+        # The ready marker goes first, so that the module is not loaded
+        # while its files are being removed
+        for f in sorted(entry.files, key=lambda f: not f.name.endswith(".c.cached")):
+            f.unlink(missing_ok=True)
+        Path(cache_dir, entry.name + ".c.lock").unlink(missing_ok=True)
+    finally:
+        if fd is not None:
+            jit._unlock(fd)
+
+    logger.info(f"Removed cache entry {entry.name}")
+    return True
+
+
+def _parse_size(size: str) -> int:
+    """Parse a size in bytes with an optional K, M, G or T suffix."""
+    units = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    m = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*([KMGT]?)i?B?\s*", size, re.IGNORECASE)
+    if m is None:
+        raise argparse.ArgumentTypeError(f"invalid size: {size}")
+    return int(float(m.group(1)) * units[m.group(2).upper()])
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+parser = argparse.ArgumentParser(prog="ffcx cache", description="Manage FFCx JIT cache directories")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+_stats_parser = subparsers.add_parser("stats", help="show a summary of a cache directory")
+_stats_parser.add_argument("cache_dir", help="cache directory")
+
+_prune_parser = subparsers.add_parser("prune", help="remove least recently used entries")
+_prune_parser.add_argument("cache_dir", help="cache directory")
+_prune_parser.add_argument(
+    "--max-size", type=_parse_size, help="maximum total size, e.g. 500M or 2G"
+)
+_prune_parser.add_argument(
+    "--max-age", type=float, help="remove entries not used for this many days"
+)
+_prune_parser.add_argument("--dry-run", action="store_true", help="only list the entries")
+
+_verify_parser = subparsers.add_parser("verify", help="check the consistency of the entries")
+_verify_parser.add_argument("cache_dir", help="cache directory")
+
+_clear_parser = subparsers.add_parser(
+    "clear-failed", help="remove entries of failed or interrupted compilations"
+)
+_clear_parser.add_argument("cache_dir", help="cache directory")
+_clear_parser.add_argument("--dry-run", action="store_true", help="only list the entries")
+
+_export_parser = subparsers.add_parser("export", help="pack the ready entries into an archive")
+_export_parser.add_argument("cache_dir", help="cache directory")
+_export_parser.add_argument("archive", help="archive to create, e.g. ffcx-cache.tar.gz")
+
+_import_parser = subparsers.add_parser(
+    "import", help="unpack an archive into a cache directory, merging with its entries"
+)
+_import_parser.add_argument("archive", help="archive created by 'ffcx cache export'")
+_import_parser.add_argument("cache_dir", help="cache directory")
+_import_parser.add_argument(
+    "--overwrite", action="store_true", help="replace entries that are already present"
+)
+
+_warm_parser = subparsers.add_parser(
+    "warm", help="compile the forms and expressions of UFL files into a cache directory"
+)
+_warm_parser.add_argument("cache_dir", help="cache directory")
+_warm_parser.add_argument("ufl_file", nargs="+", help="UFL file(s) to be compiled")
+_warm_parser.add_argument(
+    "-j", "--jobs", type=int, default=1, help="number of files to compile concurrently"
+)
+_warm_parser.add_argument(
+    "--compile-arg",
+    action="append",
+    dest="compile_args",
+    help="extra C compiler argument, as passed to the runtime JIT (may be repeated)",
+)
+_warm_parser.add_argument("--debug", action="store_true", help="use compiler debug mode")
+_warm_parser.add_argument("--timeout", type=float, default=10, help="timeout in seconds")
+for opt_name, (arg_type, opt_val, opt_desc, choices) in FFCX_DEFAULT_OPTIONS.items():
+    if isinstance(opt_val, bool):
+        _warm_parser.add_argument(f"--{opt_name}", action="store_true", default=None, help=opt_desc)
+    else:
+        _warm_parser.add_argument(f"--{opt_name}", type=arg_type, choices=choices, help=opt_desc)
+
+
+def main(args=None) -> int:
+    """Run ffcx cache command."""
+    xargs = parser.parse_args(args)
+
+    if xargs.command == "stats":
+        s = stats(xargs.cache_dir)
+        print(f"Cache directory: {xargs.cache_dir}")
+        print(f"  entries:    {s.num_entries}")
+        print(f"  ready:      {s.num_ready}")
+        print(f"  compiling:  {s.num_compiling}")
+        print(f"  failed:     {s.num_failed}")
+        print(f"  incomplete: {s.num_incomplete}")
+        print(f"  files:      {s.num_files}")
+        print(f"  size:       {_format_size(s.size)}")
+    elif xargs.command == "prune":
+        max_age = xargs.max_age * 86400 if xargs.max_age is not None else None
+        removed = prune(xargs.cache_dir, xargs.max_size, max_age, dry_run=xargs.dry_run)
+        for entry in removed:
+            print(f"{entry.name} ({_format_size(entry.size)})")
+        freed = _format_size(sum(e.size for e in removed))
+        print(f"{'Would remove' if xargs.dry_run else 'Removed'} {len(removed)} entries, {freed}")
+    elif xargs.command == "verify":
+        problems = verify(xargs.cache_dir)
+        for entry, problem in problems:
+            print(f"{entry.name}: {problem}")
+        return 1 if problems else 0
+    elif xargs.command == "clear-failed":
+        removed = clear_failed(xargs.cache_dir, dry_run=xargs.dry_run)
+        for entry in removed:
+            print(entry.name)
+        print(f"{'Would remove' if xargs.dry_run else 'Removed'} {len(removed)} entries")
+    elif xargs.command == "export":
+        entries = export_archive(xargs.cache_dir, xargs.archive)
+        size = _format_size(sum(e.size for e in entries))
+        print(f"Exported {len(entries)} entries, {size}")
+    elif xargs.command == "import":
+        imported, skipped = import_archive(xargs.archive, xargs.cache_dir, xargs.overwrite)
+        for name, reason in skipped:
+            print(f"{name}: skipped ({reason})")
+        print(f"Imported {len(imported)} entries, skipped {len(skipped)}")
+    elif xargs.command == "warm":
+        options = {
+            k: v for k, v in vars(xargs).items() if k in FFCX_DEFAULT_OPTIONS and v is not None
+        }
+        modules = warm(
+            xargs.cache_dir,
+            xargs.ufl_file,
+            options,
+            xargs.compile_args,
+            xargs.debug or None,
+            xargs.jobs,
+            xargs.timeout,
+        )
+        for filename, names in modules.items():
+            print(f"{filename}: {len(names)} modules")
+
+    return 0
@@ -11,7 +11,7 @@
 #pragma once
 
 #define UFCX_VERSION_MAJOR 0
-#define UFCX_VERSION_MINOR 9
+#define UFCX_VERSION_MINOR 10
 #define UFCX_VERSION_MAINTENANCE 0
 #define UFCX_VERSION_RELEASE 0
 
@@ -129,6 +129,19 @@ extern "C"
 
     /// Get the hash of the coordinate element associated with the geometry of the mesh.
     uint64_t coordinate_element_hash;
+
+    /// Estimated cost of a call to tabulate_tensor, computed when the
+    /// code is generated. It may be used to balance the work of an
+    /// assembler between threads and processes.
+
+    /// Number of floating-point operations
+    int64_t cost_flops;
+
+    /// Bytes of the static tables read
+    int64_t cost_table_bytes;
+
+    /// Bytes of the local variables and arrays
+    int64_t cost_stack_bytes;
   } ufcx_integral;
 
   typedef struct ufcx_expression
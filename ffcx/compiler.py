@@ -72,9 +72,10 @@ from time import time
 import numpy.typing as npt
 
 from ffcx.analysis import analyze_ufl_objects
-from ffcx.codegeneration.codegeneration import generate_code
+from ffcx.codegeneration.codegeneration import CodeBlocks, generate_code
 from ffcx.formatting import format_code
 from ffcx.ir.representation import compute_ir
+from ffcx.report import CompileReport, stage
 
 logger = logging.getLogger("ffcx")
 
@@ -89,6 +90,7 @@ def compile_ufl_objects(
     object_names: dict[int, str] | None = None,
     prefix: str | None = None,
     visualise: bool = False,
+    report: CompileReport | None = None,
 ) -> tuple[str, str]:
     """Generate UFC code for a given UFL objects.
 
@@ -99,28 +101,60 @@ def compile_ufl_objects(
         prefix: Prefix
         options: Options
         visualise: Toggle visualisation
+        report: Report to fill in with the cost of each stage
+    """
+    code = generate_code_blocks(ufl_objects, options, object_names, prefix, visualise, report)
+
+    # Stage 4: format code
+    cpu_time = time()
+    with stage(report, "formatting"):
+        code_h, code_c = format_code(code)
+    _print_timing(4, time() - cpu_time)
+
+    return code_h, code_c
+
+
+def generate_code_blocks(
+    ufl_objects: list[typing.Any],
+    options: dict[str, int | float | npt.DTypeLike],
+    object_names: dict[int, str] | None = None,
+    prefix: str | None = None,
+    visualise: bool = False,
+    report: CompileReport | None = None,
+) -> CodeBlocks:
+    """Run compiler stages 1-3 and return the unformatted code blocks.
+
+    Args:
+        ufl_objects: Objects to be compiled. Accepts elements, forms,
+          integrals or coordinate mappings.
+        object_names: Map from object Python id to object name
+        prefix: Prefix
+        options: Options
+        visualise: Toggle visualisation
+        report: Report to fill in with the cost of each stage
     """
     _object_names = object_names if object_names is not None else {}
     _prefix = prefix if prefix is not None else ""
 
     # Stage 1: analysis
     cpu_time = time()
-    analysis = analyze_ufl_objects(ufl_objects, options["scalar_type"])  # type: ignore
+    with stage(report, "analysis"):
+        analysis = analyze_ufl_objects(ufl_objects, options["scalar_type"])  # type: ignore
     _print_timing(1, time() - cpu_time)
 
     # Stage 2: intermediate representation
     cpu_time = time()
-    ir = compute_ir(analysis, _object_names, _prefix, options, visualise)
+    with stage(report, "ir"):
+        ir = compute_ir(analysis, _object_names, _prefix, options, visualise, report)
     _print_timing(2, time() - cpu_time)
 
     # Stage 3: code generation
     cpu_time = time()
-    code = generate_code(ir, options)
+    with stage(report, "codegen"):
+        code = generate_code(ir, options, report)
     _print_timing(3, time() - cpu_time)
 
-    # Stage 4: format code
-    cpu_time = time()
-    code_h, code_c = format_code(code)
-    _print_timing(4, time() - cpu_time)
+    if report is not None:
+        report.add_kernels(ir, code)
 
-    return code_h, code_c
+    return code
@@ -5,6 +5,11 @@
 # SPDX-License-Identifier:    LGPL-3.0-or-later
 """Finite element interface."""
 
+from __future__ import annotations
+
+import functools
+import typing
+
 import basix
 import basix.ufl
 import numpy as np
@@ -37,19 +42,33 @@ def reference_cell_vertices(cellname: str) -> npt.NDArray[np.float64]:
     return basix.geometry(basix.cell.string_to_type(cellname))
 
 
+class AffineMap(typing.NamedTuple):
+    """Affine map of points, stored as rows, to origin + points @ matrix."""
+
+    origin: npt.NDArray[np.float64]
+    matrix: npt.NDArray[np.float64]
+
+    def __call__(self, points: npt.ArrayLike) -> npt.NDArray[np.float64]:
+        """Map points."""
+        return self.origin + np.asarray(points, dtype=np.float64) @ self.matrix
+
+
+@functools.cache
+def facet_map(cellname: str, facet: int) -> AffineMap:
+    """Get the affine map from the reference facet to a facet of a reference cell."""
+    celltype = basix.cell.string_to_type(cellname)
+    geometry = np.asarray(basix.geometry(celltype), dtype=np.float64)
+    facet_vertices = geometry[basix.topology(celltype)[-2][facet]]
+    tdim = len(basix.topology(celltype)) - 1
+    origin = facet_vertices[0]
+    matrix = facet_vertices[1:tdim] - origin
+    origin.flags.writeable = False
+    matrix.flags.writeable = False
+    return AffineMap(origin, matrix)
+
+
 def map_facet_points(
     points: npt.NDArray[np.float64], facet: int, cellname: str
 ) -> npt.NDArray[np.float64]:
     """Map points from a reference facet to a physical facet."""
-    geom = basix.geometry(basix.cell.string_to_type(cellname))
-    facet_vertices = [
-        geom[i] for i in basix.topology(basix.cell.string_to_type(cellname))[-2][facet]
-    ]
-    return np.asarray(
-        [
-            facet_vertices[0]
-            + sum((i - facet_vertices[0]) * j for i, j in zip(facet_vertices[1:], p))
-            for p in points
-        ],
-        dtype=np.float64,
-    )
+    return facet_map(cellname, facet)(points)
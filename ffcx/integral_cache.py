@@ -0,0 +1,145 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Disk cache of the generated code of integrals.
+
+Editing one term of a large UFL file changes the signature, and thus
+the name, of the form it belongs to, but most of the integrals of the
+file are unchanged. The integral cache stores the generated code of each
+integral under a key that does not depend on its name, so that only the
+integrals that changed pass through the IR and code generation stages
+again.
+
+The key of an integral is computed from its integrands and quadrature
+rules, the elements and numbering of the arguments, coefficients and
+constants of its form, and the options. The cache is enabled by the
+``integral_cache`` option.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import ufl
+from ufl.algorithms.signature import compute_expression_signature
+
+import ffcx
+import ffcx.codegeneration
+from ffcx.options import FFCX_EXECUTION_OPTIONS
+
+logger = logging.getLogger("ffcx")
+
+# Stands in for the name of the integral in the cached code
+_NAME_PLACEHOLDER = "@ffcx_integral_name@"
+
+
+def _metadata_signature(metadata: dict) -> str:
+    """Return signature of integral metadata, e.g. the quadrature rule."""
+    items = []
+    for key, value in sorted(metadata.items()):
+        if isinstance(value, np.ndarray):
+            value = (value.shape, hashlib.sha1(np.ascontiguousarray(value).tobytes()).hexdigest())
+        items.append((key, value))
+    return repr(items)
+
+
+def integral_key(
+    form_data: ufl.algorithms.formdata.FormData,
+    integral_data_index: int,
+    options: dict,
+) -> str:
+    """Compute the cache key of an integral of a form.
+
+    Args:
+        form_data: Form data of the form.
+        integral_data_index: Index of the integral in the integral data
+            of the form.
+        options: Options.
+
+    Returns:
+        Key of the integral, independent of its name and subdomain.
+    """
+    itg_data = form_data.integral_data[integral_data_index]
+    form = form_data.original_form
+
+    # Number the terminals as in the generated code
+    renumbering: dict = {}
+    renumbering.update((c, i) for i, c in enumerate(form_data.reduced_coefficients))
+    renumbering.update((c, i) for i, c in enumerate(form.constants()))
+    renumbering.update((d, i) for i, d in enumerate(form.ufl_domains()))
+
+    signatures = [
+        str(ffcx.__version__),
+        ffcx.codegeneration.get_signature(),
+        str(sorted((k, v) for k, v in options.items() if k not in FFCX_EXECUTION_OPTIONS)),
+        itg_data.integral_type,
+        repr(itg_data.domain.ufl_coordinate_element()),
+        repr(form_data.argument_elements),
+        repr(form_data.coefficient_elements),
+        repr(itg_data.enabled_coefficients),
+        repr([c.ufl_shape for c in form.constants()]),
+    ]
+    for integral in itg_data.integrals:
+        signatures.append(compute_expression_signature(integral.integrand(), renumbering))
+        signatures.append(_metadata_signature(integral.metadata()))
+
+    return hashlib.sha1(";".join(signatures).encode("utf-8")).hexdigest()
+
+
+class IntegralCache:
+    """Generated code of integrals, stored in a directory."""
+
+    def __init__(self, cache_dir: str | Path):
+        """Initialise.
+
+        Args:
+            cache_dir: Directory of the cache. It is created if it does
+                not exist.
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"integral_{key}.json"
+
+    def get(self, key: str, name: str) -> tuple[str, str] | None:
+        """Return the (declaration, implementation) of an integral.
+
+        Args:
+            key: Key of the integral.
+            name: Name of the integral in the returned code.
+
+        Returns:
+            Code of the integral, or ``None`` if it is not in the cache.
+        """
+        try:
+            with open(self._path(key)) as f:
+                code = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return tuple(block.replace(_NAME_PLACEHOLDER, name) for block in code)  # type: ignore
+
+    def put(self, key: str, name: str, code: tuple[str, str]):
+        """Store the (declaration, implementation) of an integral.
+
+        Args:
+            key: Key of the integral.
+            name: Name of the integral in the code.
+            code: Code of the integral.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        blocks = [block.replace(name, _NAME_PLACEHOLDER) for block in code]
+
+        # Write to a temporary file first, so that concurrent readers
+        # never see a partial entry
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_text(json.dumps(blocks))
+        os.replace(tmp_path, path)
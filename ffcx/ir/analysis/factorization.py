@@ -20,8 +20,8 @@ logger = logging.getLogger("ffcx")
 def build_argument_indices(S):
     """Build ordered list of indices to modified arguments."""
     arg_indices = []
-    for i, v in S.nodes.items():
-        arg = strip_modified_terminal(v["expression"])
+    for i, expr in enumerate(S.expressions):
+        arg = strip_modified_terminal(expr)
         if isinstance(arg, Argument):
             arg_indices.append(i)
 
@@ -31,7 +31,7 @@ def build_argument_indices(S):
 
         Key is based on the properties of the modified terminal.
         """
-        mt = analyse_modified_terminal(S.nodes[i]["expression"])
+        mt = analyse_modified_terminal(S.expressions[i])
         return mt.argument_ordering_key()
 
     ordered_arg_indices = sorted(arg_indices, key=arg_ordering_key)
@@ -42,8 +42,7 @@ def graph_insert(F, expr):
     """Add new expression expr to factorisation graph or return existing index."""
     fi = F.e2i.get(expr)
     if fi is None:
-        fi = F.number_of_nodes()
-        F.add_node(fi, expression=expr)
+        fi = F.add_node(expr)
         F.e2i[expr] = fi
     return fi
 
@@ -90,8 +89,8 @@ def handle_sum(v, fac, sf, F):
             elif fi1 is None:
                 fisum = fi0
             else:
-                f0 = F.nodes[fi0]["expression"]
-                f1 = F.nodes[fi1]["expression"]
+                f0 = F.expressions[fi0]
+                f1 = F.expressions[fi1]
                 fisum = graph_insert(F, f0 + f1)
             factors[argkey] = fisum
 
@@ -117,7 +116,7 @@ def handle_product(v, fac, sf, F):
         f0 = sf[0]
         factors = {}
         for k1 in sorted(fac1):
-            f1 = F.nodes[fac1[k1]]["expression"]
+            f1 = F.expressions[fac1[k1]]
             factors[k1] = graph_insert(F, f0 * f1)
 
     elif not fac1:  # arg * non-arg
@@ -125,16 +124,16 @@ def handle_product(v, fac, sf, F):
         f1 = sf[1]
         factors = {}
         for k0 in sorted(fac0):
-            f0 = F.nodes[fac0[k0]]["expression"]
+            f0 = F.expressions[fac0[k0]]
             factors[k0] = graph_insert(F, f1 * f0)
 
     else:  # arg * arg
         # Record products of each factor of arg-dependent operand
         factors = {}
         for k0 in sorted(fac0):
-            f0 = F.nodes[fac0[k0]]["expression"]
+            f0 = F.expressions[fac0[k0]]
             for k1 in sorted(fac1):
-                f1 = F.nodes[fac1[k1]]["expression"]
+                f1 = F.expressions[fac1[k1]]
                 argkey = tuple(sorted(k0 + k1))  # sort key for canonical representation
                 factors[argkey] = graph_insert(F, f0 * f1)
 
@@ -148,7 +147,7 @@ def handle_conj(v, fac, sf, F):
     if fac:
         factors = {}
         for k in fac:
-            f0 = F.nodes[fac[k]]["expression"]
+            f0 = F.expressions[fac[k]]
             factors[k] = graph_insert(F, Conj(f0))
     else:
         raise RuntimeError("No arguments")
@@ -168,7 +167,7 @@ def handle_division(v, fac, sf, F):
         f1 = sf[1]
         factors = {}
         for k0 in sorted(fac0):
-            f0 = F.nodes[fac0[k0]]["expression"]
+            f0 = F.expressions[fac0[k0]]
             factors[k0] = graph_insert(F, f0 / f1)
 
     else:  # non-arg / non-arg
@@ -208,8 +207,8 @@ def handle_conditional(v, fac, sf, F):
         for k in mas:
             fi1 = fac1.get(k)
             fi2 = fac2.get(k)
-            f1 = z if fi1 is None else F.nodes[fi1]["expression"]
-            f2 = z if fi2 is None else F.nodes[fi2]["expression"]
+            f1 = z if fi1 is None else F.expressions[fi1]
+            f2 = z if fi2 is None else F.expressions[fi2]
             factors[k] = graph_insert(F, conditional(f0, f1, f2))
 
     return factors
@@ -237,12 +236,11 @@ def compute_argument_factorization(S, rank):
     """
     # Extract argument component subgraph
     arg_indices = build_argument_indices(S)
-    AV = [S.nodes[i]["expression"] for i in arg_indices]
+    AV = [S.expressions[i] for i in arg_indices]
 
-    # Data structure for building non-argument factors
+    # Data structure for building non-argument factors, with a quick
+    # lookup dict for expression to index
     F = ExpressionGraph()
-    # Attach a quick lookup dict for expression to index
-    F.e2i = {}
 
     # Insert arguments as first entries in factorisation graph
     # They will not be connected to other nodes, but will be available
@@ -263,16 +261,17 @@ def compute_argument_factorization(S, rank):
     # is a linear combination of multiple argkey configurations
 
     # Factorize each subexpression in order:
-    for si, attr in S.nodes.items():
+    arg_index_set = set(arg_indices)
+    S_factors = []
+    for si, v in enumerate(S.expressions):
         deps = S.out_edges[si]
-        v = attr["expression"]
 
-        if si in arg_indices:
+        if si in arg_index_set:
             assert len(deps) == 0
             # v is a modified Argument
             factors = {(si,): one_index}
         else:
-            fac = [S.nodes[d]["factors"] for d in deps]
+            fac = [S_factors[d] for d in deps]
             if not any(fac):
                 # Entirely scalar (i.e. no arg factors)
                 # Just add unchanged to F
@@ -286,25 +285,25 @@ def compute_argument_factorization(S, rank):
                     if fac[i]:
                         sf.append(None)
                     else:
-                        sf.append(S.nodes[d]["expression"])
+                        sf.append(S.expressions[d])
                 # Use appropriate handler to deal with Sum, Product, etc.
                 factors = handler(v, fac, sf, F)
 
-        attr["factors"] = factors
+        S_factors.append(factors)
 
-    assert len(F.nodes) == len(F.e2i)
+    assert F.number_of_nodes() == len(F.e2i)
 
     # Prepare a mapping from component of expression to factors
     factors = {}
-    S_targets = [i for i, v in S.nodes.items() if v.get("target", False)]
+    S_targets = sorted(i for i, t in S.target.items() if t)
 
     for S_target in S_targets:
         # Get the factorizations of the target values
-        if S.nodes[S_target]["factors"] == {}:
+        if S_factors[S_target] == {}:
             if rank == 0:
                 # Functionals and expressions: store as no args * factor
-                for comp in S.nodes[S_target]["component"]:
-                    factors[comp] = {(): F.e2i[S.nodes[S_target]["expression"]]}
+                for comp in S.component[S_target]:
+                    factors[comp] = {(): F.e2i[S.expressions[S_target]]}
             else:
                 # Zero form of arity 1 or higher: make factors empty
                 pass
@@ -312,9 +311,9 @@ def compute_argument_factorization(S, rank):
             # Forms of arity 1 or higher:
             # Map argkeys from indices into SV to indices into AV,
             # and resort keys for canonical representation
-            for argkey, fi in S.nodes[S_target]["factors"].items():
+            for argkey, fi in S_factors[S_target].items():
                 ai_fi = {tuple(sorted(arg_indices.index(si) for si in argkey)): fi}
-                for comp in S.nodes[S_target]["component"]:
+                for comp in S.component[S_target]:
                     if factors.get(comp):
                         factors[comp].update(ai_fi)
                     else:
@@ -323,17 +322,16 @@ def compute_argument_factorization(S, rank):
     # Indices into F that are needed for final result
     for comp, target in factors.items():
         for argkey, fi in target.items():
-            F.nodes[fi]["target"] = F.nodes[fi].get("target", [])
-            F.nodes[fi]["target"].append(argkey)
-
-            F.nodes[fi]["component"] = F.nodes[fi].get("component", [])
-            F.nodes[fi]["component"].append(comp)
+            F.target.setdefault(fi, []).append(argkey)
+            F.component.setdefault(fi, []).append(comp)
 
     # Compute dependencies in FV
-    for i, v in F.nodes.items():
-        expr = v["expression"]
+    sources, targets = [], []
+    for i, expr in enumerate(F.expressions):
         if not expr._ufl_is_terminal_ and not expr._ufl_is_terminal_modifier_:
             for o in expr.ufl_operands:
-                F.add_edge(i, F.e2i[o])
+                sources.append(i)
+                targets.append(F.e2i[o])
+    F.add_edges(sources, targets)
 
     return F
@@ -5,6 +5,7 @@
 # SPDX-License-Identifier:    LGPL-3.0-or-later
 """Linearized data structure for the computational graph."""
 
+import collections.abc
 import logging
 
 import numpy as np
@@ -20,34 +21,219 @@ logger = logging.getLogger("ffcx")
 class ExpressionGraph:
     """A directed multi-edge graph.
 
+    The nodes are numbered 0, 1, 2, ... in the order they are added.
+    The attributes of the nodes are stored in columns: a list of the
+    expressions of all nodes, an array of their status, and dicts of the
+    attributes that only some nodes have ('target', 'component', 'mt'
+    and 'tr'). The edges are stored in compressed sparse row (CSR)
+    arrays, which are built when the edges are first read after edges
+    were added. The attributes of a node can also be accessed through a
+    dict-like view, e.g. ``G.nodes[i]["expression"]``.
+
     ExpressionGraph allows multiple edges between the same nodes,
     and respects the insertion order of nodes and edges.
     """
 
+    # Values of the status attribute, set by analyse_dependencies
+    statuses = ("inactive", "active", "piecewise", "varying")
+
     def __init__(self):
         """Initialise."""
-        # Data structures for directed multi-edge graph
-        self.nodes = {}
-        self.out_edges = {}
-        self.in_edges = {}
+        self.expressions = []
+        self.status = np.zeros(0, dtype=np.int8)
+        self.target = {}
+        self.component = {}
+        self.mt = {}
+        self.tr = {}
+
+        # Lookup from expression to node
+        self.e2i = {}
+
+        # Edges added since the CSR arrays were built
+        self._sources = []
+        self._targets = []
+        self._out_edges = _Adjacency.empty(0)
+        self._in_edges = _Adjacency.empty(0)
 
     def number_of_nodes(self):
         """Get number of nodes."""
-        return len(self.nodes)
+        return len(self.expressions)
 
-    def add_node(self, key, **kwargs):
-        """Add a node with optional properties."""
-        self.nodes[key] = kwargs
-        self.out_edges[key] = []
-        self.in_edges[key] = []
+    def number_of_edges(self):
+        """Get number of edges."""
+        return len(self.out_edges.indices)
+
+    def add_node(self, expression):
+        """Add a node, and return its number."""
+        self.expressions.append(expression)
+        return len(self.expressions) - 1
 
     def add_edge(self, node1, node2):
         """Add a directed edge from node1 to node2."""
-        if node1 not in self.nodes or node2 not in self.nodes:
+        n = len(self.expressions)
+        if not (0 <= node1 < n and 0 <= node2 < n):
             raise KeyError("Adding edge to unknown node")
+        self._sources.append(node1)
+        self._targets.append(node2)
+
+    def add_edges(self, nodes1, nodes2):
+        """Add directed edges from each node of nodes1 to the node of nodes2."""
+        self._sources.extend(nodes1)
+        self._targets.extend(nodes2)
+
+    @property
+    def out_edges(self):
+        """Adjacency of the nodes, in the order the edges were added."""
+        self._build_edges()
+        return self._out_edges
+
+    @property
+    def in_edges(self):
+        """Reverse adjacency of the nodes, in the order the edges were added."""
+        self._build_edges()
+        return self._in_edges
+
+    @property
+    def nodes(self):
+        """Dict-like view of the attributes of the nodes."""
+        return _NodeView(self)
+
+    def set_status(self, nodes, status):
+        """Set the status of nodes."""
+        n = len(self.expressions)
+        if len(self.status) != n:
+            # Nodes added since the status was set are inactive
+            values = np.zeros(n, dtype=np.int8)
+            values[: min(n, len(self.status))] = self.status[:n]
+            self.status = values
+        self.status[nodes] = self.statuses.index(status)
+
+    def nodes_with_status(self, status):
+        """Return the nodes with the given status, in order."""
+        return np.flatnonzero(self.status == self.statuses.index(status))
+
+    def _build_edges(self):
+        """Merge the added edges into the CSR arrays."""
+        n = len(self.expressions)
+        if not self._sources and len(self._out_edges.offsets) == n + 1:
+            return
+        sources = np.concatenate(
+            (self._out_edges.sources(), np.asarray(self._sources, dtype=np.int32))
+        )
+        targets = np.concatenate(
+            (self._out_edges.indices, np.asarray(self._targets, dtype=np.int32))
+        )
+        self._sources, self._targets = [], []
+        self._out_edges = _Adjacency.from_edges(sources, targets, n)
+        self._in_edges = _Adjacency.from_edges(targets, sources, n)
+
+
+class _Adjacency:
+    """Neighbours of the nodes of a graph in CSR format."""
+
+    def __init__(self, offsets, indices):
+        self.offsets = offsets
+        self.indices = indices
+
+    @classmethod
+    def empty(cls, n):
+        return cls(np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def from_edges(cls, sources, targets, n):
+        # A stable sort keeps the edges of each node in insertion order
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+        return cls(offsets, targets[order])
+
+    def sources(self):
+        """Return the source node of each edge."""
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+
+    def neighbours(self, nodes):
+        """Return the neighbours of all nodes of an array, concatenated."""
+        begin, end = self.offsets[nodes], self.offsets[nodes + 1]
+        counts = end - begin
+        first = np.cumsum(counts) - counts
+        return self.indices[np.repeat(begin - first, counts) + np.arange(counts.sum())]
+
+    def __getitem__(self, node):
+        return self.indices[self.offsets[node] : self.offsets[node + 1]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def items(self):
+        return ((i, self[i]) for i in range(len(self)))
+
+
+class _NodeView(collections.abc.Mapping):
+    """Dict-like view of the nodes of an ExpressionGraph."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        if not 0 <= node < len(self._graph.expressions):
+            raise KeyError(node)
+        return _Node(self._graph, node)
+
+    def __iter__(self):
+        return iter(range(len(self._graph.expressions)))
+
+    def __len__(self):
+        return len(self._graph.expressions)
+
+
+class _Node(collections.abc.MutableMapping):
+    """Dict-like view of the attributes of a node of an ExpressionGraph."""
+
+    _sparse = ("target", "component", "mt", "tr")
+
+    def __init__(self, graph, node):
+        self._graph = graph
+        self._node = node
+
+    def __getitem__(self, key):
+        G, i = self._graph, self._node
+        if key == "expression":
+            return G.expressions[i]
+        elif key == "status":
+            if i >= len(G.status):
+                raise KeyError(key)
+            return G.statuses[G.status[i]]
+        elif key in self._sparse:
+            return getattr(G, key)[i]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        G, i = self._graph, self._node
+        if key == "expression":
+            G.expressions[i] = value
+        elif key == "status":
+            G.set_status(i, value)
+        elif key in self._sparse:
+            getattr(G, key)[i] = value
+        else:
+            raise KeyError(f"Unknown node attribute {key}")
 
-        self.out_edges[node1] += [node2]
-        self.in_edges[node2] += [node1]
+    def __delitem__(self, key):
+        if key not in self._sparse:
+            raise KeyError(key)
+        del getattr(self._graph, key)[self._node]
+
+    def __iter__(self):
+        G, i = self._graph, self._node
+        yield "expression"
+        if i < len(G.status):
+            yield "status"
+        for key in self._sparse:
+            if i in getattr(G, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
 
 
 def build_graph_vertices(expressions, skip_terminal_modifiers=False):
@@ -57,18 +243,13 @@ def build_graph_vertices(expressions, skip_terminal_modifiers=False):
     G.e2i = _count_nodes_with_unique_post_traversal(expressions, skip_terminal_modifiers)
 
     # Invert the map to get index->expression
-    GV = sorted(G.e2i, key=G.e2i.get)
-
-    # Add nodes to 'new' graph structure
-    for i, v in enumerate(GV):
-        G.add_node(i, expression=v)
+    G.expressions = sorted(G.e2i, key=G.e2i.get)
 
     for comp, expr in enumerate(expressions):
         # Get vertex index representing input expression root
         V_target = G.e2i[expr]
-        G.nodes[V_target]["target"] = True
-        G.nodes[V_target]["component"] = G.nodes[V_target].get("component", [])
-        G.nodes[V_target]["component"].append(comp)
+        G.target[V_target] = True
+        G.component.setdefault(V_target, []).append(comp)
 
     return G
 
@@ -78,43 +259,156 @@ def build_scalar_graph(expression):
     # Populate with vertices
     G = build_graph_vertices([expression], skip_terminal_modifiers=False)
 
-    # Build more fine grained computational graph of scalar subexpressions
-    scalar_expressions = rebuild_with_scalar_subexpressions(G)
+    # Build more fine grained computational graph of scalar
+    # subexpressions, where all vertices represent single scalar
+    # operations
+    nodes = _ScalarNodes()
+    scalar_expressions = rebuild_with_scalar_subexpressions(G, nodes.insert)
 
-    # Build new list representation of graph where all
-    # vertices of V represent single scalar operations
-    G = build_graph_vertices(scalar_expressions, skip_terminal_modifiers=True)
+    S = ExpressionGraph()
+    nodes.fill(S, [nodes.e2i[w] for w in scalar_expressions])
+    return S
 
-    # Compute graph edges
-    V_deps = []
-    for i, v in G.nodes.items():
-        expr = v["expression"]
-        if expr._ufl_is_terminal_ or expr._ufl_is_terminal_modifier_:
-            V_deps.append(())
-        else:
-            V_deps.append([G.e2i[o] for o in expr.ufl_operands])
 
-    for i, edges in enumerate(V_deps):
-        for j in edges:
-            if i == j:
-                continue
-            G.add_edge(i, j)
+def replace_scalar_nodes(S, replacements):
+    """Replace the expressions of nodes of a scalar graph.
 
-    return G
+    The replacements are propagated to the nodes that depend on them,
+    e.g. products with a node replaced by zero become zero, and the graph
+    is rebuilt in place with only the nodes that the targets depend on.
+
+    Args:
+        S: Scalar graph, from build_scalar_graph.
+        replacements: New scalar expression of each replaced node.
+    """
+    expressions = list(S.expressions)
+    changed = np.zeros(len(expressions), dtype=bool)
+    for i, expr in replacements.items():
+        expressions[i] = expr
+        changed[i] = True
+
+    # Nodes come after their operands, so that the expressions of the
+    # operands are updated first
+    nodes = _ScalarNodes()
+    out_edges = S.out_edges
+    for i, expr in enumerate(expressions):
+        deps = out_edges[i]
+        if not changed[i] and changed[deps].any():
+            expressions[i] = expr._ufl_expr_reconstruct_(*(expressions[j] for j in deps))
+            changed[i] = True
+        nodes.insert(expressions[i])
+
+    # Root of each component
+    roots = [None] * sum(len(c) for c in S.component.values())
+    for target in S.target:
+        for comp in S.component[target]:
+            roots[comp] = nodes.e2i[expressions[target]]
+    nodes.fill(S, roots)
+
+
+class _ScalarNodes:
+    """Unique scalar subexpressions, with their operands."""
+
+    def __init__(self):
+        self.e2i = {}
+        self.expressions = []
+        self.operands = []
 
+    def insert(self, expr):
+        """Add an expression and its subexpressions, and return its index.
 
-def rebuild_with_scalar_subexpressions(G):
+        Modified terminals are treated as units.
+        """
+        e2i = self.e2i
+        if expr in e2i:
+            return e2i[expr]
+        stack = [expr]
+        while stack:
+            e = stack[-1]
+            if e in e2i:
+                stack.pop()
+                continue
+            if e._ufl_is_terminal_ or is_modified_terminal(e):
+                ops = ()
+            else:
+                ops = tuple(
+                    o
+                    for o in e.ufl_operands
+                    if not isinstance(o, (ufl.classes.MultiIndex, ufl.classes.Label))
+                )
+            new_ops = [o for o in ops if o not in e2i]
+            if new_ops:
+                stack.extend(reversed(new_ops))
+            else:
+                e2i[e] = len(self.expressions)
+                self.expressions.append(e)
+                self.operands.append([e2i[o] for o in ops])
+                stack.pop()
+        return e2i[expr]
+
+    def fill(self, G, roots):
+        """Fill a graph with the nodes the roots depend on.
+
+        The nodes are numbered in post-order from the roots, like
+        build_graph_vertices, and each root is the target of its
+        component.
+        """
+        # Post-order traversal from the roots, visiting operands in order
+        index = [-1] * len(self.expressions)
+        order = []
+        stack = [(r, list(self.operands[r])) for r in reversed(roots)]
+        while stack:
+            k, ops = stack[-1]
+            if index[k] >= 0:
+                stack.pop()
+                continue
+            for m, o in enumerate(ops):
+                if o is not None and index[o] < 0:
+                    stack.append((o, list(self.operands[o])))
+                    ops[m] = None
+                    break
+            else:
+                index[k] = len(order)
+                order.append(k)
+                stack.pop()
+
+        G.expressions = [self.expressions[k] for k in order]
+        G.e2i = {e: i for i, e in enumerate(G.expressions)}
+        G.status = np.zeros(0, dtype=np.int8)
+        G.target, G.component, G.mt, G.tr = {}, {}, {}, {}
+        for comp, r in enumerate(roots):
+            G.target[index[r]] = True
+            G.component.setdefault(index[r], []).append(comp)
+
+        # Terminal modifiers, e.g. indexed modified terminals, have no
+        # edges to their operands
+        sources, targets = [], []
+        for i, k in enumerate(order):
+            expr = self.expressions[k]
+            if expr._ufl_is_terminal_ or expr._ufl_is_terminal_modifier_:
+                continue
+            for o in self.operands[k]:
+                j = index[o]
+                if i != j:
+                    sources.append(i)
+                    targets.append(j)
+        G._sources, G._targets = [], []
+        G._out_edges = G._in_edges = _Adjacency.empty(0)
+        G.add_edges(sources, targets)
+
+
+def rebuild_with_scalar_subexpressions(G, insert=None):
     """Build a new expression2index mapping where each subexpression is scalar valued.
 
-    Input:
-    - G.e2i
-    - G.V
-    - G.V_symbols
-    - G.total_unique_symbols
+    The symbols of each node of G are computed and its scalar
+    subexpressions reconstructed in the same pass over the nodes.
+
+    Args:
+        G: Graph of the expression, from build_graph_vertices.
+        insert: Called with each new scalar subexpression.
 
-    Output:
-    - NV   - Array with reverse mapping from index to expression
-    - nvs  - Tuple of ne2i indices corresponding to the last vertex of G.V
+    Returns:
+        Scalar subexpressions of the last node of G.
     """
     # Compute symbols over graph and rebuild scalar expression
     #
@@ -122,25 +416,19 @@ def rebuild_with_scalar_subexpressions(G):
     # generates a new symbol
     value_numberer = ValueNumberer(G)
 
-    # V_symbols maps an index of a node to a list of
-    # symbols which are present in that node
-    V_symbols = value_numberer.compute_symbols()
-    total_unique_symbols = value_numberer.symbol_count
-
-    # Array to store the scalar subexpression in for each symbol
-    W = np.empty(total_unique_symbols, dtype=object)
+    # Scalar subexpression of each symbol
+    W = {}
 
     # Iterate over each graph node in order
-    for i, v in G.nodes.items():
-        expr = v["expression"]
+    for i, expr in enumerate(G.expressions):
         # Find symbols of v components
-        vs = V_symbols[i]
+        vs = value_numberer.compute_node_symbols(expr)
 
         # Skip if there's nothing new here (should be the case for indexing types)
         # New symbols are not given to indexing types, so W[symbol] already equals
         # an expression, since it was assigned to the symbol in a previous loop
         # cycle
-        if all(W[s] is not None for s in vs):
+        if all(s in W for s in vs):
             continue
 
         if is_modified_terminal(expr):
@@ -158,10 +446,6 @@ def rebuild_with_scalar_subexpressions(G):
                         "Expecting single symbol for scalar valued modified terminal."
                     )
                 ws = [expr]
-            # FIXME: Replace ws[:] with 0's if its table is empty
-            # Possible redesign: loop over modified terminals only first,
-            # then build tables for them, set W[s] = 0.0 for modified terminals with zero table,
-            # then loop over non-(modified terminal)s to reconstruct expression.
         else:
             # Find symbols of operands
             sops = []
@@ -172,10 +456,7 @@ def rebuild_with_scalar_subexpressions(G):
                         raise RuntimeError(f"Not expecting a {type(expr)}.")
                     sops.append(())
                 else:
-                    # TODO: Build edge datastructure and use instead?
-                    # k = G.E[i][j]
-                    k = G.e2i[vop]
-                    sops.append(V_symbols[k])
+                    sops.append(value_numberer.V_symbols[G.e2i[vop]])
 
             # Fetch reconstructed operand expressions
             wops = [tuple(W[k] for k in so) for so in sops]
@@ -190,18 +471,18 @@ def rebuild_with_scalar_subexpressions(G):
         # Store each new scalar subexpression in W at the index of its symbol
         handled = set()
         for s, w in zip(vs, ws):
-            if W[s] is None:
+            if s not in W:
                 W[s] = w
                 handled.add(s)
+                if insert is not None:
+                    insert(w)
             else:
                 assert (
                     s in handled
                 )  # Result of symmetry! - but I think this never gets reached anyway (CNR)
 
     # Find symbols of final v from input graph
-    vs = V_symbols[-1]
-    scalar_expressions = W[vs]
-    return scalar_expressions
+    return [W[s] for s in value_numberer.V_symbols[-1]]
 
 
 def _count_nodes_with_unique_post_traversal(expressions, skip_terminal_modifiers=False):
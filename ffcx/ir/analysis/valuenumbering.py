@@ -63,33 +63,35 @@ class ValueNumberer:
 
     def get_node_symbols(self, expr):
         """Get node symbols."""
-        idx = [i for i, v in self.G.nodes.items() if v["expression"] == expr][0]
-        return self.V_symbols[idx]
+        return self.V_symbols[self.G.e2i[expr]]
 
     def compute_symbols(self):
         """Compute symbols."""
-        for i, v in self.G.nodes.items():
-            expr = v["expression"]
-            symbol = None
-            # First look for exact type match
-            f = self.call_lookup.get(type(expr), False)
-            if f:
-                symbol = f(expr)
-            else:
-                # Look for parent class types instead
-                for k in self.call_lookup.keys():
-                    if isinstance(expr, k):
-                        symbol = self.call_lookup[k](expr)
-                        break
-
-            if symbol is None:
-                # Nothing found
-                raise RuntimeError(f"Not expecting type {type(expr)} here.")
-
-            self.V_symbols.append(symbol)
-
+        for expr in self.G.expressions[len(self.V_symbols) :]:
+            self.compute_node_symbols(expr)
         return self.V_symbols
 
+    def compute_node_symbols(self, expr):
+        """Compute the symbols of the next node of the graph."""
+        symbol = None
+        # First look for exact type match
+        f = self.call_lookup.get(type(expr), False)
+        if f:
+            symbol = f(expr)
+        else:
+            # Look for parent class types instead
+            for k in self.call_lookup.keys():
+                if isinstance(expr, k):
+                    symbol = self.call_lookup[k](expr)
+                    break
+
+        if symbol is None:
+            # Nothing found
+            raise RuntimeError(f"Not expecting type {type(expr)} here.")
+
+        self.V_symbols.append(symbol)
+        return symbol
+
     def expr(self, v):
         """Create new symbols for expressions that represent new values."""
         n = ufl.product(v.ufl_shape + v.ufl_index_dimensions)
@@ -5,6 +5,8 @@
 # SPDX-License-Identifier:    LGPL-3.0-or-later
 """Tools for precomputed tables of terminal values."""
 
+import bisect
+import hashlib
 import logging
 import typing
 
@@ -13,6 +15,7 @@ import numpy as np
 import numpy.typing as npt
 import ufl
 
+from ffcx.caching import LRUCache
 from ffcx.element_interface import basix_index
 from ffcx.ir.representationutils import (
     create_quadrature_points_and_weights,
@@ -29,6 +32,14 @@ default_atol = 1e-9
 piecewise_ttypes = ("piecewise", "fixed", "ones", "zeros")
 uniform_ttypes = ("fixed", "ones", "zeros", "uniform")
 
+# Tabulations of elements, keyed by element and a hash of the points,
+# holding the derivatives up to the highest order tabulated so far. The
+# tables are bounded by their total size in bytes, since tables of all
+# entities and permutations of high degree elements take megabytes. Set
+# tabulation_cache.maxbytes or maxsize to change its size, or maxsize to
+# 0 to disable it.
+tabulation_cache = LRUCache(maxsize=256, maxbytes=64 * 2**20, sizeof=lambda v: v[1].nbytes)
+
 
 class ModifiedTerminalElement(typing.NamedTuple):
     """Modified terminal element."""
@@ -65,6 +76,109 @@ def equal_tables(a, b, rtol=default_rtol, atol=default_atol):
         return np.allclose(a, b, rtol=rtol, atol=atol)
 
 
+class TableIndex:
+    """Index of tables, to find the tables that may be equal to a table.
+
+    The tables are bucketed by shape and sorted by a random projection of
+    their values. Tables whose values are close, i.e. within atol plus
+    rtol times the values of either table, have close projections, so
+    the candidates for a table are found by bisection and only they need
+    to be compared.
+    """
+
+    # Random weights of the projections of tables of each size
+    _weights: typing.ClassVar[dict[int, npt.NDArray[np.float64]]] = {}
+
+    def __init__(self, rtol=default_rtol, atol=default_atol):
+        """Initialise.
+
+        Args:
+            rtol: Relative tolerance of the comparisons of the tables.
+            atol: Absolute tolerance of the comparisons of the tables.
+        """
+        self.rtol = rtol
+        self.atol = atol
+        self._buckets = {}
+        self._order = {}
+        self._shapes = {}
+
+    def _project(self, table):
+        """Project a table onto the random weights of its size."""
+        values = np.asarray(table, dtype=np.float64).ravel()
+        weights = self._weights.get(values.size)
+        if weights is None:
+            rng = np.random.default_rng(values.size)
+            weights = self._weights[values.size] = rng.uniform(-1.0, 1.0, values.size)
+        return float(values @ weights), float(np.abs(values).sum())
+
+    def add(self, key, table):
+        """Add a table, replacing any table with the same key."""
+        if key in self._shapes:
+            projections, keys = self._buckets[self._shapes[key]]
+            i = keys.index(key)
+            del projections[i], keys[i]
+        else:
+            self._order[key] = len(self._order)
+        shape = self._shapes[key] = np.shape(table)
+        projections, keys = self._buckets.setdefault(shape, ([], []))
+        p = self._project(table)[0]
+        i = bisect.bisect_right(projections, p)
+        projections.insert(i, p)
+        keys.insert(i, key)
+
+    def candidates(self, table):
+        """Return the keys of the tables that may be equal to a table.
+
+        The keys are in the order that they were first added.
+        """
+        projections, keys = self._buckets.get(np.shape(table), ((), ()))
+        if not keys:
+            return []
+        p, norm = self._project(table)
+
+        # If the tables are close, then the sum of the absolute
+        # differences of their values bounds the difference of the
+        # projections, as the weights are at most one. Rounding errors of
+        # the projections are included.
+        n = np.size(table)
+        max_norm = (norm + n * self.atol) / (1.0 - self.rtol)
+        bound = n * self.atol + (self.rtol + 2 * n * np.finfo(np.float64).eps) * max_norm
+        lo = bisect.bisect_left(projections, p - bound)
+        hi = bisect.bisect_right(projections, p + bound)
+        return sorted(keys[lo:hi], key=self._order.__getitem__)
+
+
+def tabulate(element, deriv_order, points):
+    """Tabulate the basis functions of an element and their derivatives.
+
+    Tabulations are cached, and a tabulation of higher derivatives
+    serves the lower derivatives too, so the returned table may hold
+    more derivatives than requested. It must not be modified.
+
+    Args:
+        element: Element to tabulate.
+        deriv_order: Derivative order to tabulate up to.
+        points: Points to tabulate at.
+
+    Returns:
+        The table of element.tabulate, indexed by the basix derivative
+        index.
+    """
+    if tabulation_cache.maxsize <= 0:
+        return element.tabulate(deriv_order, points)
+
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    key = (element, points.shape, hashlib.sha1(points.tobytes()).digest())
+    cached = tabulation_cache.get(key)
+    if cached is not None and cached[0] >= deriv_order:
+        return cached[1]
+
+    tbl = np.asarray(element.tabulate(deriv_order, points))
+    tbl.flags.writeable = False
+    tabulation_cache.put(key, (deriv_order, tbl))
+    return tbl
+
+
 def clamp_table_small_numbers(
     table, rtol=default_rtol, atol=default_atol, numbers=(-1.0, 0.0, 1.0)
 ):
@@ -77,14 +191,32 @@ def clamp_table_small_numbers(
 
 
 def get_ffcx_table_values(
-    points, cell, integral_type, element, avg, entitytype, derivative_counts, flat_component
+    points,
+    cell,
+    integral_type,
+    element,
+    avg,
+    entitytype,
+    derivative_counts,
+    flat_component,
+    max_deriv_order=0,
 ):
     """Extract values from FFCx element table.
 
-    Returns a 3D numpy array with axes
-    (entity number, quadrature point number, dof number)
+    The points are either the points on the reference entity, or an
+    array of the points of each quadrature permutation, e.g. of interior
+    facets. The points of all entities and permutations are tabulated in
+    one call. The element is tabulated up to max_deriv_order, if it is
+    higher than the order of derivative_counts, so that the cached
+    tabulation serves the other derivatives of the element too.
+
+    Returns a 4D numpy array with axes
+    (permutation number, entity number, quadrature point number, dof number)
     """
+    points = np.asarray(points)
+    num_perms = points.shape[0] if points.ndim == 3 else 1
     deriv_order = sum(derivative_counts)
+    tabulation_order = max(deriv_order, max_deriv_order)
 
     if integral_type in ufl.custom_integral_types:
         # Use quadrature points on cell for analysis in custom integral types
@@ -108,6 +240,7 @@ def get_ffcx_table_values(
         # Not expecting derivatives of averages
         assert not any(derivative_counts)
         assert deriv_order == 0
+        tabulation_order = 0
 
         # Doesn't matter if it's exterior or interior facet integral,
         # just need a valid integral type to create quadrature rule
@@ -131,32 +264,32 @@ def get_ffcx_table_values(
     num_entities = cell.num_sub_entities(entity_dim)
 
     # Extract arrays for the right scalar component
-    component_tables = []
     component_element, offset, stride = element.get_component_element(flat_component)
 
-    for entity in range(num_entities):
-        entity_points = map_integral_points(points, integral_type, cell, entity)
-        tbl = component_element.tabulate(deriv_order, entity_points)
-        tbl = tbl[basix_index(derivative_counts)]
-        component_tables.append(tbl)
+    # Points of each entity, in (permutation, entity) order
+    point_sets = np.reshape(points, (-1, *np.shape(points)[-2:]))
+    entity_points = np.concatenate(
+        [
+            map_integral_points(perm_points, integral_type, cell, entity)
+            for perm_points in point_sets
+            for entity in range(num_entities)
+        ]
+    )
+    tbl = tabulate(component_element, tabulation_order, entity_points)
+    tbl = tbl[basix_index(derivative_counts)]
+    num_dofs = tbl.shape[-1]
+    tbl = np.reshape(tbl, (len(point_sets), num_entities, -1, num_dofs))
 
     if avg in ("cell", "facet"):
-        # Compute numeric integral of the each component table
+        # Compute numeric integral of the each component table, which is
+        # the same for all permutations
         wsum = sum(weights)
-        for entity, tbl in enumerate(component_tables):
-            num_dofs = tbl.shape[1]
-            tbl = np.dot(tbl, weights) / wsum
-            tbl = np.reshape(tbl, (1, num_dofs))
-            component_tables[entity] = tbl
-
-    # Loop over entities and fill table blockwise (each block = points x dofs)
-    # Reorder axes as (points, dofs) instead of (dofs, points)
-    assert len(component_tables) == num_entities
-    num_points, num_dofs = component_tables[0].shape
-    shape = (1, num_entities, num_points, num_dofs)
-    res = np.zeros(shape)
-    for entity in range(num_entities):
-        res[:, entity, :, :] = component_tables[entity]
+        tbl = np.dot(tbl, weights) / wsum
+        tbl = np.reshape(tbl, (1, num_entities, 1, num_dofs))
+        tbl = np.broadcast_to(tbl, (num_perms, num_entities, 1, num_dofs))
+
+    # Tables are (points, dofs) blocks for each permutation and entity
+    res = np.array(tbl, dtype=np.float64)
 
     return {"array": res, "offset": offset, "stride": stride}
 
@@ -241,41 +374,37 @@ def get_modified_terminal_element(mt) -> typing.Optional[ModifiedTerminalElement
 
 def permute_quadrature_interval(points, reflections=0):
     """Permute quadrature points for an interval."""
-    output = points.copy()
-    for p in output:
-        assert len(p) < 2 or np.isclose(p[1], 0)
-        assert len(p) < 3 or np.isclose(p[2], 0)
+    assert np.shape(points)[1] == 1
+    output = np.array(points, dtype=np.float64)
     for _ in range(reflections):
-        for n, p in enumerate(output):
-            output[n] = [1 - p[0]]
+        output = 1 - output
     return output
 
 
+# The permutations below are applied one step at a time, with the
+# operations in the order of the row by row implementation, so that the
+# permuted points are bit-identical to it
+
+
 def permute_quadrature_triangle(points, reflections=0, rotations=0):
     """Permute quadrature points for a triangle."""
-    output = points.copy()
-    for p in output:
-        assert len(p) < 3 or np.isclose(p[2], 0)
+    assert np.shape(points)[1] == 2
+    output = np.array(points, dtype=np.float64)
     for _ in range(rotations):
-        for n, p in enumerate(output):
-            output[n] = [p[1], 1 - p[0] - p[1]]
+        output = np.column_stack([output[:, 1], 1 - output[:, 0] - output[:, 1]])
     for _ in range(reflections):
-        for n, p in enumerate(output):
-            output[n] = [p[1], p[0]]
+        output = output[:, [1, 0]]
     return output
 
 
 def permute_quadrature_quadrilateral(points, reflections=0, rotations=0):
     """Permute quadrature points for a quadrilateral."""
-    output = points.copy()
-    for p in output:
-        assert len(p) < 3 or np.isclose(p[2], 0)
+    assert np.shape(points)[1] == 2
+    output = np.array(points, dtype=np.float64)
     for _ in range(rotations):
-        for n, p in enumerate(output):
-            output[n] = [p[1], 1 - p[0]]
+        output = np.column_stack([output[:, 1], 1 - output[:, 0]])
     for _ in range(reflections):
-        for n, p in enumerate(output):
-            output[n] = [p[1], p[0]]
+        output = output[:, [1, 0]]
     return output
 
 
@@ -314,11 +443,43 @@ def build_optimized_tables(
         set(ufl.algorithms.analysis.extract_sub_elements(all_elements))
     )
     element_numbers = {element: i for i, element in enumerate(unique_elements)}
+
+    # Highest derivative order of each element, to tabulate each element
+    # once at each set of points
+    max_deriv_orders = {}
+    for element, _, local_derivatives, _ in analysis.values():
+        max_deriv_orders[element] = max(max_deriv_orders.get(element, 0), sum(local_derivatives))
     mt_tables = {}
 
+    # Points of each quadrature permutation of interior facets
+    points = quadrature_rule.points
+    if integral_type == "interior_facet" and cell.topological_dimension() > 1:
+        if cell.topological_dimension() == 2:
+            points = [permute_quadrature_interval(points, ref) for ref in range(2)]
+        elif cell.cellname() == "tetrahedron":
+            points = [
+                permute_quadrature_triangle(points, ref, rot)
+                for rot in range(3)
+                for ref in range(2)
+            ]
+        elif cell.cellname() == "hexahedron":
+            points = [
+                permute_quadrature_quadrilateral(points, ref, rot)
+                for rot in range(4)
+                for ref in range(2)
+            ]
+        else:
+            raise RuntimeError(f"Interior facet tables not implemented on {cell.cellname()}.")
+        points = np.array(points)
+
     _existing_tables = existing_tables.copy()
+    table_index = TableIndex()
+    for table_name, tbl in _existing_tables.items():
+        table_index.add(table_name, tbl)
 
     all_tensor_factors = []
+    # Same tolerances as np.allclose
+    tensor_factor_index = TableIndex(rtol=1e-5, atol=1e-8)
     tensor_n = 0
 
     for mt in modified_terminals:
@@ -340,88 +501,17 @@ def build_optimized_tables(
         # It should be possible to reuse the cached tables by name, but
         # the dofmap offset may differ due to restriction.
 
-        tdim = cell.topological_dimension()
-        if integral_type == "interior_facet":
-            if tdim == 1:
-                t = get_ffcx_table_values(
-                    quadrature_rule.points,
-                    cell,
-                    integral_type,
-                    element,
-                    avg,
-                    entitytype,
-                    local_derivatives,
-                    flat_component,
-                )
-            elif tdim == 2:
-                new_table = []
-                for ref in range(2):
-                    new_table.append(
-                        get_ffcx_table_values(
-                            permute_quadrature_interval(quadrature_rule.points, ref),
-                            cell,
-                            integral_type,
-                            element,
-                            avg,
-                            entitytype,
-                            local_derivatives,
-                            flat_component,
-                        )
-                    )
-
-                t = new_table[0]
-                t["array"] = np.vstack([td["array"] for td in new_table])
-            elif tdim == 3:
-                cell_type = cell.cellname()
-                if cell_type == "tetrahedron":
-                    new_table = []
-                    for rot in range(3):
-                        for ref in range(2):
-                            new_table.append(
-                                get_ffcx_table_values(
-                                    permute_quadrature_triangle(quadrature_rule.points, ref, rot),
-                                    cell,
-                                    integral_type,
-                                    element,
-                                    avg,
-                                    entitytype,
-                                    local_derivatives,
-                                    flat_component,
-                                )
-                            )
-                    t = new_table[0]
-                    t["array"] = np.vstack([td["array"] for td in new_table])
-                elif cell_type == "hexahedron":
-                    new_table = []
-                    for rot in range(4):
-                        for ref in range(2):
-                            new_table.append(
-                                get_ffcx_table_values(
-                                    permute_quadrature_quadrilateral(
-                                        quadrature_rule.points, ref, rot
-                                    ),
-                                    cell,
-                                    integral_type,
-                                    element,
-                                    avg,
-                                    entitytype,
-                                    local_derivatives,
-                                    flat_component,
-                                )
-                            )
-                    t = new_table[0]
-                    t["array"] = np.vstack([td["array"] for td in new_table])
-        else:
-            t = get_ffcx_table_values(
-                quadrature_rule.points,
-                cell,
-                integral_type,
-                element,
-                avg,
-                entitytype,
-                local_derivatives,
-                flat_component,
-            )
+        t = get_ffcx_table_values(
+            points,
+            cell,
+            integral_type,
+            element,
+            avg,
+            entitytype,
+            local_derivatives,
+            flat_component,
+            max_deriv_orders[element],
+        )
         # Clean up table
         tbl = clamp_table_small_numbers(t["array"], rtol=rtol, atol=atol)
         tabletype = analyse_table_type(tbl)
@@ -439,7 +529,7 @@ def build_optimized_tables(
 
         # Check for existing identical table
         new_table = True
-        for table_name in _existing_tables:
+        for table_name in table_index.candidates(tbl):
             if equal_tables(tbl, _existing_tables[table_name]):
                 name = table_name
                 tbl = _existing_tables[name]
@@ -448,6 +538,7 @@ def build_optimized_tables(
 
         if new_table:
             _existing_tables[name] = tbl
+            table_index.add(name, tbl)
 
         cell_offset = 0
 
@@ -468,9 +559,10 @@ def build_optimized_tables(
             for i, j in enumerate(factors[0]):
                 pts = quadrature_rule.tensor_factors[i][0]
                 d = local_derivatives[i]
-                sub_tbl = j.tabulate(d, pts)[d]
+                sub_tbl = tabulate(j, d, pts)[d]
                 sub_tbl = sub_tbl.reshape(1, 1, sub_tbl.shape[0], sub_tbl.shape[1])
-                for i in all_tensor_factors:
+                for k in tensor_factor_index.candidates(sub_tbl):
+                    i = all_tensor_factors[k]
                     if i.values.shape == sub_tbl.shape and np.allclose(i.values, sub_tbl):
                         tensor_factors.append(i)
                         break
@@ -488,6 +580,7 @@ def build_optimized_tables(
                         None,
                         None,
                     )
+                    tensor_factor_index.add(len(all_tensor_factors), sub_tbl)
                     all_tensor_factors.append(ut)
                     tensor_factors.append(ut)
                     mt_tables[ut.name] = ut
@@ -17,7 +17,7 @@ from ufl.checks import is_cellwise_constant
 from ufl.classes import QuadratureWeight
 
 from ffcx.ir.analysis.factorization import compute_argument_factorization
-from ffcx.ir.analysis.graph import build_scalar_graph
+from ffcx.ir.analysis.graph import build_scalar_graph, replace_scalar_nodes
 from ffcx.ir.analysis.modified_terminals import analyse_modified_terminal, is_modified_terminal
 from ffcx.ir.analysis.visualise import visualise_graph
 from ffcx.ir.elementtables import UniqueTableReferenceT, build_optimized_tables
@@ -77,9 +77,9 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
         # terminal_data again after factorization if that's necessary.
 
         initial_terminals = {
-            i: analyse_modified_terminal(v["expression"])
-            for i, v in S.nodes.items()
-            if is_modified_terminal(v["expression"])
+            i: analyse_modified_terminal(expr)
+            for i, expr in enumerate(S.expressions)
+            if is_modified_terminal(expr)
         }
 
         mt_table_reference = build_optimized_tables(
@@ -98,35 +98,15 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
         table_types = {v.name: v.ttype for v in mt_table_reference.values()}
         tables = {v.name: v.values for v in mt_table_reference.values()}
 
-        S_targets = [i for i, v in S.nodes.items() if v.get("target", False)]
-        num_components = np.int32(np.prod(expression.ufl_shape))
-
         if "zeros" in table_types.values():
-            # If there are any 'zero' tables, replace symbolically and rebuild graph
+            # If there are any 'zero' tables, replace the modified
+            # terminals symbolically and update the graph
+            zeros = {}
             for i, mt in initial_terminals.items():
-                # Set modified terminals with zero tables to zero
                 tr = mt_table_reference.get(mt)
                 if tr is not None and tr.ttype == "zeros":
-                    S.nodes[i]["expression"] = ufl.as_ufl(0.0)
-
-            # Propagate expression changes using dependency list
-            for i, v in S.nodes.items():
-                deps = [S.nodes[j]["expression"] for j in S.out_edges[i]]
-                if deps:
-                    v["expression"] = v["expression"]._ufl_expr_reconstruct_(*deps)
-
-            # Recreate expression with correct ufl_shape
-            expressions = [
-                None,
-            ] * num_components
-            for target in S_targets:
-                for comp in S.nodes[target]["component"]:
-                    assert expressions[comp] is None
-                    expressions[comp] = S.nodes[target]["expression"]
-            expression = ufl.as_tensor(np.reshape(expressions, expression.ufl_shape))
-
-            # Rebuild scalar list-based graph representation
-            S = build_scalar_graph(expression)
+                    zeros[i] = ufl.as_ufl(0.0)
+            replace_scalar_nodes(S, zeros)
 
         # Output diagnostic graph as pdf
         if visualise:
@@ -137,23 +117,18 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
         F = compute_argument_factorization(S, rank)
 
         # Get the 'target' nodes that are factors of arguments, and insert in dict
-        FV_targets = [i for i, v in F.nodes.items() if v.get("target", False)]
+        FV_targets = sorted(F.target)
         argument_factorization = {}
 
         for fi in FV_targets:
             # Number of blocks using this factor must agree with number of components
             # to which this factor contributes. I.e. there are more blocks iff there are more
             # components
-            assert len(F.nodes[fi]["target"]) == len(F.nodes[fi]["component"])
-
-            k = 0
-            for w in F.nodes[fi]["target"]:
-                comp = F.nodes[fi]["component"][k]
-                argument_factorization[w] = argument_factorization.get(w, [])
+            assert len(F.target[fi]) == len(F.component[fi])
 
+            for w, comp in zip(F.target[fi], F.component[fi]):
                 # Store tuple of (factor index, component index)
-                argument_factorization[w].append((fi, comp))
-                k += 1
+                argument_factorization.setdefault(w, []).append((fi, comp))
 
         # Get list of indices in F which are the arguments (should be at start)
         argkeys = set()
@@ -163,14 +138,13 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
 
         # Build set of modified_terminals for each mt factorized vertex in F
         # and attach tables, if appropriate
-        for i, v in F.nodes.items():
-            expr = v["expression"]
+        for i, expr in enumerate(F.expressions):
             if is_modified_terminal(expr):
                 mt = analyse_modified_terminal(expr)
-                F.nodes[i]["mt"] = mt
+                F.mt[i] = mt
                 tr = mt_table_reference.get(mt)
                 if tr is not None:
-                    F.nodes[i]["tr"] = tr
+                    F.tr[i] = tr
 
         # Attach 'status' to each node: 'inactive', 'piecewise' or 'varying'
         analyse_dependencies(F, mt_table_reference)
@@ -184,7 +158,7 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
         for ma_indices, fi_ci in sorted(argument_factorization.items()):
             # Get a bunch of information about this term
             assert rank == len(ma_indices)
-            trs = tuple(F.nodes[ai]["tr"] for ai in ma_indices)
+            trs = tuple(F.tr[ai] for ai in ma_indices)
 
             unames = tuple(tr.name for tr in trs)
             ttypes = tuple(tr.ttype for tr in trs)
@@ -207,13 +181,15 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
                 if trs[i].is_uniform:
                     r = None
                 else:
-                    r = F.nodes[ai]["mt"].restriction
+                    r = F.mt[ai].restriction
 
                 block_restrictions.append(r)
             block_restrictions = tuple(block_restrictions)
 
             # Check if each *each* factor corresponding to this argument is piecewise
-            all_factors_piecewise = all(F.nodes[ifi[0]]["status"] == "piecewise" for ifi in fi_ci)
+            all_factors_piecewise = all(
+                F.statuses[F.status[ifi[0]]] == "piecewise" for ifi in fi_ci
+            )
             block_is_permuted = False
             for name in unames:
                 if tables[name].shape[0] > 1:
@@ -241,9 +217,8 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
 
         # Figure out which table names are referenced
         active_table_names = set()
-        for i, v in F.nodes.items():
-            tr = v.get("tr")
-            if tr is not None and F.nodes[i]["status"] != "inactive":
+        for i, tr in F.tr.items():
+            if F.statuses[F.status[i]] != "inactive":
                 if tr.has_tensor_factorisation:
                     for t in tr.tensor_factors:
                         active_table_names.add(t.name)
@@ -276,7 +251,7 @@ def compute_integral_ir(cell, integral_type, entitytype, integrands, argument_sh
         # Store final ir for this num_points
         ir["integrand"][quadrature_rule] = {
             "factorization": F,
-            "modified_arguments": [F.nodes[i]["mt"] for i in argkeys],
+            "modified_arguments": [F.mt[i] for i in argkeys],
             "block_contributions": block_contributions,
         }
 
@@ -295,25 +270,25 @@ def analyse_dependencies(F, mt_unique_table_reference):
     Varying nodes are identified by their tables ('tr'). All their parent
     nodes are also set to 'varying' - any remaining active nodes are 'piecewise'.
     """
-    # Set targets, and dependencies to 'active'
-    targets = [i for i, v in F.nodes.items() if v.get("target")]
-    for _, v in F.nodes.items():
-        v["status"] = "inactive"
+    inactive, active, piecewise, varying = (
+        F.statuses.index(s) for s in ("inactive", "active", "piecewise", "varying")
+    )
+    status = np.full(F.number_of_nodes(), inactive, dtype=np.int8)
 
-    while targets:
-        s = targets.pop()
-        F.nodes[s]["status"] = "active"
-        for j in F.out_edges[s]:
-            if F.nodes[j]["status"] == "inactive":
-                targets.append(j)
+    # Set targets, and dependencies to 'active'
+    nodes = np.array(sorted(F.target), dtype=np.int64)
+    while nodes.size > 0:
+        status[nodes] = active
+        nodes = F.out_edges.neighbours(nodes)
+        nodes = np.unique(nodes[status[nodes] == inactive])
 
     # Build piecewise/varying markers for factorized_vertices
     varying_ttypes = ("varying", "quadrature", "uniform")
     varying_indices = []
-    for i, v in F.nodes.items():
-        if v.get("mt") is None:
+    for i, mt in F.mt.items():
+        if mt is None:
             continue
-        tr = v.get("tr")
+        tr = F.tr.get(i)
         if tr is not None:
             ttype = tr.ttype
             # Check if table computations have revealed values varying over points
@@ -323,24 +298,23 @@ def analyse_dependencies(F, mt_unique_table_reference):
                 if ttype not in ("fixed", "piecewise", "ones", "zeros"):
                     raise RuntimeError(f"Invalid ttype {ttype}.")
 
-        elif not is_cellwise_constant(v["expression"]):
+        elif not is_cellwise_constant(F.expressions[i]):
             raise RuntimeError("Error " + str(tr))
             # Keeping this check to be on the safe side,
             # not sure which cases this will cover (if any)
             # varying_indices.append(i)
 
-    # Set all parents of active varying nodes to 'varying'
-    while varying_indices:
-        s = varying_indices.pop()
-        if F.nodes[s]["status"] == "active":
-            F.nodes[s]["status"] = "varying"
-            for j in F.in_edges[s]:
-                varying_indices.append(j)
+    # Set all active parents of active varying nodes to 'varying'
+    nodes = np.array(varying_indices, dtype=np.int64)
+    nodes = nodes[status[nodes] == active]
+    while nodes.size > 0:
+        status[nodes] = varying
+        nodes = F.in_edges.neighbours(nodes)
+        nodes = np.unique(nodes[status[nodes] == active])
 
     # Any remaining active nodes must be 'piecewise'
-    for _, v in F.nodes.items():
-        if v["status"] == "active":
-            v["status"] = "piecewise"
+    status[status == active] = piecewise
+    F.status = status
 
 
 def replace_quadratureweight(expression):
@@ -17,7 +17,7 @@ representation under the key "foo".
 
 from __future__ import annotations
 
-import itertools
+import functools
 import logging
 import typing
 import warnings
@@ -28,11 +28,15 @@ import ufl
 from ufl.classes import Integral
 from ufl.sorting import sorted_expr_sum
 
-from ffcx import naming
+from ffcx import naming, parallel
 from ffcx.analysis import UFLData
+from ffcx.integral_cache import IntegralCache, integral_key
 from ffcx.ir.integral import compute_integral_ir
 from ffcx.ir.representationutils import QuadratureRule, create_quadrature_points_and_weights
 
+if typing.TYPE_CHECKING:
+    from ffcx.report import CompileReport
+
 logger = logging.getLogger("ffcx")
 
 
@@ -79,6 +83,15 @@ class IntegralIR(typing.NamedTuple):
     name: str
     needs_facet_permutations: bool
     coordinate_element_hash: int
+    cache_key: str | None = None  # key in the integral cache, if enabled
+
+
+class CachedIntegralIR(typing.NamedTuple):
+    """Integral with generated code found in the integral cache."""
+
+    name: str
+    integral_type: str
+    code: tuple[str, str]
 
 
 class ExpressionIR(typing.NamedTuple):
@@ -107,7 +120,7 @@ class ExpressionIR(typing.NamedTuple):
 class DataIR(typing.NamedTuple):
     """Intermediate representation of data."""
 
-    integrals: list[IntegralIR]
+    integrals: list[IntegralIR | CachedIntegralIR]
     forms: list[FormIR]
     expressions: list[ExpressionIR]
 
@@ -118,6 +131,7 @@ def compute_ir(
     prefix: str,
     options: dict[str, npt.DTypeLike | int | float],
     visualise: bool,
+    report: CompileReport | None = None,
 ) -> DataIR:
     """Compute intermediate representation."""
     logger.info(79 * "*")
@@ -137,19 +151,77 @@ def compute_ir(
                 fd.original_form, itg_data.integral_type, fd_index, itg_data.subdomain_id, prefix
             )
 
-    irs = [
-        _compute_integral_ir(
-            fd,
+    # Look up the generated code of integrals in the integral cache
+    integral_keys: dict[tuple[int, int], str | None] = {}
+    cached_integrals = {}
+    cache = None
+    if options.get("integral_cache") and not visualise:
+        cache = IntegralCache(options["integral_cache"])  # type: ignore
+    for (i, j), name in integral_names.items():
+        key = None
+        if cache is not None:
+            fd = analysis.form_data[i]
+            key = integral_key(fd, j, options)
+            code = cache.get(key, name)
+            if code is not None:
+                logger.info(f"Found code of integral {name} in integral cache")
+                integral_type = fd.integral_data[j].integral_type
+                cached_integrals[(i, j)] = CachedIntegralIR(name, integral_type, code)
+        integral_keys[(i, j)] = key
+
+    # Integrals and expressions are independent, and may be computed in
+    # worker processes
+    computed_integrals = [index for index in integral_names if index not in cached_integrals]
+    integral_tasks = [
+        functools.partial(
+            _compute_integral_ir,
+            analysis.form_data[i],
             i,
             analysis.element_numbers,
             integral_names,
             finite_element_hashes,
             options,
             visualise,
+            [j],
         )
-        for (i, fd) in enumerate(analysis.form_data)
+        for (i, j) in computed_integrals
+    ]
+    expression_tasks = [
+        functools.partial(
+            _compute_expression_ir,
+            expr,
+            i,
+            prefix,
+            analysis,
+            options,
+            visualise,
+            object_names,
+            finite_element_hashes,
+        )
+        for i, expr in enumerate(analysis.expressions)
+    ]
+    # Elements are sent back from the workers by reference
+    domains = [ufl.domain.extract_unique_domain(expr[0]) for expr in analysis.expressions]
+    coordinate_elements = analysis.unique_coordinate_elements + [
+        domain.ufl_coordinate_element() for domain in domains if domain is not None
+    ]
+    shared = analysis.unique_elements + coordinate_elements
+    shared += ufl.algorithms.analysis.extract_sub_elements(coordinate_elements)
+    irs = parallel.run_tasks(
+        integral_tasks + expression_tasks,
+        int(options.get("workers", 1)),  # type: ignore
+        shared,
+        report,
+    )
+    computed = {
+        index: ir._replace(cache_key=integral_keys[index])
+        for index, (ir,) in zip(computed_integrals, irs[: len(integral_tasks)])
+    }
+    ir_integrals = [
+        cached_integrals[index] if index in cached_integrals else computed[index]
+        for index in integral_names
     ]
-    ir_integrals = list(itertools.chain(*irs))
+    ir_expressions = irs[len(integral_tasks) :]
 
     ir_forms = [
         _compute_form_ir(
@@ -165,20 +237,6 @@ def compute_ir(
         for (i, fd) in enumerate(analysis.form_data)
     ]
 
-    ir_expressions = [
-        _compute_expression_ir(
-            expr,
-            i,
-            prefix,
-            analysis,
-            options,
-            visualise,
-            object_names,
-            finite_element_hashes,
-        )
-        for i, expr in enumerate(analysis.expressions)
-    ]
-
     return DataIR(
         integrals=ir_integrals,
         forms=ir_forms,
@@ -194,8 +252,13 @@ def _compute_integral_ir(
     finite_element_hashes,
     options,
     visualise,
+    integral_data_indices=None,
 ) -> list[IntegralIR]:
-    """Compute intermediate representation for form integrals."""
+    """Compute intermediate representation for form integrals.
+
+    If integral_data_indices is given, only the groups of integrals with
+    these indices are computed.
+    """
     _entity_types = {
         "cell": "cell",
         "exterior_facet": "facet",
@@ -207,6 +270,8 @@ def _compute_integral_ir(
     # Iterate over groups of integrals
     irs = []
     for itg_data_index, itg_data in enumerate(form_data.integral_data):
+        if integral_data_indices is not None and itg_data_index not in integral_data_indices:
+            continue
         logger.info(f"Computing IR for integral in integral group {itg_data_index}")
 
         # Compute representation
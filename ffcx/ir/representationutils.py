@@ -39,6 +39,18 @@ class QuadratureRule:
         """Check equality."""
         return np.allclose(self.points, other.points) and np.allclose(self.weights, other.weights)
 
+    def __getstate__(self):
+        """Get state for pickling, without the hash object."""
+        state = self.__dict__.copy()
+        state.pop("hash_obj", None)
+        state["_hash"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Set state after unpickling, and recompute the hash."""
+        self.__dict__.update(state)
+        self.__hash__()
+
     def id(self):
         """Return unique deterministic identifier.
 
@@ -14,6 +14,7 @@ import logging
 import pathlib
 import re
 import string
+import sys
 
 import ufl
 
@@ -24,7 +25,8 @@ from ffcx.options import FFCX_DEFAULT_OPTIONS, get_options
 logger = logging.getLogger("ffcx")
 
 parser = argparse.ArgumentParser(
-    description="FEniCS Form Compiler (FFCx, https://fenicsproject.org)"
+    description="FEniCS Form Compiler (FFCx, https://fenicsproject.org)",
+    epilog="Run 'ffcx cache --help' for managing JIT cache directories.",
 )
 parser.add_argument("--version", action="version", version=f"%(prog)s (version {FFCX_VERSION})")
 parser.add_argument("-o", "--output-directory", type=str, default=".", help="output directory")
@@ -47,6 +49,13 @@ parser.add_argument("ufl_file", nargs="+", help="UFL file(s) to be compiled")
 
 def main(args=None):
     """Run ffcx on a UFL file."""
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] == "cache":
+        from ffcx.codegeneration import jit_cache
+
+        return jit_cache.main(args[1:])
+
     xargs = parser.parse_args(args)
 
     # Parse all other options
@@ -30,7 +30,7 @@ def compute_signature(
         # Get signature from ufl object
         if isinstance(ufl_object, ufl.Form):
             kind = "form"
-            object_signature += ufl_object.signature()
+            object_signature += form_signature(ufl_object)
         elif isinstance(ufl_object, tuple) and isinstance(ufl_object[0], ufl.core.expr.Expr):
             expr = ufl_object[0]
             points = ufl_object[1]
@@ -78,6 +78,28 @@ def compute_signature(
     return hashlib.sha1(string.encode("utf-8")).hexdigest()
 
 
+def form_signature(form: ufl.Form) -> str:
+    """Compute the signature hash of a single form.
+
+    Combines the UFL signature with the FFCx version and the signature of
+    ufcx.h. The result is stored in the form's cache for external
+    frameworks, so that it is computed once per form and the names of the
+    form, its integrals and the JIT module can be derived from it cheaply.
+    """
+    try:
+        return form._cache["ffcx_signature"]
+    except KeyError:
+        signatures = [form.signature(), str(ffcx.__version__), ffcx.codegeneration.get_signature()]
+        sig = hashlib.sha1(";".join(signatures).encode("utf-8")).hexdigest()
+        form._cache["ffcx_signature"] = sig
+        return sig
+
+
+def _derive_signature(signature: str, tag: str) -> str:
+    """Combine a signature hash with a tag."""
+    return hashlib.sha1(f"{signature};{tag}".encode()).hexdigest()
+
+
 def integral_name(
     original_form: ufl.form.Form,
     integral_type: str,
@@ -86,13 +108,15 @@ def integral_name(
     prefix: str,
 ) -> str:
     """Get integral name."""
-    sig = compute_signature([original_form], str((prefix, integral_type, form_id, subdomain_id)))
+    sig = _derive_signature(
+        form_signature(original_form), str((prefix, integral_type, form_id, subdomain_id))
+    )
     return f"integral_{sig}"
 
 
 def form_name(original_form: ufl.form.Form, form_id: int, prefix: str) -> str:
     """Get form name."""
-    sig = compute_signature([original_form], str((prefix, form_id)))
+    sig = _derive_signature(form_signature(original_form), str((prefix, form_id)))
     return f"form_{sig}"
 
 
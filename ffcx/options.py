@@ -28,6 +28,12 @@ FFCX_DEFAULT_OPTIONS = {
         ("float32", "float64", "complex64", "complex128"),
     ),
     "sum_factorization": (bool, False, "use sum factorization.", None),
+    "count_operations": (
+        bool,
+        False,
+        "annotate generated kernels with a static count of their operations.",
+        None,
+    ),
     "table_rtol": (
         float,
         1e-6,
@@ -40,6 +46,18 @@ FFCX_DEFAULT_OPTIONS = {
         "absolute precision to use when comparing finite element table values reuse.",
         None,
     ),
+    "workers": (
+        int,
+        1,
+        "number of worker processes computing the IR and code of integrals and expressions.",
+        None,
+    ),
+    "integral_cache": (
+        str,
+        "",
+        "directory of the cache of generated integral code (disabled if empty).",
+        None,
+    ),
     "verbosity": (
         int,
         30,
@@ -49,6 +67,11 @@ FFCX_DEFAULT_OPTIONS = {
 }
 
 
+# Options that change how the code is generated, but not the generated
+# code. They are left out of signatures and of the generated files.
+FFCX_EXECUTION_OPTIONS = ("workers", "integral_cache")
+
+
 @functools.cache
 def _load_options() -> tuple[dict, dict]:
     """Load options from JSON files."""
@@ -117,7 +140,8 @@ def get_options(
         options.update(priority_options)
 
     logger.setLevel(int(options["verbosity"]))  # type: ignore
-    logger.info("Final option values")
-    logger.info(pprint.pformat(options))
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Final option values")
+        logger.info(pprint.pformat(options))
 
     return options
@@ -0,0 +1,140 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Running compiler tasks in worker processes.
+
+Compiler stages work on UFL objects and finite elements that are
+expensive or impossible to pickle. The workers are therefore forked,
+so that they inherit the inputs of the tasks, and only the results are
+sent back. Finite elements in the results are sent by reference to the
+equal element in the parent process.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import multiprocessing
+import pickle
+import threading
+import typing
+
+if typing.TYPE_CHECKING:
+    from ffcx.report import CompileReport
+
+logger = logging.getLogger("ffcx")
+
+# Held while worker processes are forked
+_fork_lock = threading.Lock()
+
+# Tasks and shared objects of the pool a worker process belongs to, set
+# by _init_worker. Unused in the parent process.
+_tasks: typing.Sequence[typing.Callable[[], typing.Any]] = ()
+_shared_index: dict[typing.Any, int] = {}
+
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        try:
+            return _shared_index.get(obj)
+        except TypeError:
+            # Unhashable objects are never shared
+            return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, shared):
+        super().__init__(file)
+        self.shared = shared
+
+    def persistent_load(self, pid):
+        return self.shared[pid]
+
+
+def _init_worker(tasks, shared_index):
+    global _tasks, _shared_index
+    _tasks = tasks
+    _shared_index = shared_index
+
+
+def _run_task(i: int) -> bytes | None:
+    result = _tasks[i]()
+    f = io.BytesIO()
+    try:
+        _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(result)
+    except (TypeError, pickle.PicklingError):
+        # Recomputed by the parent process
+        return None
+    return f.getvalue()
+
+
+def can_fork() -> bool:
+    """Check if worker processes can be forked on this platform."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def run_tasks(
+    tasks: typing.Sequence[typing.Callable[[], typing.Any]],
+    workers: int,
+    shared: typing.Sequence[typing.Any] = (),
+    report: CompileReport | None = None,
+) -> list[typing.Any]:
+    """Run tasks in forked worker processes.
+
+    The tasks are run sequentially in this process if there are fewer
+    than two tasks or workers. If processes cannot be forked, or if
+    other threads are running, they are also run sequentially, and a
+    warning is logged. Forking a process with several threads may
+    deadlock on locks held by the other threads.
+
+    Args:
+        tasks: Functions without arguments. The functions and their
+            inputs are not pickled.
+        workers: Number of worker processes.
+        shared: Objects that may appear in the results and cannot be
+            pickled, e.g. finite elements. Objects in the results equal
+            to one of these are replaced by it. Tasks with other results
+            that cannot be pickled are run again in this process.
+        report: Report to record in if the tasks are run sequentially
+            although workers were requested.
+
+    Returns:
+        Results of the tasks, in the order of the tasks.
+    """
+    if workers < 2 or len(tasks) < 2:
+        return [task() for task in tasks]
+
+    if not can_fork():
+        return _run_sequentially(tasks, workers, "processes cannot be forked", report)
+
+    with _fork_lock:
+        if threading.active_count() > 1:
+            return _run_sequentially(tasks, workers, "other threads are running", report)
+
+        # The tasks are passed to the workers when they are forked, and
+        # are not pickled
+        shared_index = {obj: i for i, obj in enumerate(shared)}
+        context = multiprocessing.get_context("fork")
+        with context.Pool(
+            min(workers, len(tasks)), initializer=_init_worker, initargs=(tasks, shared_index)
+        ) as pool:
+            results = pool.map(_run_task, range(len(tasks)), chunksize=1)
+
+    failed = [i for i, r in enumerate(results) if r is None]
+    if failed:
+        logger.warning(f"Results of {len(failed)} tasks cannot be pickled, running them again.")
+    return [
+        tasks[i]() if r is None else _Unpickler(io.BytesIO(r), shared).load()
+        for i, r in enumerate(results)
+    ]
+
+
+def _run_sequentially(tasks, workers, reason, report):
+    logger.warning(
+        f"Running {len(tasks)} tasks in this process instead of {workers} workers, since {reason}."
+    )
+    if report is not None:
+        report.workers_fallback = reason
+    return [task() for task in tasks]
@@ -0,0 +1,144 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+"""Structured reports of the cost of a compilation.
+
+A :class:`CompileReport` can be passed to
+:func:`ffcx.compiler.compile_ufl_objects`,
+:func:`ffcx.codegeneration.jit.compile_forms` and
+:func:`ffcx.codegeneration.jit.compile_expressions`, which fill it in
+with the wall time and peak memory of each stage, the use of the JIT
+cache and a breakdown of the cost of each kernel.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+import tracemalloc
+import typing
+
+if typing.TYPE_CHECKING:
+    from ffcx.codegeneration.codegeneration import CodeBlocks
+    from ffcx.ir.representation import DataIR
+
+
+class StageReport(typing.NamedTuple):
+    """Cost of a compiler stage."""
+
+    name: str
+    wall_time: float  # seconds
+    peak_memory: int | None  # bytes allocated by Python above the start of the stage
+
+
+class KernelReport(typing.NamedTuple):
+    """Cost of an integral or expression kernel."""
+
+    name: str
+    integral_type: str
+    graph_nodes: int  # nodes of the factorised graphs, summed over quadrature rules
+    num_tables: int
+    table_bytes: int
+    source_size: int  # characters of generated C code
+
+
+class CompileReport:
+    """Report of the cost of a compilation.
+
+    Stages are named ``"analysis"``, ``"ir"``, ``"codegen"``,
+    ``"formatting"``, ``"c_compile"`` and ``"load"``, in the order they
+    run. Stages that are skipped, e.g. because the module is found in
+    the JIT cache, are not reported.
+
+    Args:
+        trace_memory: Measure the peak memory of each stage with
+            :mod:`tracemalloc`. This slows down the Python stages.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        """Initialise."""
+        self.trace_memory = trace_memory
+        self.stages: list[StageReport] = []
+        self.kernels: list[KernelReport] = []
+        self.module_name: str | None = None
+        # "memory", "disk", "code" (generated code found, module built)
+        # or "miss"
+        self.cache: str | None = None
+        self.cache_wait_time = 0.0
+        # Why compiler stages ran in this process although several
+        # workers were requested, e.g. "other threads are running"
+        self.workers_fallback: str | None = None
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Measure a stage of the compilation."""
+        started = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started = True
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - t0
+            peak_memory = None
+            if self.trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1] - base
+                if started:
+                    tracemalloc.stop()
+            self.stages.append(StageReport(name, wall_time, peak_memory))
+
+    def add_kernels(self, ir: DataIR, code: CodeBlocks):
+        """Add the kernels of an intermediate representation and the generated code."""
+        kernels = list(zip(ir.integrals, code.integrals)) + list(
+            zip(ir.expressions, code.expressions)
+        )
+        for kernel_ir, (_, impl) in kernels:
+            # Integrals found in the integral cache have no IR
+            integrands = getattr(kernel_ir, "integrand", {})
+            tables = getattr(kernel_ir, "unique_tables", {})
+            self.kernels.append(
+                KernelReport(
+                    name=kernel_ir.name,
+                    integral_type=kernel_ir.integral_type,
+                    graph_nodes=sum(
+                        integrand["factorization"].number_of_nodes()
+                        for integrand in integrands.values()
+                    ),
+                    num_tables=len(tables),
+                    table_bytes=sum(t.nbytes for t in tables.values()),
+                    source_size=len(impl),
+                )
+            )
+
+    def stage_time(self, name: str) -> float:
+        """Return the total wall time of the stages with a name."""
+        return sum(s.wall_time for s in self.stages if s.name == name)
+
+    @property
+    def wall_time(self) -> float:
+        """Total wall time of all stages."""
+        return sum(s.wall_time for s in self.stages) + self.cache_wait_time
+
+    def as_dict(self) -> dict:
+        """Convert to a dictionary of plain data, e.g. for JSON output."""
+        return {
+            "module_name": self.module_name,
+            "cache": self.cache,
+            "cache_wait_time": self.cache_wait_time,
+            "workers_fallback": self.workers_fallback,
+            "wall_time": self.wall_time,
+            "stages": [s._asdict() for s in self.stages],
+            "kernels": [k._asdict() for k in self.kernels],
+        }
+
+
+def stage(report: CompileReport | None, name: str) -> typing.ContextManager:
+    """Measure a stage if a report is given."""
+    return report.stage(name) if report is not None else contextlib.nullcontext()
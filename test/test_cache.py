@@ -4,12 +4,29 @@
 #
 # SPDX-License-Identifier:    LGPL-3.0-or-later
 
+import io
+import json
+import logging
+import multiprocessing
 import sys
+import sysconfig
+import tarfile
+import threading
+import time
+from pathlib import Path
 
 import basix.ufl
+import cffi
+import numpy as np
+import pytest
 import ufl
 
+import ffcx.analysis
 import ffcx.codegeneration.jit
+import ffcx.compiler
+import ffcx.ir.elementtables
+import ffcx.main
+from ffcx.codegeneration import jit_cache
 
 
 def test_cache_modes(compile_args):
@@ -39,3 +56,466 @@ def test_cache_modes(compile_args):
 
     assert newname == tmpname
     assert newfile != tmpfile
+
+
+def _compile_poisson(cache_dir):
+    element = basix.ufl.element("Lagrange", "triangle", 2)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+    _, module, (_, impl) = ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=cache_dir, timeout=60
+    )
+    return module.__name__, impl is not None
+
+
+def test_concurrent_compile(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(4) as pool:
+        results = pool.map(_compile_poisson, [tmp_path] * 4)
+
+    # All processes load the same module, but only one compiles it
+    assert len(set(name for name, _ in results)) == 1
+    assert sum(compiled for _, compiled in results) == 1
+    assert not any(tmp_path.glob("*.c.failed"))
+
+
+@pytest.mark.skipif(ffcx.codegeneration.jit.fcntl is None, reason="requires fcntl")
+def test_wait_for_failed_compile(tmp_path):
+    module_name = "libffcx_forms_" + 40 * "0"
+    c_filename = tmp_path.joinpath(module_name + ".c")
+    c_filename.write_text("")
+    fd = ffcx.codegeneration.jit._try_lock(c_filename.with_suffix(".c.lock"))
+
+    # Another compile holds the lock and fails while this process waits
+    def fail():
+        c_filename.rename(c_filename.with_suffix(".c.failed"))
+        ffcx.codegeneration.jit._unlock(fd)
+
+    timer = threading.Timer(0.1, fail)
+    timer.start()
+    with pytest.raises(RuntimeError, match="failed in another process"):
+        ffcx.codegeneration.jit.get_cached_module(module_name, [], tmp_path, timeout=10)
+    timer.join()
+
+    # The waiting process did not claim the module to compile it again
+    assert not c_filename.exists()
+
+
+def test_module_cache(compile_args):
+    element = basix.ufl.element("Lagrange", "quadrilateral", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "quadrilateral", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(u, v) * ufl.dx
+
+    cache = ffcx.codegeneration.jit.module_cache
+    cache.clear()
+    _, module, code = ffcx.codegeneration.jit.compile_forms(
+        [a], cffi_extra_compile_args=compile_args
+    )
+    assert code[1] is not None
+    assert cache.info().misses == 1 and cache.info().currsize == 1
+
+    # Second request is served from memory, with the generated code
+    _, module_cached, code_cached = ffcx.codegeneration.jit.compile_forms(
+        [a], cffi_extra_compile_args=compile_args
+    )
+    assert module_cached is module
+    assert code_cached == code
+    assert cache.info().hits == 1
+
+    # Different options are a different module
+    _, module_float32, _ = ffcx.codegeneration.jit.compile_forms(
+        [a], options={"scalar_type": "float32"}, cffi_extra_compile_args=compile_args
+    )
+    assert module_float32.__name__ != module.__name__
+    assert cache.info().currsize == 2
+
+    cache.maxsize = 1
+    assert cache.info().currsize == 1
+    cache.maxsize = 128
+
+
+def test_form_data_cache():
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    v = ufl.TestFunction(space)
+    f = ufl.Coefficient(space)
+
+    def compile(form, scalar_type="float64"):
+        options = ffcx.options.get_options({"scalar_type": scalar_type})
+        return ffcx.compiler.compile_ufl_objects(
+            [form], options=options, object_names={id(f): "f", id(form): "L"}
+        )
+
+    cache = ffcx.analysis.form_data_cache
+    ref = compile(f * v * ufl.dx)
+    cache.clear()
+    cache.maxsize = 2
+    try:
+        assert compile(f * v * ufl.dx) == ref
+        assert cache.info().misses == 1
+
+        # The same form, built again, is not analysed again
+        assert compile(f * v * ufl.dx) == ref
+        assert cache.info().hits == 1
+
+        # Different scalar types and coefficients are different entries
+        compile(f * v * ufl.dx, "float32")
+        compile(ufl.Coefficient(space) * v * ufl.dx)
+        assert cache.info().misses == 3
+        assert cache.info().currsize == 2
+    finally:
+        cache.maxsize = 0
+        cache.clear()
+
+
+def test_tabulation_cache():
+    element = basix.ufl.element("Lagrange", "triangle", 2)
+    points = np.array([[0.2, 0.3], [0.5, 0.1]])
+    tabulate = ffcx.ir.elementtables.tabulate
+    cache = ffcx.ir.elementtables.tabulation_cache
+    cache.clear()
+    try:
+        tbl = tabulate(element, 1, points)
+        np.testing.assert_array_equal(tbl, element.tabulate(1, points))
+        assert cache.info().misses == 1
+
+        # Lower derivatives and copies of the points use the same tabulation
+        assert tabulate(element, 0, points.copy()) is tbl
+        assert cache.info().hits == 1
+        assert not tbl.flags.writeable
+
+        # Higher derivatives replace it
+        assert tabulate(element, 2, points).shape[0] == 6
+        assert tabulate(element, 1, points).shape[0] == 6
+        assert cache.info().currsize == 1
+        p1 = basix.ufl.element("Lagrange", "triangle", 1)
+        tabulate(element, 0, points[::-1])
+        tabulate(p1, 0, points)
+        assert cache.info().currsize == 3
+        assert cache.nbytes == sum(
+            tabulate(e, 0, x).nbytes
+            for e, x in [(element, points), (element, points[::-1]), (p1, points)]
+        )
+    finally:
+        cache.clear()
+
+    # Tables are evicted when their total size exceeds maxbytes
+    maxbytes = cache.maxbytes
+    try:
+        many_points = np.random.default_rng(0).random((100, 2))
+        tbl = tabulate(element, 1, many_points)
+        cache.maxbytes = 2 * tbl.nbytes
+        tabulate(element, 1, many_points[1:])
+        assert cache.info().currsize == 2
+        tabulate(element, 1, many_points[2:])
+        assert cache.info().currsize == 2 and cache.nbytes <= cache.maxbytes
+        assert tabulate(element, 1, many_points) is not tbl
+
+        # Tables larger than the cache are not stored
+        tabulate(element, 2, np.random.default_rng(1).random((1000, 2)))
+        assert cache.info().currsize == 2
+        cache.maxbytes = tbl.nbytes
+        assert cache.info().currsize == 1 and cache.nbytes == tbl.nbytes
+    finally:
+        cache.maxbytes = maxbytes
+        cache.clear()
+
+
+def test_cache_dir_management(tmp_path, compile_args):
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    forms = [ufl.inner(u, v) * ufl.dx, ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx]
+
+    for a in forms:
+        ffcx.codegeneration.jit.compile_forms(
+            [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args, compile_workers=2
+        )
+
+    # Each form has a module and a generated code entry
+    s = jit_cache.stats(tmp_path)
+    assert s.num_entries == 4 and s.num_ready == 4
+    assert len(list(tmp_path.glob("*.code.json"))) == 2
+    assert not any(tmp_path.glob("*.o"))
+    assert not any(tmp_path.glob("*.c.lock"))
+    assert not jit_cache.verify(tmp_path)
+
+    # A failed compilation is reported and can be removed
+    tmp_path.joinpath("libffcx_forms_" + 40 * "0" + ".c.failed").write_text("")
+    assert jit_cache.stats(tmp_path).num_failed == 1
+    assert len(jit_cache.verify(tmp_path)) == 1
+    assert jit_cache.clear_failed(tmp_path, dry_run=True)
+    assert jit_cache.stats(tmp_path).num_failed == 1
+    assert len(jit_cache.clear_failed(tmp_path)) == 1
+    assert jit_cache.stats(tmp_path).num_entries == 4
+
+    # Pruning keeps the most recently used entry
+    entries = jit_cache.scan(tmp_path)
+    removed = jit_cache.prune(tmp_path, max_size=entries[-1].size)
+    assert [e.name for e in removed] == [e.name for e in entries[:-1]]
+    assert [e.name for e in jit_cache.scan(tmp_path)] == [entries[-1].name]
+
+    assert ffcx.main.main(["cache", "stats", str(tmp_path)]) == 0
+    assert ffcx.main.main(["cache", "verify", str(tmp_path)]) == 0
+    assert ffcx.main.main(["cache", "prune", "--max-size", "0", str(tmp_path)]) == 0
+    assert jit_cache.stats(tmp_path).num_entries == 0
+
+
+def test_source_cache(tmp_path, compile_args, monkeypatch):
+    element = basix.ufl.element("Lagrange", "triangle", 2)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+
+    forms0, module0, code0 = ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+    )
+
+    # Changing compiler flags only reruns the C compiler
+    def fail(*args, **kwargs):
+        raise AssertionError("code should be loaded from the source cache")
+
+    monkeypatch.setattr(ffcx.compiler, "generate_code_blocks", fail)
+    forms1, module1, code1 = ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args + ["-DFFCX_TEST"]
+    )
+    assert module1.__name__ != module0.__name__
+    assert code1 == code0
+    assert len(list(tmp_path.glob("*.code.json"))) == 1
+
+    # Both modules hold the same form
+    assert module0.ffi.string(forms0[0].signature) == module1.ffi.string(forms1[0].signature)
+
+
+def test_cache_archive(tmp_path, compile_args, monkeypatch):
+    element = basix.ufl.element("Lagrange", "tetrahedron", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "tetrahedron", 1, shape=(3,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(u, v) * ufl.dx
+
+    ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path / "a", cffi_extra_compile_args=compile_args
+    )
+    archive = tmp_path / "cache.tar.gz"
+    assert ffcx.main.main(["cache", "export", str(tmp_path / "a"), str(archive)]) == 0
+
+    # Modules built for another platform are skipped, generated code is not
+    with monkeypatch.context() as m:
+        m.setattr(ffcx.codegeneration.jit, "_compilation_signature", lambda *args: "other")
+        imported, skipped = jit_cache.import_archive(archive, tmp_path / "b")
+    assert len(imported) == 1 and len(skipped) == 1
+    assert skipped[0][1] == "incompatible compilation signature"
+
+    code_entry = imported[0]
+    imported, skipped = jit_cache.import_archive(archive, tmp_path / "b")
+    assert len(imported) == 1 and skipped == [(code_entry, "exists")]
+    assert jit_cache.stats(tmp_path / "b").num_ready == 2
+    assert not jit_cache.verify(tmp_path / "b")
+
+    # The imported module is loaded without compiling
+    ffcx.codegeneration.jit.module_cache.clear()
+    _, module, code = ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path / "b", cffi_extra_compile_args=compile_args
+    )
+    assert code == (None, None)
+    assert Path(module.__file__).parent == tmp_path / "b"
+
+    # Entries with links or directories instead of files are skipped
+    name = "libffcx_forms_" + 40 * "0"
+    index = {
+        "compilation_signature": ffcx.codegeneration.jit._compilation_signature(),
+        "entries": [{"name": name, "kind": "code", "files": [name + ".code.json"]}],
+    }
+    index_file = tmp_path / "index.json"
+    index_file.write_text(json.dumps(index))
+    archive = tmp_path / "links.tar"
+    with tarfile.open(archive, "w") as tar:
+        tar.add(index_file, "index.json")
+        link = tarfile.TarInfo(name + ".code.json")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        tar.addfile(link)
+    imported, skipped = jit_cache.import_archive(archive, tmp_path / "c")
+    assert imported == [] and skipped == [(name, "invalid entry")]
+
+    # Files are not written outside the cache directory
+    evil_names = [name + ".x/../../evil", "../" + name + ".code.json", name + ".c/../evil.so"]
+    index["entries"] = [{"name": name, "kind": "code", "files": [f]} for f in evil_names]
+    index_file.write_text(json.dumps(index))
+    archive = tmp_path / "traversal.tar"
+    with tarfile.open(archive, "w") as tar:
+        tar.add(index_file, "index.json")
+        for f in evil_names:
+            info = tarfile.TarInfo(f)
+            info.size = 4
+            tar.addfile(info, io.BytesIO(b"evil"))
+    (tmp_path / "d" / "e").mkdir(parents=True)
+    imported, skipped = jit_cache.import_archive(archive, tmp_path / "d" / "e")
+    assert imported == [] and skipped == [(name, "invalid entry")] * len(evil_names)
+    assert not list(tmp_path.rglob("evil*"))
+
+
+def test_cache_warm(tmp_path, compile_args):
+    demo = Path(__file__).parents[1] / "demo"
+    files = [demo / "Poisson1D.py", demo / "ExpressionInterpolation.py"]
+    args = ["cache", "warm", "-j", "2", str(tmp_path)] + [str(f) for f in files]
+    args += [f"--compile-arg={arg}" for arg in compile_args]
+    assert ffcx.main.main(args) == 0
+
+    # Runtime JIT finds the modules in the cache
+    ffcx.codegeneration.jit.module_cache.clear()
+    ufd = ufl.algorithms.load_ufl_file(str(files[0]))
+    for form in ufd.forms:
+        _, _, code = ffcx.codegeneration.jit.compile_forms(
+            [form], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+        )
+        assert code == (None, None)
+
+    ufd = ufl.algorithms.load_ufl_file(str(files[1]))
+    assert ufd.expressions
+    for expression in ufd.expressions:
+        _, _, code = ffcx.codegeneration.jit.compile_expressions(
+            [expression], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+        )
+        assert code == (None, None)
+
+
+def test_dlopen_cache(tmp_path, compile_args):
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(u, v) * ufl.dx
+
+    kwargs = {"cache_dir": tmp_path, "cffi_extra_compile_args": compile_args, "backend": "dlopen"}
+    forms, module, code = ffcx.codegeneration.jit.compile_forms([a], **kwargs)
+    assert code[1] is not None
+    assert module.__file__.endswith(sysconfig.get_config_var("EXT_SUFFIX"))
+    assert not jit_cache.verify(tmp_path)
+
+    ffcx.codegeneration.jit.module_cache.clear()
+    forms_cached, module_cached, code = ffcx.codegeneration.jit.compile_forms([a], **kwargs)
+    assert code == (None, None)
+    assert module_cached.__file__ == module.__file__
+    assert forms_cached[0].rank == forms[0].rank == 2
+
+
+def test_dlopen_without_linker(monkeypatch):
+    monkeypatch.delenv("LDSHARED", raising=False)
+    monkeypatch.setattr(sysconfig, "get_config_var", lambda name: None)
+    with pytest.raises(RuntimeError, match="LDSHARED"):
+        ffcx.codegeneration.jit._c_linker()
+
+
+def test_unknown_backend(tmp_path):
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    a = ufl.inner(ufl.TrialFunction(space), ufl.TestFunction(space)) * ufl.dx
+
+    # An unknown backend is rejected before the cache is used
+    for compile_function, objects in (
+        (ffcx.codegeneration.jit.compile_forms, [a]),
+        (
+            ffcx.codegeneration.jit.compile_expressions,
+            [(ufl.grad(ufl.Coefficient(space)), np.zeros((1, 2)))],
+        ),
+    ):
+        with pytest.raises(ValueError, match="Unknown JIT backend"):
+            compile_function(objects, cache_dir=tmp_path, backend="dlpoen")
+    assert not list(tmp_path.iterdir())
+
+
+def test_compile_error(tmp_path):
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    a = ufl.inner(ufl.TrialFunction(space), ufl.TestFunction(space)) * ufl.dx
+    jit = ffcx.codegeneration.jit
+    kwargs = {"cffi_extra_compile_args": ["-fno-such-option"]}
+
+    # Background builds run in a child process, whose output is part of
+    # the error
+    future = jit.compile_forms_async([a], cache_dir=tmp_path / "async", **kwargs)
+    with pytest.raises(cffi.VerificationError, match="no-such-option"):
+        future.result()
+
+    with pytest.raises(cffi.VerificationError):
+        jit.compile_forms([a], cache_dir=tmp_path / "sync", **kwargs)
+    for cache_dir in ("async", "sync"):
+        assert len(list(tmp_path.joinpath(cache_dir).glob("*.c.failed"))) == 1
+
+
+def test_cffi_build_in_process(tmp_path, compile_args, monkeypatch):
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    jit = ffcx.codegeneration.jit
+
+    def build_in_child(*args):
+        raise AssertionError("CFFI module built in a child process")
+
+    monkeypatch.setattr(jit, "_build_cffi_module_in_child", build_in_child)
+
+    # Synchronous builds run in this process
+    forms, _, _ = jit.compile_forms(
+        [ufl.inner(u, v) * ufl.dx], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+    )
+    assert forms[0].rank == 2
+
+    # Background builds too, if no Python interpreter can be started
+    monkeypatch.setattr(sys, "executable", "")
+    jit._python_executable.cache_clear()
+    try:
+        future = jit.compile_forms_async(
+            [ufl.inner(1.0, v) * ufl.dx], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+        )
+        assert future.result()[0][0].rank == 1
+    finally:
+        jit._python_executable.cache_clear()
+
+
+def test_async_compile(tmp_path, compile_args):
+    element = basix.ufl.element("Lagrange", "triangle", 2)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(u, v) * ufl.dx
+    L = ufl.inner(1.0, v) * ufl.dx
+    points = np.array([[0.0, 0.0], [1.0, 0.0]])
+
+    kwargs = {"cache_dir": tmp_path, "cffi_extra_compile_args": compile_args}
+    jit = ffcx.codegeneration.jit
+    jit.module_cache.clear()
+
+    # Requests for the same module share a compilation
+    futures = [jit.compile_forms_async([a], **kwargs) for _ in range(3)]
+    assert futures[1] is futures[0] and futures[2] is futures[0]
+    future_L = jit.compile_forms_async([L], **kwargs)
+    future_expr = jit.compile_expressions_async([(ufl.grad(u)[0] * 0 + 1.0, points)], **kwargs)
+    assert future_L is not futures[0]
+
+    # Builds do not redirect the output of this process while they run
+    stdout, handlers = sys.stdout, logging.getLogger().handlers.copy()
+    while not futures[0].done():
+        assert sys.stdout is stdout and logging.getLogger().handlers == handlers
+        time.sleep(0.001)
+
+    forms, module, _ = futures[0].result()
+    assert forms[0].rank == 2
+    assert future_L.result()[0][0].rank == 1
+    expressions, _, _ = future_expr.result()
+    assert expressions[0].num_points == 2
+
+    # Finished compilations are served by the module cache
+    _, module_cached, _ = jit.compile_forms_async([a], **kwargs).result()
+    assert module_cached is module
@@ -0,0 +1,168 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+
+import basix
+import basix.ufl
+import numpy as np
+import pytest
+import ufl
+
+from ffcx.element_interface import basix_index, map_facet_points
+from ffcx.ir.elementtables import (
+    TableIndex,
+    default_atol,
+    default_rtol,
+    equal_tables,
+    get_ffcx_table_values,
+    permute_quadrature_interval,
+    permute_quadrature_quadrilateral,
+    permute_quadrature_triangle,
+)
+from ffcx.ir.representationutils import create_quadrature_points_and_weights, map_integral_points
+
+
+def test_table_index():
+    rng = np.random.default_rng(0)
+    tables = [rng.uniform(-1.0, 1.0, (1, 3, 4, 5)) for _ in range(20)]
+    tables += [np.zeros((1, 3, 4, 5)), np.ones((1, 1, 4, 5))]
+
+    index = TableIndex()
+    for i, table in enumerate(tables):
+        index.add(f"FE{i}", table)
+
+    for i, table in enumerate(tables):
+        # Tables that are equal up to the tolerances are candidates
+        for scale in (1.0, 1.0 + 0.99 * default_rtol, 1.0 - 0.99 * default_rtol):
+            close = table * scale + 0.99 * default_atol
+            assert equal_tables(close, table)
+            assert f"FE{i}" in index.candidates(close)
+
+    # Tables of another shape or with other values are not
+    assert index.candidates(np.zeros((1, 3, 4, 6))) == []
+    assert index.candidates(tables[0] + 0.1) == []
+
+    # Candidates are in the order the tables were added, and a table
+    # replaced by a table with the same key keeps its position
+    index.add("FE_copy", tables[3])
+    index.add("FE3", tables[3])
+    assert index.candidates(tables[3]) == ["FE3", "FE_copy"]
+    index.add("FE3", tables[4])
+    assert index.candidates(tables[3]) == ["FE_copy"]
+    assert index.candidates(tables[4]) == ["FE3", "FE4"]
+
+
+def test_table_index_tolerances():
+    table = np.full((1, 1, 2, 2), 100.0)
+    close = np.full((1, 1, 2, 2), 100.5)
+    assert equal_tables(close, table, rtol=1e-2, atol=0.0)
+    assert not equal_tables(close, table)
+
+    # Candidates are found with the tolerances of the index
+    for rtol, candidates in ((1e-2, [0]), (default_rtol, [])):
+        index = TableIndex(rtol=rtol, atol=0.0)
+        index.add(0, table)
+        assert index.candidates(close) == candidates
+
+
+@pytest.mark.parametrize("cellname", ["triangle", "quadrilateral", "tetrahedron", "hexahedron"])
+def test_map_facet_points(cellname):
+    celltype = basix.cell.string_to_type(cellname)
+    facettype = basix.cell.subentity_types(celltype)[-2][0]
+    reference_vertices = basix.geometry(facettype)
+    vertices = basix.geometry(celltype)
+    for facet, facet_vertices in enumerate(basix.topology(celltype)[-2]):
+        points = map_facet_points(reference_vertices, facet, cellname)
+        np.testing.assert_array_equal(points, vertices[facet_vertices])
+
+
+def test_permute_quadrature():
+    points = np.array([[0.1, 0.2], [0.6, 0.3]])
+    np.testing.assert_allclose(permute_quadrature_interval(points[:, :1], 1), [[0.9], [0.4]])
+
+    # Three rotations of a triangle and four of a quadrilateral are the identity
+    np.testing.assert_allclose(permute_quadrature_triangle(points, 0, 3), points)
+    np.testing.assert_allclose(permute_quadrature_quadrilateral(points, 0, 4), points)
+    np.testing.assert_allclose(permute_quadrature_triangle(points, 0, 1), [[0.2, 0.7], [0.3, 0.1]])
+    np.testing.assert_allclose(
+        permute_quadrature_quadrilateral(points, 1, 1), [[0.9, 0.2], [0.4, 0.3]]
+    )
+
+
+@pytest.mark.parametrize("degree", range(1, 12))
+def test_permute_quadrature_bit_identical(degree):
+    # Points permuted one row at a time, as before vectorisation
+    def rotate_triangle(p):
+        return [p[1], 1 - p[0] - p[1]]
+
+    def rotate_quadrilateral(p):
+        return [p[1], 1 - p[0]]
+
+    def reference(points, rotate, reflections, rotations):
+        output = points.copy()
+        for _ in range(rotations):
+            for n, p in enumerate(output):
+                output[n] = rotate(p)
+        for _ in range(reflections):
+            for n, p in enumerate(output):
+                output[n] = [p[1], p[0]]
+        return output
+
+    for cellname, permute, rotate, num_rotations in [
+        ("triangle", permute_quadrature_triangle, rotate_triangle, 3),
+        ("quadrilateral", permute_quadrature_quadrilateral, rotate_quadrilateral, 4),
+    ]:
+        points, _ = basix.make_quadrature(basix.cell.string_to_type(cellname), degree)
+        for ref in range(2):
+            for rot in range(num_rotations):
+                np.testing.assert_array_equal(
+                    permute(points, ref, rot), reference(points, rotate, ref, rot)
+                )
+
+    points, _ = basix.make_quadrature(basix.CellType.interval, degree)
+    np.testing.assert_array_equal(permute_quadrature_interval(points, 1), 1 - points)
+
+
+@pytest.mark.parametrize(
+    "cellname,permute,permutations",
+    [
+        (
+            "tetrahedron",
+            permute_quadrature_triangle,
+            [(ref, rot) for rot in range(3) for ref in range(2)],
+        ),
+        (
+            "hexahedron",
+            permute_quadrature_quadrilateral,
+            [(ref, rot) for rot in range(4) for ref in range(2)],
+        ),
+    ],
+)
+def test_interior_facet_tables(cellname, permute, permutations):
+    element = basix.ufl.element("DG", cellname, 2)
+    cell = ufl.Cell(cellname)
+    points, _, _ = create_quadrature_points_and_weights(
+        "interior_facet", cell, 4, "default", [element]
+    )
+    permuted_points = np.array([permute(points, ref, rot) for ref, rot in permutations])
+    for derivatives in [(0, 0, 0), (1, 0, 0), (0, 1, 1)]:
+        # Tables of all permutations, tabulated at once
+        tables = get_ffcx_table_values(
+            permuted_points, cell, "interior_facet", element, None, "facet", derivatives, 0, 2
+        )["array"]
+
+        # Tables of each permutation and facet, tabulated separately
+        reference = np.array(
+            [
+                [
+                    element.tabulate(
+                        sum(derivatives), map_integral_points(p, "interior_facet", cell, facet)
+                    )[basix_index(derivatives)]
+                    for facet in range(cell.num_facets())
+                ]
+                for p in permuted_points
+            ]
+        )
+        np.testing.assert_allclose(tables, reference, rtol=default_rtol, atol=default_atol)
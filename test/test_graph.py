@@ -0,0 +1,80 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+
+import basix.ufl
+import numpy as np
+import pytest
+import ufl
+
+from ffcx.ir.analysis.graph import ExpressionGraph, build_scalar_graph, replace_scalar_nodes
+
+
+def test_expression_graph():
+    G = ExpressionGraph()
+    for i in range(4):
+        assert G.add_node(ufl.as_ufl(float(i))) == i
+    G.add_edge(0, 2)
+    G.add_edge(0, 1)
+    G.add_edges([3, 0], [0, 2])
+
+    # Edges are kept in insertion order, including repeated edges
+    assert G.out_edges[0].tolist() == [2, 1, 2]
+    assert G.in_edges[2].tolist() == [0, 0]
+    assert G.out_edges.neighbours(np.array([3, 0])).tolist() == [0, 2, 1, 2]
+    assert G.number_of_edges() == 4
+
+    # Edges added after reading them are merged
+    G.add_edge(1, 3)
+    assert G.out_edges[1].tolist() == [3]
+    assert G.in_edges[3].tolist() == [1]
+    with pytest.raises(KeyError):
+        G.add_edge(0, 4)
+
+    # Attributes are available through a dict-like view
+    G.target[2] = True
+    G.set_status([1, 2], "varying")
+    assert G.nodes[2]["expression"] == ufl.as_ufl(2.0)
+    assert G.nodes[2]["target"] and not G.nodes[1].get("target", False)
+    assert G.nodes[1]["status"] == "varying" and G.nodes[3]["status"] == "inactive"
+    assert G.nodes_with_status("varying").tolist() == [1, 2]
+    G.nodes[3]["component"] = [0]
+    assert G.component == {3: [0]}
+    assert set(G.nodes[3]) == {"expression", "status", "component"}
+
+
+def test_build_scalar_graph():
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    u = ufl.Coefficient(V)
+    expression = ufl.as_vector([u[0] * u[1], u[0] * u[1] + u[0]])
+
+    G = build_scalar_graph(expression)
+    t0, t1 = sorted(G.target)
+    assert G.component[t0] == [0] and G.component[t1] == [1]
+
+    # The product is shared by both components
+    assert t0 in G.out_edges[t1]
+
+    # Each node depends on the nodes of its operands
+    for i, expr in enumerate(G.expressions):
+        if not expr._ufl_is_terminal_ and not expr._ufl_is_terminal_modifier_:
+            assert [G.expressions[j] for j in G.out_edges[i]] == list(expr.ufl_operands)
+
+
+def test_replace_scalar_nodes():
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    u = ufl.Coefficient(V)
+    expression = ufl.as_vector([u[0] * u[1], u[0] * u[1] + u[0]])
+
+    # Replacing u[1] by zero removes the product from the graph
+    S = build_scalar_graph(expression)
+    replace_scalar_nodes(S, {S.e2i[u[1]]: ufl.as_ufl(0.0)})
+    assert S.expressions == [ufl.as_ufl(0.0), u[0]]
+    assert S.e2i == {ufl.as_ufl(0.0): 0, u[0]: 1}
+    assert S.target == {0: True, 1: True}
+    assert S.component == {0: [0], 1: [1]}
+    assert S.number_of_edges() == 0
@@ -0,0 +1,59 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+
+import basix.ufl
+import ufl
+
+from ffcx.compiler import compile_ufl_objects
+from ffcx.options import get_options
+from ffcx.report import CompileReport
+
+
+def _forms(source_degree):
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 2))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    f = ufl.Coefficient(V)
+    c = ufl.Constant(mesh)
+
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx + c * u * v * ufl.ds
+    L = f**source_degree * v * ufl.dx + c * v * ufl.ds
+    return [a, L]
+
+
+def _compile(forms, options, report=None):
+    return compile_ufl_objects(forms, options=options, prefix="integral_cache", report=report)
+
+
+def test_integral_cache(tmp_path):
+    options = get_options({"integral_cache": str(tmp_path)})
+    ref = _compile(_forms(1), get_options())
+
+    # Integrals are generated on a miss, and reused on a hit
+    assert _compile(_forms(1), options) == ref
+    report = CompileReport()
+    assert _compile(_forms(1), options, report) == ref
+    assert len(report.kernels) == 4
+    assert all(k.num_tables == 0 for k in report.kernels)
+
+    # Only the edited integral is generated again, the others are
+    # renamed
+    ref = _compile(_forms(2), get_options())
+    report = CompileReport()
+    assert _compile(_forms(2), options, report) == ref
+    assert [k.num_tables > 0 for k in report.kernels] == [False, False, True, False]
+
+
+def test_integral_cache_options(tmp_path):
+    options = get_options({"integral_cache": str(tmp_path)})
+    _compile(_forms(1), options)
+
+    # Options changing the code are part of the key
+    ref = _compile(_forms(1), get_options({"scalar_type": "float32"}))
+    assert _compile(_forms(1), get_options({**options, "scalar_type": "float32"})) == ref
+
+    # The cache directory itself is not part of the generated code
+    assert _compile(_forms(1), options)[0] == _compile(_forms(1), get_options())[0]
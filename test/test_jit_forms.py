@@ -12,6 +12,7 @@ import ufl
 from sympy.abc import x, y, z
 
 import ffcx.codegeneration.jit
+import ffcx.report
 from ffcx.codegeneration.utils import dtype_to_c_type, dtype_to_scalar_dtype
 
 
@@ -1074,3 +1075,124 @@ def test_integral_grouping(compile_args):
         ]
     )
     assert len(unique_integrals) == 2
+
+
+@pytest.mark.parametrize("backend,compile_workers", [("cffi", 4), ("dlopen", 1), ("dlopen", 4)])
+def test_build_modes(backend, compile_workers, compile_args):
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 2))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx + ufl.inner(u, v) * ufl.dx(1)
+    L = ufl.inner(1.0, v) * ufl.ds + ufl.inner(2.0, v) * ufl.dx
+    forms = [a, L]
+
+    compiled_ref, module_ref, _ = ffcx.codegeneration.jit.compile_forms(
+        forms, cffi_extra_compile_args=compile_args
+    )
+    ffcx.codegeneration.jit.module_cache.clear()
+    compiled_forms, module, _ = ffcx.codegeneration.jit.compile_forms(
+        forms,
+        cffi_extra_compile_args=compile_args,
+        compile_workers=compile_workers,
+        backend=backend,
+    )
+    assert (module.__name__ == module_ref.__name__) == (backend == "cffi")
+    assert module.__file__ != module_ref.__file__
+
+    ffi = module.ffi
+    coords = np.array([[0.0, 0.0, 0.0], [2.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float64)
+    w = np.array([], dtype=np.float64)
+    c = np.array([], dtype=np.float64)
+    facet = np.array([1], dtype=np.intc)
+    perm = np.array([0], dtype=np.uint8)
+    for form, form_ref in zip(compiled_forms, compiled_ref):
+        assert form.form_integral_offsets[3] == form_ref.form_integral_offsets[3]
+        for i in range(form.form_integral_offsets[3]):
+            shape = (6, 6) if form.rank == 2 else (6,)
+            A, A_ref = np.zeros(shape), np.zeros(shape)
+            for integral, B in [(form.form_integrals[i], A), (form_ref.form_integrals[i], A_ref)]:
+                integral.tabulate_tensor_float64(
+                    ffi.cast("double *", B.ctypes.data),
+                    ffi.cast("double *", w.ctypes.data),
+                    ffi.cast("double *", c.ctypes.data),
+                    ffi.cast("double *", coords.ctypes.data),
+                    ffi.cast("int *", facet.ctypes.data),
+                    ffi.cast("uint8_t *", perm.ctypes.data),
+                )
+            assert np.allclose(A, A_ref)
+            assert not np.allclose(A, 0.0)
+
+
+def test_compile_report(tmp_path, compile_args):
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 2))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx + ufl.inner(u, v) * ufl.ds
+
+    report = ffcx.report.CompileReport(trace_memory=True)
+    ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args, report=report
+    )
+    assert report.cache == "miss"
+    assert report.module_name is not None
+    assert [s.name for s in report.stages] == [
+        "analysis",
+        "ir",
+        "codegen",
+        "formatting",
+        "c_compile",
+        "load",
+    ]
+    assert all(s.wall_time > 0 for s in report.stages)
+    assert report.stage_time("analysis") > 0
+    assert report.stages[0].peak_memory > 0
+    assert sorted(k.integral_type for k in report.kernels) == ["cell", "exterior_facet"]
+    for kernel in report.kernels:
+        assert kernel.graph_nodes > 0
+        assert kernel.num_tables > 0 and kernel.table_bytes > 0
+        assert kernel.source_size > 0
+    assert report.as_dict()["kernels"][0]["name"] == report.kernels[0].name
+
+    report = ffcx.report.CompileReport()
+    ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args, report=report
+    )
+    assert report.cache == "memory" and not report.stages
+
+    ffcx.codegeneration.jit.module_cache.clear()
+    report = ffcx.report.CompileReport()
+    ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args, report=report
+    )
+    assert report.cache == "disk"
+    assert [s.name for s in report.stages] == ["load"]
+    assert report.stages[0].peak_memory is None
+
+    # Only the C compiler runs for new compiler flags
+    report = ffcx.report.CompileReport()
+    ffcx.codegeneration.jit.compile_forms(
+        [a], cache_dir=tmp_path, cffi_extra_compile_args=compile_args + ["-g0"], report=report
+    )
+    assert report.cache == "code"
+    assert [s.name for s in report.stages] == ["formatting", "c_compile", "load"]
+
+
+@pytest.mark.parametrize("dtype", ["float64", "complex64"])
+def test_integral_cost(dtype, compile_args):
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    forms = []
+    for degree in (1, 3):
+        V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", degree))
+        u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+        forms.append(ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx)
+
+    compiled_forms, _module, _code = ffcx.codegeneration.jit.compile_forms(
+        forms, options={"scalar_type": dtype}, cffi_extra_compile_args=compile_args
+    )
+    p1, p3 = (form.form_integrals[0] for form in compiled_forms)
+
+    # Tensor computation of P1 on triangles: 3 x 3 entries, each with
+    # 2 products of gradients, 1 sum and 1 addition to A
+    assert 4 * 9 < p1.cost_flops < p3.cost_flops
+    assert 0 < p1.cost_table_bytes < p3.cost_table_bytes
+    assert 0 < p1.cost_stack_bytes <= p3.cost_stack_bytes
@@ -1,12 +1,19 @@
 import importlib
 
+import basix.ufl
 import numpy as np
 import pytest
+import ufl
 from cffi import FFI
 
+from ffcx.analysis import analyze_ufl_objects
+from ffcx.codegeneration import cost
 from ffcx.codegeneration import lnodes as L
 from ffcx.codegeneration.C.c_implementation import CFormatter
 from ffcx.codegeneration.utils import dtype_to_c_type
+from ffcx.compiler import compile_ufl_objects
+from ffcx.ir.representation import compute_ir
+from ffcx.options import get_options
 
 
 @pytest.mark.parametrize("dtype", ("float32", "float64", "intc"))
@@ -102,3 +109,58 @@ def test_gemv(dtype):
 
     gemv(py, pA, px)
     assert np.all(y == result)
+
+
+def test_count_operations():
+    p, q = 5, 16
+
+    y = L.Symbol("y", dtype=L.DataType.SCALAR)
+    A = L.Symbol("A", dtype=L.DataType.REAL)
+    x = L.Symbol("w", dtype=L.DataType.SCALAR)
+    i = L.Symbol("i", dtype=L.DataType.INT)
+    j = L.Symbol("j", dtype=L.DataType.INT)
+    m_ij = L.MultiIndex([i, j], [p, q])
+
+    body = [L.AssignAdd(y[i], A[m_ij] * x[j])]
+    body = [L.ForRange(i, 0, p, body=body)]
+    loop = L.ForRange(j, 0, q, body=body)
+    scale = L.Assign(y[0], L.MathFunction("sqrt", [y[0]]) / 2.0)
+    code = L.StatementList(
+        [
+            L.ArrayDecl(A, sizes=(p * q,), values=np.ones(p * q), const=True),
+            L.Section("Tensor Computation", [loop], []),
+            scale,
+        ]
+    )
+
+    counts = cost.count_operations(code)
+    assert counts["Tensor Computation"] == cost.OperationCount(
+        adds=p * q, muls=p * q, table_loads=p * q, coefficient_loads=p * q
+    )
+    assert counts["Other"] == cost.OperationCount(divs=1, math_calls=1)
+    assert cost.total(counts).flops == 2 * p * q + 2
+    assert cost.estimate_cost(code, "float32") == cost.KernelCost(2 * p * q + 2, 4 * p * q, 0)
+
+
+def test_kernel_operations():
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "triangle", 2))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    f = ufl.Coefficient(V)
+    forms = [ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx, f * v * ufl.dx]
+    expression = (ufl.grad(f), np.array([[0.25, 0.25]]))
+
+    options = get_options()
+    analysis = analyze_ufl_objects([*forms, expression], options["scalar_type"])
+    ir = compute_ir(analysis, {}, "cost", options, False)
+    a, L_ = (cost.kernel_operations(integral_ir, options) for integral_ir in ir.integrals)
+    assert {"Jacobian", "Tensor Computation"} <= a.keys()
+    assert "Coefficient" in L_
+    assert cost.total(a).flops > cost.total(L_).flops > 0
+    assert cost.total(cost.kernel_operations(ir.expressions[0], options)).flops > 0
+
+    # Optionally written to the generated code
+    _, code = compile_ufl_objects(forms, options=get_options({"count_operations": True}))
+    assert code.count("// Operation count") == 2
+    _, code = compile_ufl_objects(forms, options=options)
+    assert "// Operation count" not in code
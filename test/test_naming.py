@@ -0,0 +1,33 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+
+import basix.ufl
+import ufl
+
+from ffcx import naming
+
+
+def test_integral_names():
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    domain = ufl.Mesh(basix.ufl.element("Lagrange", "triangle", 1, shape=(2,)))
+    space = ufl.FunctionSpace(domain, element)
+    u, v = ufl.TrialFunction(space), ufl.TestFunction(space)
+    a = ufl.inner(u, v) * ufl.dx
+    b = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx
+
+    names = set()
+    for form_id, form in enumerate([a, b]):
+        names.add(naming.form_name(form, form_id, "prefix"))
+        for subdomain_id in [(1,), (2,), ("otherwise",)]:
+            names.add(naming.integral_name(form, "cell", form_id, subdomain_id, "prefix"))
+            names.add(naming.integral_name(form, "cell", form_id, subdomain_id, "other"))
+    assert len(names) == 2 * (1 + 3 * 2)
+
+    # Names depend on the form signature, not on the form object
+    a2 = ufl.inner(u, v) * ufl.dx
+    assert naming.form_name(a2, 0, "prefix") == naming.form_name(a, 0, "prefix")
+    assert naming.form_signature(a2) == naming.form_signature(a)
+    assert naming.form_signature(a) != naming.form_signature(b)
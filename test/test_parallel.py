@@ -0,0 +1,141 @@
+# Copyright (C) 2024 FEniCS Project
+#
+# This file is part of FFCx. (https://www.fenicsproject.org)
+#
+# SPDX-License-Identifier:    LGPL-3.0-or-later
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import basix.ufl
+import numpy as np
+import pytest
+import ufl
+
+import ffcx.codegeneration.jit
+import ffcx.ir.representation
+from ffcx import parallel
+from ffcx.analysis import analyze_ufl_objects
+from ffcx.codegeneration.codegeneration import generate_code
+from ffcx.compiler import compile_ufl_objects
+from ffcx.ir.representation import compute_ir
+from ffcx.options import get_options
+from ffcx.report import CompileReport
+
+
+def _forms_and_expressions():
+    mesh = ufl.Mesh(basix.ufl.element("Lagrange", "tetrahedron", 1, shape=(3,)))
+    V = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "tetrahedron", 2, shape=(3,)))
+    Q = ufl.FunctionSpace(mesh, basix.ufl.element("Lagrange", "tetrahedron", 1))
+    u, v = ufl.TrialFunction(V), ufl.TestFunction(V)
+    f = ufl.Coefficient(V)
+    p = ufl.Coefficient(Q)
+    c = ufl.Constant(mesh)
+
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx + c * ufl.inner(u, v) * ufl.ds(1)
+    a += p * ufl.inner(ufl.avg(u), ufl.avg(v)) * ufl.dS
+    L = ufl.inner(f, v) * ufl.dx(2) + p * ufl.div(v) * ufl.dx(3)
+    points = np.array([[0.0, 0.0, 0.0], [0.25, 0.25, 0.25]])
+    expressions = [(ufl.grad(f), points), (p * ufl.div(f), points)]
+    return [a, L], expressions
+
+
+def test_run_tasks():
+    results = parallel.run_tasks([lambda i=i: (i, np.arange(i)) for i in range(5)], 3)
+    assert [r[0] for r in results] == list(range(5))
+    assert all(np.array_equal(r[1], np.arange(i)) for i, r in enumerate(results))
+
+    # Results equal to shared objects are replaced by them
+    element = basix.ufl.element("Lagrange", "triangle", 1)
+    results = parallel.run_tasks(
+        [lambda: basix.ufl.element("Lagrange", "triangle", 1)] * 2, 2, [element]
+    )
+    assert results[0] is element and results[1] is element
+
+    # Results that cannot be pickled are computed again in this process
+    results = parallel.run_tasks([lambda: element.basix_element] * 2, 2)
+    assert all(r is element.basix_element for r in results)
+
+
+def test_run_tasks_threads(caplog):
+    pids = parallel.run_tasks([os.getpid] * 2, 2)
+    if parallel.can_fork() and threading.active_count() == 1:
+        assert os.getpid() not in pids
+
+    # Processes are not forked while other threads are running, which
+    # is logged and reported
+    report = CompileReport()
+    with ThreadPoolExecutor(1) as executor:
+        pids = executor.submit(parallel.run_tasks, [os.getpid] * 2, 2, report=report).result()
+    assert pids == [os.getpid()] * 2
+    assert report.workers_fallback == "other threads are running"
+    assert "instead of 2 workers" in caplog.text
+
+
+@pytest.mark.skipif(not parallel.can_fork(), reason="requires fork")
+def test_run_tasks_after_async(tmp_path, compile_args):
+    forms, _ = _forms_and_expressions()
+    jit = ffcx.codegeneration.jit
+    jit.compile_forms_async(
+        [forms[1]], cache_dir=tmp_path, cffi_extra_compile_args=compile_args
+    ).result()
+
+    # The idle shared thread pool is shut down, so processes are forked
+    for thread in threading.enumerate():
+        if thread.name.startswith("ffcx-jit"):
+            thread.join(timeout=10)
+    assert jit._executor is None
+    assert os.getpid() not in parallel.run_tasks([os.getpid] * 2, 2)
+
+
+@pytest.mark.skipif(not parallel.can_fork(), reason="requires fork")
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_ir(workers, tmp_path, monkeypatch):
+    forms, expressions = _forms_and_expressions()
+    objects = forms + expressions
+    ref = compile_ufl_objects(objects, options=get_options(), prefix="ref")
+
+    # The IR of each integral and expression is computed in a worker
+    # process, which records its pid
+    def record_pid(compute_ir):
+        def compute_and_record(*args):
+            tmp_path.joinpath(str(os.getpid())).touch()
+            return compute_ir(*args)
+
+        return compute_and_record
+
+    for name in ("_compute_integral_ir", "_compute_expression_ir"):
+        monkeypatch.setattr(
+            ffcx.ir.representation, name, record_pid(getattr(ffcx.ir.representation, name))
+        )
+    report = CompileReport()
+    code = compile_ufl_objects(
+        objects, options=get_options({"workers": workers}), prefix="ref", report=report
+    )
+    assert code == ref
+    assert report.workers_fallback is None
+    pids = {int(f.name) for f in tmp_path.iterdir()}
+    assert pids and os.getpid() not in pids
+
+
+def test_parallel_codegen():
+    forms, expressions = _forms_and_expressions()
+    options = get_options()
+    analysis = analyze_ufl_objects(forms + expressions, options["scalar_type"])
+    ir = compute_ir(analysis, {}, "codegen", options, False)
+    ref = generate_code(ir, options)
+    code = generate_code(ir, {**options, "workers": 3})
+    assert code.integrals == ref.integrals
+    assert code.expressions == ref.expressions
+    for integral_ir, (_, impl) in zip(ir.integrals, code.integrals):
+        assert f"tabulate_tensor_{integral_ir.name}" in impl
+
+
+def test_workers_signature():
+    forms, _ = _forms_and_expressions()
+    names = {
+        ffcx.codegeneration.jit._module_names("forms", forms, get_options(o), None, None, "cffi")
+        for o in ({}, {"workers": 4})
+    }
+    assert len(names) == 1